@@ -1,10 +1,12 @@
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.documents.mixins import SparseFieldsetMixin
+from apps.documents.search import IndexedSearchFilter
 from .models import Company
 from .serializers import CompanySerializer
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar empresas.
 
@@ -17,7 +19,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
     """
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_active']
     search_fields = ['name', 'tax_id']
     ordering_fields = ['name', 'created_at']
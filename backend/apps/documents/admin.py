@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DocumentType, Document, DocumentValidationLog
+from .models import DocumentType, Document, DocumentValidationLog, OrphanedS3Object, N8NDispatch, ValidationRule
 
 
 @admin.register(DocumentType)
@@ -28,3 +28,28 @@ class DocumentValidationLogAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at']
     autocomplete_fields = ['document']
     date_hierarchy = 'created_at'
+
+
+@admin.register(OrphanedS3Object)
+class OrphanedS3ObjectAdmin(admin.ModelAdmin):
+    list_display = ['s3_key', 's3_bucket', 'attempts', 'created_at']
+    search_fields = ['s3_key']
+    readonly_fields = ['id', 'created_at']
+
+
+@admin.register(N8NDispatch)
+class N8NDispatchAdmin(admin.ModelAdmin):
+    list_display = ['document', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['document__file_name', 'webhook_url']
+    readonly_fields = ['id', 'created_at', 'claimed_at', 'sent_at', 'last_error']
+    autocomplete_fields = ['document']
+
+
+@admin.register(ValidationRule)
+class ValidationRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'entity_type', 'document_type', 'kind', 'error_type', 'is_active', 'updated_at']
+    list_filter = ['entity_type', 'kind', 'is_active']
+    search_fields = ['name', 'error_type']
+    readonly_fields = ['id', 'created_at', 'updated_at']
+    autocomplete_fields = ['document_type']
@@ -0,0 +1,94 @@
+"""
+Buffered writer for the document audit log (DocumentValidationLog).
+
+Signal receivers call `record()` / `record_many()`. Inside a transaction the
+rows are buffered and written with a single bulk_create once the transaction
+commits, so nothing is logged for work that is rolled back. Outside a
+transaction the rows are written right away.
+"""
+import threading
+from functools import partial
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+
+from .models import DocumentValidationLog
+
+_local = threading.local()
+
+
+def record(using: Optional[str] = None, **fields) -> DocumentValidationLog:
+    """
+    Registra una entrada del log de auditoría.
+
+    Args:
+        using: Alias de la base de datos
+        **fields: Campos de DocumentValidationLog
+
+    Returns:
+        La entrada (aún sin guardar si hay una transacción en curso)
+    """
+    return record_many([DocumentValidationLog(**fields)], using=using)[0]
+
+
+def record_many(logs: Iterable[DocumentValidationLog],
+                using: Optional[str] = None) -> List[DocumentValidationLog]:
+    """
+    Registra varias entradas del log de auditoría con un solo INSERT.
+
+    Args:
+        logs: Entradas de DocumentValidationLog sin guardar
+        using: Alias de la base de datos
+
+    Returns:
+        Las entradas registradas
+    """
+    logs = list(logs)
+    if not logs:
+        return logs
+
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return DocumentValidationLog.objects.using(connection.alias).bulk_create(logs)
+
+    _get_buffer(connection).extend(logs)
+    return logs
+
+
+def _get_buffer(connection) -> List[DocumentValidationLog]:
+    """
+    Buffer del bloque atómico actual. Hay uno por savepoint para que, si un
+    bloque interno hace rollback, Django descarte su flush junto con él.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    entry = buffers.get(key)
+    if entry is not None and _is_pending(connection, entry[0]):
+        return entry[1]
+
+    # Descarta buffers cuya transacción hizo rollback
+    for stale_key, (flush, _) in list(buffers.items()):
+        if stale_key[0] == connection.alias and not _is_pending(connection, flush):
+            del buffers[stale_key]
+
+    logs = []
+    flush = partial(_flush, connection.alias, key, logs)
+    transaction.on_commit(flush, using=connection.alias)
+    buffers[key] = (flush, logs)
+    return logs
+
+
+def _is_pending(connection, flush) -> bool:
+    return any(callback is flush for _, callback, _ in connection.run_on_commit)
+
+
+def _flush(alias: str, key, logs: List[DocumentValidationLog]) -> None:
+    buffers = getattr(_local, 'buffers', {})
+    entry = buffers.get(key)
+    if entry is not None and entry[1] is logs:
+        del buffers[key]
+    if logs:
+        DocumentValidationLog.objects.using(alias).bulk_create(logs)
@@ -0,0 +1,200 @@
+"""
+Circuit breaker and concurrency limiter for N8N webhooks.
+
+State lives in the Django cache, so every gunicorn worker and dispatch worker
+shares the same breaker per webhook URL (Redis when REDIS_URL is set).
+"""
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+from .constants import CircuitState
+from .signals import n8n_circuit_state_changed
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookUnavailable(Exception):
+    """El webhook no se llamó; se puede reintentar después de `retry_after` segundos."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(WebhookUnavailable):
+    """El circuito del webhook está abierto."""
+
+
+class ConcurrencyLimitReached(WebhookUnavailable):
+    """El webhook ya tiene el máximo de requests en curso."""
+
+
+class CircuitBreaker:
+    """
+    Breaker per webhook URL with closed, open and half-open states.
+
+    - closed: requests pass; `failure_threshold` failures within
+      `failure_window` seconds open the circuit.
+    - open: requests fail fast with `CircuitOpen` for `recovery_timeout` seconds.
+    - half-open: a single probe request is let through; success closes the
+      circuit, failure opens it again.
+
+    `guard()` also caps the requests in flight to the webhook across all
+    workers at `max_concurrency`.
+    """
+
+    def __init__(self, webhook_url: str, cache=None, failure_threshold: Optional[int] = None,
+                 failure_window: Optional[int] = None, recovery_timeout: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, slot_timeout: Optional[float] = None):
+        self.webhook_url = webhook_url
+        self.cache = cache or default_cache
+        self.failure_threshold = failure_threshold or settings.N8N_CIRCUIT_FAILURE_THRESHOLD
+        self.failure_window = failure_window or settings.N8N_CIRCUIT_FAILURE_WINDOW
+        self.recovery_timeout = recovery_timeout or settings.N8N_CIRCUIT_RECOVERY_TIMEOUT
+        self.max_concurrency = max_concurrency or settings.N8N_WEBHOOK_MAX_CONCURRENCY
+        # Un slot o una prueba que nadie libera (worker caído) expira solo
+        self.slot_timeout = slot_timeout or (
+            settings.N8N_CONNECT_TIMEOUT + settings.N8N_READ_TIMEOUT + 30
+        )
+
+        digest = hashlib.sha1(webhook_url.encode()).hexdigest()
+        self._state_key = f'n8n-circuit:{digest}:state'
+        self._failures_key = f'n8n-circuit:{digest}:failures'
+        self._probe_key = f'n8n-circuit:{digest}:probe'
+        self._in_flight_key = f'n8n-circuit:{digest}:in-flight'
+
+    def get_state(self) -> Dict[str, Any]:
+        """Estado actual del circuito: {state, opened_at, changed_at}."""
+        return self.cache.get(self._state_key) or {
+            'state': CircuitState.CLOSED,
+            'opened_at': None,
+            'changed_at': None,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado del circuito para monitoreo."""
+        state = self.get_state()
+        return {
+            'webhook_url': self.webhook_url,
+            'state': state['state'],
+            'opened_at': state['opened_at'],
+            'changed_at': state['changed_at'],
+            'recent_failures': self.cache.get(self._failures_key, 0),
+            'in_flight': self.cache.get(self._in_flight_key, 0),
+            'max_concurrency': self.max_concurrency,
+        }
+
+    @contextmanager
+    def guard(self):
+        """
+        Deja pasar el request si el circuito lo permite y hay un slot libre.
+
+        Raises:
+            CircuitOpen: El circuito está abierto (o ya hay una prueba en curso)
+            ConcurrencyLimitReached: No hay slots libres para el webhook
+        """
+        probing = self._before_request()
+        try:
+            self._acquire_slot()
+        except ConcurrencyLimitReached:
+            if probing:
+                self.cache.delete(self._probe_key)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def record_success(self) -> None:
+        """Registra un request exitoso; cierra el circuito si estaba en prueba."""
+        self.cache.delete(self._failures_key)
+        if self.get_state()['state'] != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+            self.cache.delete(self._probe_key)
+
+    def record_failure(self) -> None:
+        """Registra una falla del webhook; abre el circuito al superar el umbral."""
+        state = self.get_state()['state']
+        if state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            self.cache.delete(self._probe_key)
+            return
+
+        failures = self._incr(self._failures_key, self.failure_window)
+        if state == CircuitState.CLOSED and failures >= self.failure_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def _before_request(self) -> bool:
+        """Retorna True si este request es la prueba del estado half-open."""
+        state = self.get_state()
+        if state['state'] == CircuitState.CLOSED:
+            return False
+
+        if state['state'] == CircuitState.OPEN:
+            remaining = state['opened_at'] + self.recovery_timeout - time.time()
+            if remaining > 0:
+                raise CircuitOpen(
+                    f"Circuito abierto para el webhook N8N {self.webhook_url}",
+                    retry_after=remaining
+                )
+
+        # Solo un request (en todos los workers) prueba el webhook
+        if not self.cache.add(self._probe_key, 1, timeout=self.slot_timeout):
+            raise CircuitOpen(
+                f"Circuito en prueba para el webhook N8N {self.webhook_url}",
+                retry_after=self.recovery_timeout
+            )
+        if state['state'] == CircuitState.OPEN:
+            self._transition(CircuitState.HALF_OPEN)
+        return True
+
+    def _acquire_slot(self) -> None:
+        in_flight = self._incr(self._in_flight_key, self.slot_timeout)
+        if in_flight > self.max_concurrency:
+            self._release_slot()
+            raise ConcurrencyLimitReached(
+                f"El webhook N8N {self.webhook_url} ya tiene {self.max_concurrency} requests en curso",
+                retry_after=1
+            )
+
+    def _release_slot(self) -> None:
+        try:
+            self.cache.decr(self._in_flight_key)
+        except ValueError:
+            # El contador expiró mientras el request estaba en curso
+            pass
+
+    def _incr(self, key: str, timeout: float) -> int:
+        self.cache.add(key, 0, timeout=timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, timeout=timeout)
+            return 1
+
+    def _transition(self, new_state: str) -> None:
+        previous_state = self.get_state()['state']
+        now = time.time()
+        self.cache.set(self._state_key, {
+            'state': new_state,
+            'opened_at': now if new_state == CircuitState.OPEN else None,
+            'changed_at': now,
+        }, timeout=None)
+
+        logger.warning(
+            "Circuito del webhook N8N %s: %s -> %s",
+            self.webhook_url, previous_state, new_state
+        )
+        n8n_circuit_state_changed.send(
+            sender=CircuitBreaker,
+            webhook_url=self.webhook_url,
+            previous_state=previous_state,
+            new_state=new_state
+        )
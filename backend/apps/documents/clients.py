@@ -0,0 +1,128 @@
+"""
+Process-wide registry of pooled clients for external services (S3, N8N webhooks).
+
+Clients are built lazily on first use and shared by every request and thread
+of the worker process. The registry is cleared in forked children so that
+pooled sockets are never shared between gunicorn workers.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict
+
+import boto3
+import requests
+from botocore.config import Config
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ClientRegistry:
+    """
+    Thread-safe, fork-aware cache of client instances keyed by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Any] = {}
+        self._pid = os.getpid()
+
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        Retorna el cliente registrado con `name`, construyéndolo si no existe.
+
+        Args:
+            name: Clave del cliente
+            factory: Función sin argumentos que construye el cliente
+
+        Returns:
+            Instancia compartida del cliente
+        """
+        if self._pid != os.getpid():
+            self.reset()
+
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = factory()
+                self._clients[name] = client
+            return client
+
+    def reset(self) -> None:
+        """Descarta todos los clientes (por ejemplo después de un fork)."""
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+
+registry = ClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset)
+
+
+def build_s3_client():
+    """Construye un cliente S3 con pool de conexiones y reintentos configurados."""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(
+            signature_version=settings.AWS_S3_SIGNATURE_VERSION,
+            max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+            read_timeout=settings.AWS_S3_READ_TIMEOUT,
+            tcp_keepalive=True,
+            retries={
+                'max_attempts': settings.AWS_S3_MAX_ATTEMPTS,
+                'mode': 'standard',
+            },
+        )
+    )
+
+
+def get_s3_client():
+    """Retorna el cliente S3 compartido del proceso."""
+    return registry.get('s3', build_s3_client)
+
+
+def build_http_session():
+    """
+    Construye una sesión HTTP con pool de conexiones keep-alive.
+
+    Los reintentos solo cubren fallas donde el request no llegó al servidor
+    (conexión rechazada, DNS) y respuestas 502/503/504 a métodos idempotentes;
+    un POST al webhook que pudo haberse procesado no se repite aquí.
+    """
+    retries = Retry(
+        total=settings.N8N_HTTP_MAX_RETRIES,
+        connect=settings.N8N_HTTP_MAX_RETRIES,
+        read=0,
+        status_forcelist=(502, 503, 504),
+        backoff_factor=0.2,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.N8N_HTTP_POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_http_session(origin: str):
+    """
+    Retorna la sesión HTTP compartida del proceso para un origen.
+
+    Args:
+        origin: Esquema, host y puerto (ej: https://n8n.example.com:443)
+    """
+    return registry.get(f'http:{origin}', build_http_session)
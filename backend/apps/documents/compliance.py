@@ -0,0 +1,419 @@
+"""
+Per-entity compliance errors kept in `entity_compliance`.
+
+`fn_validate_documents_bulk` (plus the configurable rules, see `rules`)
+recomputes every entity of a company on each call. Instead, its output is
+stored per entity and only recomputed for the entities
+that changed:
+
+- writes to documents, entities, document types and validation rules bump
+  `EntityComplianceStatus.version` of the affected entities (`mark_stale`);
+- an entity is stale when it was never computed, when
+  `version > refreshed_version`, or when it was last refreshed before today
+  (the date rules, expired and future issue date, depend on the day);
+- `refresh_stale` recomputes only the stale entities, `errors_for` reads the
+  stored rows with an index lookup.
+
+The `refresh_entity_compliance` worker refreshes changed entities in the
+background, so `validate` usually finds nothing to recompute.
+
+Validations at another date (`as_of`) or with an expiring window are not
+stored: `iter_errors_as_of` and `summarize_as_of` run the compiled statement
+directly.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.utils import timezone
+
+from apps.entities.models import Entity
+from . import rules
+from .models import EntityCompliance, EntityComplianceStatus
+
+ERROR_FIELDS = ('entity_id', 'entity_code', 'document_type_code', 'error_type', 'error_message')
+# Orden de fn_validate_documents_bulk; id desempata los errores repetidos
+# (dos documentos rechazados del mismo tipo) para paginar por keyset
+ERROR_ORDERING = ('entity_code', 'error_type', 'document_type_code', 'id')
+
+
+def mark_stale(entity_ids) -> int:
+    """
+    Marca entidades como desactualizadas.
+
+    Args:
+        entity_ids: Ids de entidades, o un queryset que los devuelva
+
+    Returns:
+        Número de estados marcados (las entidades sin estado ya están desactualizadas)
+    """
+    return EntityComplianceStatus.objects.filter(entity_id__in=entity_ids).update(
+        version=F('version') + 1,
+        changed_at=timezone.now()
+    )
+
+
+def mark_entity_type_stale(entity_type: str) -> int:
+    """Marca todas las entidades de un tipo (cambió un tipo de documento)."""
+    return mark_stale(Entity.objects.filter(entity_type=entity_type).values('id'))
+
+
+def stale_condition(debounce: Optional[float] = None) -> Q:
+    """
+    Condición sobre Entity para las entidades desactualizadas.
+
+    Args:
+        debounce: Si se indica, excluye las entidades cambiadas hace menos de
+            estos segundos (siguen recibiendo escrituras)
+    """
+    condition = (
+        Q(compliance_status__isnull=True)
+        | Q(compliance_status__version__gt=F('compliance_status__refreshed_version'))
+        | Q(compliance_status__refreshed_on__lt=timezone.localdate())
+    )
+    if debounce:
+        cutoff = timezone.now() - timedelta(seconds=debounce)
+        condition &= (
+            Q(compliance_status__changed_at__isnull=True)
+            | Q(compliance_status__changed_at__lte=cutoff)
+        )
+    return condition
+
+
+def track(company_id, entity_type: str) -> None:
+    """
+    Crea la fila de estado de las entidades que no la tienen, para que sus
+    cambios incrementen la versión.
+    """
+    missing = Entity.objects.filter(
+        company_id=company_id, entity_type=entity_type, compliance_status__isnull=True
+    ).values_list('id', flat=True)
+    EntityComplianceStatus.objects.bulk_create(
+        [EntityComplianceStatus(entity_id=entity_id) for entity_id in missing],
+        ignore_conflicts=True
+    )
+
+
+def data_version(company_id, entity_type: str) -> int:
+    """
+    Versión de los datos de validación de una empresa y tipo de entidad.
+    Cambia con cada escritura sobre entidades con estado (ver `track`) y al
+    crear entidades.
+    """
+    totals = Entity.objects.filter(company_id=company_id, entity_type=entity_type).aggregate(
+        versions=Sum('compliance_status__version'),
+        entities=Count('id')
+    )
+    return (totals['versions'] or 0) + totals['entities']
+
+
+def target_entities(company_id, entity_type: str, entity_ids: Optional[Sequence] = None) -> QuerySet:
+    """Entidades activas que valida fn_validate_documents_bulk con estos argumentos."""
+    queryset = Entity.objects.filter(company_id=company_id, entity_type=entity_type, is_active=True)
+    if entity_ids:
+        queryset = queryset.filter(id__in=entity_ids)
+    return queryset
+
+
+def compute_errors(company_id, entity_type: str, entity_ids: Sequence) -> List[Dict]:
+    """Errores de las entidades según fn_validate_documents_bulk y las reglas configurables."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            rules.compiled_statement(),
+            rules.statement_params(company_id, entity_type, entity_ids)
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def refresh(company_id, entity_type: str, entity_ids: Sequence) -> int:
+    """
+    Recalcula y reemplaza los errores de las entidades indicadas, que deben
+    ser de `company_id` y `entity_type`.
+
+    Returns:
+        Número de entidades cuyos errores se reemplazaron
+    """
+    entity_ids = [str(entity_id) for entity_id in entity_ids]
+    if not entity_ids:
+        return 0
+
+    # Con la fila de estado creada antes de leer la versión, un cambio
+    # concurrente al cálculo siempre queda registrado como version nueva
+    EntityComplianceStatus.objects.bulk_create(
+        [EntityComplianceStatus(entity_id=entity_id) for entity_id in entity_ids],
+        ignore_conflicts=True
+    )
+    versions = {
+        str(entity_id): version for entity_id, version in EntityComplianceStatus.objects.filter(
+            entity_id__in=entity_ids
+        ).values_list('entity_id', 'version')
+    }
+
+    errors = compute_errors(company_id, entity_type, entity_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        refreshed = {
+            str(entity_id): refreshed_version
+            for entity_id, refreshed_version in EntityComplianceStatus.objects.select_for_update().filter(
+                entity_id__in=entity_ids
+            ).values_list('entity_id', 'refreshed_version')
+        }
+        # Un refresco más nuevo ya escribió estas entidades
+        applied = {
+            entity_id for entity_id, version in versions.items()
+            if refreshed.get(entity_id, 0) <= version
+        }
+        if not applied:
+            return 0
+
+        EntityCompliance.objects.filter(entity_id__in=applied).delete()
+        EntityCompliance.objects.bulk_create([
+            EntityCompliance(
+                entity_id=error['entity_id'],
+                company_id=company_id,
+                entity_type=entity_type,
+                entity_code=error['entity_code'],
+                document_type_code=error['document_type_code'],
+                error_type=error['error_type'],
+                error_message=error['error_message'],
+                computed_at=now
+            )
+            for error in errors if str(error['entity_id']) in applied
+        ])
+
+        by_version = defaultdict(list)
+        for entity_id in applied:
+            by_version[versions[entity_id]].append(entity_id)
+        for version, ids in by_version.items():
+            EntityComplianceStatus.objects.filter(entity_id__in=ids).update(
+                refreshed_version=version,
+                refreshed_on=timezone.localdate(now),
+                refreshed_at=now
+            )
+    return len(applied)
+
+
+def refresh_stale(company_id, entity_type: str, entity_ids: Optional[Sequence] = None,
+                  force: bool = False) -> int:
+    """
+    Recalcula las entidades desactualizadas entre las que valida `validate`.
+
+    Args:
+        company_id: Empresa
+        entity_type: Tipo de entidad
+        entity_ids: Limita a estas entidades
+        force: Recalcula todas, estén o no desactualizadas
+
+    Returns:
+        Número de entidades recalculadas
+    """
+    queryset = target_entities(company_id, entity_type, entity_ids)
+    if not force:
+        queryset = queryset.filter(stale_condition())
+    ids = list(queryset.values_list('id', flat=True))
+
+    chunk_size = settings.COMPLIANCE_REFRESH_CHUNK_SIZE
+    for start in range(0, len(ids), chunk_size):
+        refresh(company_id, entity_type, ids[start:start + chunk_size])
+    return len(ids)
+
+
+def refresh_stale_many(company_ids: Sequence, entity_types: Sequence[str],
+                       entity_ids: Optional[Sequence] = None, force: bool = False) -> int:
+    """
+    Como `refresh_stale`, para varias empresas y tipos de entidad.
+
+    El trabajo se parte por (empresa, tipo) y en grupos de
+    COMPLIANCE_REFRESH_CHUNK_SIZE entidades, y los grupos se recalculan en
+    paralelo en hasta VALIDATION_MAX_WORKERS hilos, cada uno con su propia
+    conexión. Dentro de una transacción se recalcula en el hilo actual: las
+    otras conexiones no verían sus cambios.
+
+    Returns:
+        Número de entidades recalculadas
+    """
+    queryset = Entity.objects.filter(company_id__in=company_ids, entity_type__in=entity_types, is_active=True)
+    if entity_ids:
+        queryset = queryset.filter(id__in=entity_ids)
+    if not force:
+        queryset = queryset.filter(stale_condition())
+
+    groups = defaultdict(list)
+    for entity_id, company_id, entity_type in queryset.order_by('company_id', 'entity_type').values_list(
+        'id', 'company_id', 'entity_type'
+    ):
+        groups[(company_id, entity_type)].append(entity_id)
+
+    chunk_size = settings.COMPLIANCE_REFRESH_CHUNK_SIZE
+    tasks = [
+        (company_id, entity_type, ids[start:start + chunk_size])
+        for (company_id, entity_type), ids in groups.items()
+        for start in range(0, len(ids), chunk_size)
+    ]
+    workers = min(settings.VALIDATION_MAX_WORKERS, len(tasks))
+    if workers <= 1 or connection.in_atomic_block:
+        for task in tasks:
+            refresh(*task)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compliance') as pool:
+            # list() propaga la primera excepción de los hilos
+            list(pool.map(lambda task: _refresh_in_thread(*task), tasks))
+    return sum(len(ids) for ids in groups.values())
+
+
+def _refresh_in_thread(company_id, entity_type: str, entity_ids: Sequence) -> int:
+    try:
+        return refresh(company_id, entity_type, entity_ids)
+    finally:
+        # Cada hilo abre su propia conexión; se cierra al terminar
+        connection.close()
+
+
+def refresh_pending(limit: int, debounce: Optional[float] = None) -> int:
+    """
+    Recalcula hasta `limit` entidades desactualizadas de cualquier empresa.
+    Lo usa el worker `refresh_entity_compliance`.
+
+    Returns:
+        Número de entidades recalculadas
+    """
+    pending = Entity.objects.filter(stale_condition(debounce)).order_by(
+        'company_id', 'entity_type'
+    ).values_list('id', 'company_id', 'entity_type')[:limit]
+
+    groups = defaultdict(list)
+    for entity_id, company_id, entity_type in pending:
+        groups[(company_id, entity_type)].append(entity_id)
+
+    chunk_size = settings.COMPLIANCE_REFRESH_CHUNK_SIZE
+    for (company_id, entity_type), ids in groups.items():
+        for start in range(0, len(ids), chunk_size):
+            refresh(company_id, entity_type, ids[start:start + chunk_size])
+    return sum(len(ids) for ids in groups.values())
+
+
+def discard_outdated_rows(entity: Entity) -> int:
+    """
+    Borra los errores guardados de una entidad que ya no se deben leer:
+    todos si está inactiva, o los de otra empresa o tipo si se movió.
+    """
+    queryset = EntityCompliance.objects.filter(entity_id=entity.pk)
+    if entity.is_active:
+        queryset = queryset.exclude(company_id=entity.company_id, entity_type=entity.entity_type)
+    return queryset.delete()[0]
+
+
+def errors_for(company_ids: Sequence, entity_types: Sequence[str],
+               entity_ids: Optional[Iterable] = None) -> QuerySet:
+    """
+    Errores guardados de varias empresas y tipos de entidad, en el orden de
+    fn_validate_documents_bulk.
+    """
+    queryset = EntityCompliance.objects.filter(company_id__in=company_ids, entity_type__in=entity_types)
+    if entity_ids:
+        queryset = queryset.filter(entity_id__in=entity_ids)
+    return queryset.order_by(*ERROR_ORDERING)
+
+
+def summarize(errors: QuerySet) -> Dict:
+    """
+    Conteos de `errors` por tipo de error, tipo de documento y entidad,
+    agregados en la base de datos.
+    """
+    errors = errors.order_by()
+    by_error_type = {
+        row['error_type']: row['total']
+        for row in errors.values('error_type').annotate(total=Count('id')).order_by('error_type')
+    }
+    by_document_type = {
+        row['document_type_code']: row['total']
+        for row in errors.values('document_type_code').annotate(total=Count('id')).order_by('document_type_code')
+    }
+    by_entity = list(
+        errors.values('entity_id', 'entity_code').annotate(total=Count('id')).order_by('entity_code')
+    )
+    return {
+        'validated_entities': len(by_entity),
+        'total_errors': sum(by_error_type.values()),
+        'by_error_type': by_error_type,
+        'by_document_type': by_document_type,
+        'by_entity': by_entity,
+    }
+
+
+def _as_of_query(company_ids: Sequence, entity_types: Sequence[str], entity_ids: Optional[Sequence],
+                 as_of, expiring_within_days: Optional[int]):
+    """
+    Consulta compilada (función + reglas) a la fecha `as_of` para cada
+    (empresa, tipo), unidas con UNION ALL. Devuelve (sql, params).
+    """
+    statement = rules.compiled_statement()
+    parts, params = [], []
+    for company_id in company_ids:
+        for entity_type in entity_types:
+            parts.append(f'SELECT * FROM ({statement}) AS errors_{len(parts)}')
+            params.extend(rules.statement_params(
+                company_id, entity_type, entity_ids or None, as_of, expiring_within_days
+            ))
+    return ' UNION ALL '.join(parts), params
+
+
+def iter_errors_as_of(company_ids: Sequence, entity_types: Sequence[str], entity_ids: Optional[Sequence],
+                      as_of, expiring_within_days: Optional[int] = None,
+                      chunk_size: int = 2000) -> Iterator[Dict]:
+    """
+    Errores a otra fecha o con vencimientos próximos, calculados en el momento
+    (no se guardan en entity_compliance). Se leen con un cursor del servidor,
+    en el orden de fn_validate_documents_bulk.
+    """
+    sql, params = _as_of_query(company_ids, entity_types, entity_ids, as_of, expiring_within_days)
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(f'{sql} ORDER BY entity_code, error_type, document_type_code', params)
+        # En un cursor del servidor description es None hasta el primer fetch;
+        # las columnas son siempre las de fn_validate_documents_bulk
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(ERROR_FIELDS, row))
+
+
+def summarize_as_of(company_ids: Sequence, entity_types: Sequence[str], entity_ids: Optional[Sequence],
+                    as_of, expiring_within_days: Optional[int] = None) -> Dict:
+    """
+    Como `summarize`, para errores calculados en el momento. Los tres conteos
+    salen de una sola consulta con GROUPING SETS (PostgreSQL).
+    """
+    sql, params = _as_of_query(company_ids, entity_types, entity_ids, as_of, expiring_within_days)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT error_type, document_type_code, entity_id, entity_code, COUNT(*),
+                   GROUPING(error_type), GROUPING(document_type_code)
+            FROM ({sql}) AS errors
+            GROUP BY GROUPING SETS ((error_type), (document_type_code), (entity_id, entity_code))
+            ORDER BY error_type, document_type_code, entity_code
+        """, params)
+        rows = cursor.fetchall()
+
+    by_error_type, by_document_type, by_entity = {}, {}, []
+    for error_type, document_type_code, entity_id, entity_code, total, no_error_type, no_document_type in rows:
+        if not no_error_type:
+            by_error_type[error_type] = total
+        elif not no_document_type:
+            by_document_type[document_type_code] = total
+        else:
+            by_entity.append({'entity_id': entity_id, 'entity_code': entity_code, 'total': total})
+    return {
+        'validated_entities': len(by_entity),
+        'total_errors': sum(by_error_type.values()),
+        'by_error_type': by_error_type,
+        'by_document_type': by_document_type,
+        'by_entity': by_entity,
+    }
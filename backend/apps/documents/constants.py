@@ -41,6 +41,8 @@ class EntityType:
     SUPPLIER = 'supplier'
     ASSET = 'asset'
 
+    ALL = [VEHICLE, EMPLOYEE, SUPPLIER, ASSET]
+
     CHOICES = [
         (VEHICLE, 'Vehículo'),
         (EMPLOYEE, 'Empleado'),
@@ -49,7 +51,110 @@ class EntityType:
     ]
 
 
+class N8NDispatchStatus:
+    """N8N dispatch queue status constants."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    CHOICES = [
+        (PENDING, 'Pendiente'),
+        (PROCESSING, 'En proceso'),
+        (SENT, 'Enviado'),
+        (DEAD, 'Fallido'),
+    ]
+
+
+class CircuitState:
+    """N8N webhook circuit breaker states."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
 class N8NStatus:
     """N8N callback status constants."""
     APPROVED = 'approved'
     REJECTED = 'rejected'
+
+
+class N8NCallbackOutcome:
+    """Per-item outcome of a bulk N8N callback."""
+    APPLIED = 'applied'
+    ALREADY_PROCESSED = 'already_processed'
+    NOT_FOUND = 'not_found'
+
+
+class ValidateMode:
+    """Response modes of the bulk validation endpoint."""
+    ERRORS = 'errors'
+    SUMMARY = 'summary'
+    JOB = 'job'
+
+
+class ValidationJobStatus:
+    """Asynchronous bulk validation job status constants."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    ACTIVE = [PENDING, RUNNING]
+
+    CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En ejecución'),
+        (COMPLETED, 'Completado'),
+        (FAILED, 'Fallido'),
+    ]
+
+
+class ValidationRuleKind:
+    """Predicate types of the configurable validation rules."""
+    DATE_OFFSET = 'date_offset'
+    STATUS_IN = 'status_in'
+    METADATA_REQUIRED = 'metadata_required'
+
+    CHOICES = [
+        (DATE_OFFSET, 'Fecha respecto al día de validación'),
+        (STATUS_IN, 'Estado del documento'),
+        (METADATA_REQUIRED, 'Metadatos obligatorios de la entidad'),
+    ]
+
+
+class ValidationRuleDateField:
+    """Document date fields a date_offset rule can compare."""
+    ISSUE_DATE = 'issue_date'
+    EXPIRATION_DATE = 'expiration_date'
+
+    CHOICES = [
+        (ISSUE_DATE, 'Fecha de emisión'),
+        (EXPIRATION_DATE, 'Fecha de vencimiento'),
+    ]
+
+
+class ValidationRuleOperator:
+    """Comparison of a date_offset rule against the validation date plus the offset."""
+    BEFORE = 'before'
+    AFTER = 'after'
+
+    CHOICES = [
+        (BEFORE, 'Antes de'),
+        (AFTER, 'Después de'),
+    ]
+
+
+class FileUpload:
+    """File upload constants."""
+    ALLOWED_MIME_TYPES = [
+        'application/pdf',
+        'image/jpeg',
+        'image/png',
+        'image/jpg',
+        'application/msword',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'application/vnd.ms-excel',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    ]
+    UPLOAD_TOKEN_SALT = 'documents.upload'
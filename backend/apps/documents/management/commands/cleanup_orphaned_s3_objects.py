@@ -0,0 +1,32 @@
+"""
+Reintenta eliminar de S3 los archivos que quedaron sin documento.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.documents.models import OrphanedS3Object
+from apps.documents.services import S3Service
+
+
+class Command(BaseCommand):
+    help = 'Elimina de S3 los archivos huérfanos registrados en orphaned_s3_objects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Máximo de archivos por ejecución')
+
+    def handle(self, *args, **options):
+        s3_service = S3Service()
+        deleted = failed = 0
+
+        for orphan in OrphanedS3Object.objects.all()[:options['limit']]:
+            try:
+                s3_service.s3_client.delete_object(Bucket=orphan.s3_bucket, Key=orphan.s3_key)
+            except Exception as e:
+                orphan.attempts += 1
+                orphan.last_error = str(e)
+                orphan.save(update_fields=['attempts', 'last_error'])
+                failed += 1
+            else:
+                orphan.delete()
+                deleted += 1
+
+        self.stdout.write(f'Eliminados: {deleted}, fallidos: {failed}')
@@ -0,0 +1,65 @@
+"""
+Crea las particiones mensuales futuras de document_validation_logs y separa
+(o elimina) las que superan la retención configurada.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.documents import partitions
+
+
+class Command(BaseCommand):
+    help = 'Mantiene las particiones mensuales de document_validation_logs (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.VALIDATION_LOG_PARTITIONS_AHEAD,
+                            help='Meses futuros con partición creada')
+        parser.add_argument('--retention-months', type=int,
+                            default=settings.VALIDATION_LOG_RETENTION_MONTHS,
+                            help='Meses de logs que se conservan (0 = sin límite)')
+        parser.add_argument('--drop', action='store_true',
+                            help='Elimina las particiones vencidas en vez de solo separarlas')
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra lo que haría')
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported() or not partitions.is_partitioned():
+            self.stdout.write('document_validation_logs no está particionada (requiere PostgreSQL)')
+            return
+
+        current = date.today().replace(day=1)
+        existing = set(partitions.list_partitions())
+        # Los meses anteriores a history_end están en la partición histórica
+        covered_until = partitions.history_end()
+
+        for offset in range(options['ahead'] + 1):
+            month = partitions.add_months(current, offset)
+            if month in existing or (covered_until and month < covered_until):
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'Crearía {partitions.partition_name(month)}')
+            else:
+                self.stdout.write(f'Creada {partitions.create_partition(month)}')
+
+        if options['retention_months'] <= 0:
+            return
+
+        cutoff = partitions.add_months(current, -options['retention_months'])
+        if covered_until and covered_until <= cutoff:
+            name = partitions.HISTORY_PARTITION
+            if options['dry_run']:
+                self.stdout.write(f"{'Eliminaría' if options['drop'] else 'Separaría'} {name}")
+            else:
+                partitions.detach_history(drop=options['drop'])
+                self.stdout.write(f"{'Eliminada' if options['drop'] else 'Separada'} {name}")
+
+        for month in sorted(existing):
+            if month >= cutoff:
+                break
+            name = partitions.partition_name(month)
+            if options['dry_run']:
+                self.stdout.write(f"{'Eliminaría' if options['drop'] else 'Separaría'} {name}")
+                continue
+            partitions.detach_partition(month, drop=options['drop'])
+            self.stdout.write(f"{'Eliminada' if options['drop'] else 'Separada'} {name}")
@@ -0,0 +1,32 @@
+"""
+Worker que entrega a N8N los envíos encolados en n8n_dispatches.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documents.services import N8NDispatchService
+
+
+class Command(BaseCommand):
+    help = 'Entrega a N8N los envíos pendientes, con reintentos y backoff exponencial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Envíos tomados por lote')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay envíos pendientes')
+        parser.add_argument('--once', action='store_true', help='Procesa un solo lote y termina')
+
+    def handle(self, *args, **options):
+        service = N8NDispatchService()
+
+        if options['once']:
+            processed = service.process_due(options['batch_size'])
+            self.stdout.write(f'Procesados: {processed}')
+            return
+
+        self.stdout.write('Procesando envíos a N8N...')
+        while True:
+            processed = service.process_due(options['batch_size'])
+            if not processed:
+                time.sleep(options['poll_interval'])
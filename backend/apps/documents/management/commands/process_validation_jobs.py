@@ -0,0 +1,30 @@
+"""
+Worker que ejecuta las validaciones masivas en segundo plano (validation_jobs).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documents.services import ValidationJobService
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los jobs de validación masiva pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay jobs pendientes')
+        parser.add_argument('--once', action='store_true', help='Ejecuta un solo job y termina')
+
+    def handle(self, *args, **options):
+        service = ValidationJobService()
+
+        if options['once']:
+            processed = service.process_next()
+            self.stdout.write(f"Jobs ejecutados: {int(processed)}")
+            return
+
+        self.stdout.write('Ejecutando validaciones masivas...')
+        while True:
+            if not service.process_next():
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,34 @@
+"""
+Worker que recalcula los errores de cumplimiento (entity_compliance) de las
+entidades que cambiaron.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.documents import compliance
+
+
+class Command(BaseCommand):
+    help = 'Recalcula entity_compliance para las entidades con cambios o refrescadas antes de hoy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Entidades recalculadas por lote')
+        parser.add_argument('--debounce', type=float, default=settings.COMPLIANCE_REFRESH_DEBOUNCE,
+                            help='Segundos sin cambios antes de recalcular una entidad')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Segundos de espera cuando no hay entidades pendientes')
+        parser.add_argument('--once', action='store_true', help='Procesa un solo lote y termina')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            refreshed = compliance.refresh_pending(options['batch_size'], options['debounce'])
+            self.stdout.write(f'Entidades recalculadas: {refreshed}')
+            return
+
+        self.stdout.write('Recalculando cumplimiento de entidades...')
+        while True:
+            refreshed = compliance.refresh_pending(options['batch_size'], options['debounce'])
+            if not refreshed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,83 @@
+"""
+Middleware for Document Management System.
+"""
+import uuid
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import serializers, status
+
+from .serializers import DocumentTargetSerializer
+
+
+class UploadPrecheckMiddleware:
+    """
+    Rechaza cargas inválidas usando solo los encabezados del request, antes
+    de que se lea el cuerpo.
+
+    - `Content-Length` mayor al máximo permitido: 413
+    - `X-Company-Id`, `X-Entity-Id`, `X-Document-Type-Id` (opcionales): se
+      validan empresa, entidad y tipo de documento: 400
+
+    Por archivo, el tipo MIME y el tamaño se validan con
+    `UploadPrecheckHandler` mientras se recibe el cuerpo.
+    """
+    upload_url_names = ('document-upload',)
+    target_headers = {
+        'company_id': 'HTTP_X_COMPANY_ID',
+        'entity_id': 'HTTP_X_ENTITY_ID',
+        'document_type_id': 'HTTP_X_DOCUMENT_TYPE_ID',
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if request.method != 'POST' or not match or match.url_name not in self.upload_url_names:
+            return None
+
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return self._error('Content-Length inválido', status.HTTP_400_BAD_REQUEST)
+
+        max_size_mb = settings.DOCUMENT_MAX_UPLOAD_SIZE_MB
+        max_request_size = max_size_mb * 1024 * 1024 + settings.DOCUMENT_UPLOAD_FORM_OVERHEAD_BYTES
+        if content_length > max_request_size:
+            return self._error(
+                f"El archivo excede el tamaño máximo permitido de {max_size_mb}MB.",
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        target = {
+            field: request.META.get(header)
+            for field, header in self.target_headers.items()
+        }
+        if not any(target.values()):
+            return None
+        if not all(target.values()):
+            return self._error(
+                'Se deben enviar X-Company-Id, X-Entity-Id y X-Document-Type-Id juntos',
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            for field, value in target.items():
+                target[field] = uuid.UUID(value)
+        except ValueError:
+            return self._error(f'{field} no es un UUID válido', status.HTTP_400_BAD_REQUEST)
+
+        try:
+            DocumentTargetSerializer.resolve_target(**target)
+        except serializers.ValidationError as e:
+            return self._error(' '.join(str(detail) for detail in e.detail), status.HTTP_400_BAD_REQUEST)
+
+        return None
+
+    @staticmethod
+    def _error(message, status_code):
+        return JsonResponse({'error': True, 'message': message}, status=status_code)
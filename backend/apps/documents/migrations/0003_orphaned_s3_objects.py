@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:41
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_add_plpgsql_validation_function'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrphanedS3Object',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('s3_bucket', models.CharField(max_length=255, verbose_name='Bucket S3')),
+                ('s3_key', models.CharField(max_length=512, verbose_name='Clave S3')),
+                ('reason', models.TextField(blank=True, default='', verbose_name='Razón')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+            ],
+            options={
+                'verbose_name': 'Archivo S3 huérfano',
+                'verbose_name_plural': 'Archivos S3 huérfanos',
+                'db_table': 'orphaned_s3_objects',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:42
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_orphaned_s3_objects'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='N8NDispatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('webhook_url', models.CharField(max_length=512, verbose_name='URL Webhook N8N')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'En proceso'), ('sent', 'Enviado'), ('dead', 'Fallido')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Máximo de intentos')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='Próximo intento')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tomado en')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='n8n_dispatches', to='documents.document', verbose_name='Documento')),
+            ],
+            options={
+                'verbose_name': 'Envío a N8N',
+                'verbose_name_plural': 'Envíos a N8N',
+                'db_table': 'n8n_dispatches',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='n8n_dispatc_status_e70bc2_idx'), models.Index(fields=['document'], name='n8n_dispatc_documen_2d88f1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:48
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_n8n_dispatch_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documenttype',
+            name='n8n_connect_timeout',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(0.1)], verbose_name='Timeout de conexión N8N (s)'),
+        ),
+        migrations.AddField(
+            model_name='documenttype',
+            name='n8n_read_timeout',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(0.1)], verbose_name='Timeout de respuesta N8N (s)'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_type_n8n_timeouts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documenttype',
+            name='n8n_batch_enabled',
+            field=models.BooleanField(default=False, verbose_name='Envío a N8N por lotes'),
+        ),
+        migrations.AddField(
+            model_name='n8ndispatch',
+            name='batched',
+            field=models.BooleanField(default=False, verbose_name='Por lotes'),
+        ),
+        migrations.AddIndex(
+            model_name='n8ndispatch',
+            index=models.Index(fields=['batched', 'status', 'webhook_url'], name='n8n_dispatc_batched_bd815d_idx'),
+        ),
+    ]
@@ -0,0 +1,135 @@
+"""
+Turn document_validation_logs into a table range-partitioned by month on
+created_at (PostgreSQL only; other backends keep the plain table).
+
+The existing rows are not copied: the old table is attached as the partition
+`document_validation_logs_history`, which covers every date before the first
+monthly partition (the month after next, so rows written while the migration
+runs still fit in it).
+
+1. Without blocking writes, a unique index on (id, created_at) is built with
+   CREATE INDEX CONCURRENTLY and a NOT VALID CHECK on created_at is validated.
+   Each step reads the whole table once and takes SHARE UPDATE EXCLUSIVE.
+2. One short transaction swaps the primary key to that index, renames the
+   table and its indexes, creates the partitioned parent and the monthly
+   partitions, and attaches the old table. PostgreSQL skips the range scan
+   (the CHECK proves it) and reuses the existing indexes and foreign key, so
+   the ACCESS EXCLUSIVE lock lasts only for catalog changes.
+
+The migration is not atomic because CREATE INDEX CONCURRENTLY cannot run in a
+transaction. If it stops during step 1, running it again starts step 1 over.
+
+The primary key becomes (id, created_at) because PostgreSQL requires the
+partition key in every unique constraint. Django still looks rows up by id.
+
+Reversing copies every row back into a plain table in one transaction, which
+blocks writes to the logs for as long as the copy takes.
+"""
+from datetime import date
+
+from django.db import migrations, transaction
+
+TABLE = 'document_validation_logs'
+HISTORY = f'{TABLE}_history'
+INDEXES = [
+    ('document_va_documen_f07ec0_idx', 'document_id'),
+    ('document_va_action_6501db_idx', 'action'),
+    ('document_va_created_7a335b_idx', 'created_at'),
+]
+MONTHS_AHEAD = 3
+HISTORY_MONTHS_AHEAD = 2
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _add_parent_constraints(schema_editor):
+    schema_editor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_document_id_fk '
+        f'FOREIGN KEY (document_id) REFERENCES documents (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    for name, column in INDEXES:
+        schema_editor.execute(f'CREATE INDEX {name} ON {TABLE} ({column})')
+
+
+def partition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    today = date.today().replace(day=1)
+    first = _add_months(today, HISTORY_MONTHS_AHEAD)
+    last = _add_months(today, MONTHS_AHEAD)
+
+    # 1. Long reads, without blocking writes (autocommit)
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {HISTORY}_pkey')
+    schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {HISTORY}_pkey ON {TABLE} (id, created_at)')
+    schema_editor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {HISTORY}_range')
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {HISTORY}_range "
+        f"CHECK (created_at < '{first.isoformat()}') NOT VALID"
+    )
+    schema_editor.execute(f'ALTER TABLE {TABLE} VALIDATE CONSTRAINT {HISTORY}_range')
+
+    # 2. Catalog changes only
+    with transaction.atomic(using=schema_editor.connection.alias):
+        schema_editor.execute(
+            f'ALTER TABLE {TABLE} DROP CONSTRAINT {TABLE}_pkey, '
+            f'ADD CONSTRAINT {HISTORY}_pkey PRIMARY KEY USING INDEX {HISTORY}_pkey'
+        )
+        schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {HISTORY}')
+        # Frees the names for the parent's indexes
+        for name, _ in INDEXES:
+            schema_editor.execute(f'ALTER INDEX {name} RENAME TO {name}_h')
+
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {HISTORY} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        schema_editor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)')
+        _add_parent_constraints(schema_editor)
+
+        month = first
+        while month <= last:
+            end = _add_months(month, 1)
+            schema_editor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            month = end
+        schema_editor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        # Matching indexes, primary key and foreign key of the old table are attached, not rebuilt
+        schema_editor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {HISTORY} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{first.isoformat()}')"
+        )
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with transaction.atomic(using=schema_editor.connection.alias):
+        schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned')
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned INCLUDING DEFAULTS)'
+        )
+        # Full copy: writes to the logs wait until it commits
+        schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned')
+        schema_editor.execute(f'DROP TABLE {TABLE}_partitioned CASCADE')
+        schema_editor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id)')
+        _add_parent_constraints(schema_editor)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('documents', '0006_n8n_batch_dispatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, reverse_code=unpartition_table),
+    ]
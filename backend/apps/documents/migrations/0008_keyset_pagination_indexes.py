@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('documents', '0007_partition_validation_logs'),
+        ('entities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='documentvalidationlog',
+            name='document_va_created_7a335b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_at', 'id'], name='documents_uploade_cf5c8e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentvalidationlog',
+            index=models.Index(fields=['created_at', 'id'], name='document_va_created_ef43fa_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+"""
+Search indexes for documents and validation logs (PostgreSQL only).
+
+- `search_vector`: generated tsvector columns over `documents.file_name` and
+  `document_validation_logs.reason`, with GIN indexes. Django models do not
+  declare them; `IndexedSearchFilter` reads them through the view's
+  `search_vectors`.
+- A trigram GIN index on `UPPER(performed_by::text)` for `icontains`.
+
+Adding a stored generated column rewrites each table once.
+"""
+from django.db import migrations
+
+SEARCH_VECTORS = [
+    ('documents', 'documents_search_vector_idx',
+     "to_tsvector('simple', regexp_replace(file_name, '[^[:alnum:]]+', ' ', 'g'))"),
+    ('document_validation_logs', 'document_va_search_vector_idx',
+     "to_tsvector('simple', coalesce(reason, ''))"),
+]
+TRIGRAM_INDEXES = [
+    ('document_validation_logs', 'document_va_performed_by_trgm_idx', 'performed_by'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, index, expression in SEARCH_VECTORS:
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED'
+        )
+        schema_editor.execute(f'CREATE INDEX {index} ON {table} USING gin (search_vector)')
+    for table, index, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {index} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, index, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+    for table, _, _ in SEARCH_VECTORS:
+        # Drops its GIN index too
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, reverse_code=drop_search_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_trigram_search_indexes'),
+        ('documents', '0009_search_indexes'),
+        ('entities', '0002_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityComplianceStatus',
+            fields=[
+                ('entity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compliance_status', serialize=False, to='entities.entity', verbose_name='Entidad')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Versión')),
+                ('changed_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del último cambio')),
+                ('refreshed_version', models.PositiveBigIntegerField(default=0, verbose_name='Versión refrescada')),
+                ('refreshed_on', models.DateField(blank=True, null=True, verbose_name='Día del refresco')),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del refresco')),
+            ],
+            options={
+                'verbose_name': 'Estado de cumplimiento',
+                'verbose_name_plural': 'Estados de cumplimiento',
+                'db_table': 'entity_compliance_status',
+            },
+        ),
+        migrations.CreateModel(
+            name='EntityCompliance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('vehicle', 'Vehículo'), ('employee', 'Empleado'), ('supplier', 'Proveedor'), ('asset', 'Activo')], max_length=50, verbose_name='Tipo de entidad')),
+                ('entity_code', models.CharField(max_length=100, verbose_name='Código de entidad')),
+                ('document_type_code', models.CharField(max_length=50, verbose_name='Código del tipo de documento')),
+                ('error_type', models.CharField(max_length=50, verbose_name='Tipo de error')),
+                ('error_message', models.TextField(verbose_name='Mensaje')),
+                ('computed_at', models.DateTimeField(verbose_name='Fecha de cálculo')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_errors', to='companies.company', verbose_name='Empresa')),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_errors', to='entities.entity', verbose_name='Entidad')),
+            ],
+            options={
+                'verbose_name': 'Error de cumplimiento',
+                'verbose_name_plural': 'Errores de cumplimiento',
+                'db_table': 'entity_compliance',
+                'ordering': ['entity_code', 'error_type', 'document_type_code'],
+                'indexes': [models.Index(fields=['company', 'entity_type', 'entity_code', 'error_type', 'document_type_code'], name='entity_comp_company_adf6f9_idx'), models.Index(fields=['entity'], name='entity_comp_entity__84b25a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_trigram_search_indexes'),
+        ('documents', '0010_entity_compliance'),
+        ('entities', '0002_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='entitycompliance',
+            name='entity_comp_company_adf6f9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='entitycompliance',
+            index=models.Index(fields=['company', 'entity_type', 'entity_code', 'error_type', 'document_type_code', 'id'], name='entity_comp_company_379df6_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:26
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_trigram_search_indexes'),
+        ('documents', '0011_entity_compliance_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(choices=[('vehicle', 'Vehículo'), ('employee', 'Empleado'), ('supplier', 'Proveedor'), ('asset', 'Activo')], max_length=50, verbose_name='Tipo de entidad')),
+                ('entity_ids', models.JSONField(blank=True, null=True, verbose_name='Entidades')),
+                ('force_refresh', models.BooleanField(default=False, verbose_name='Forzar recálculo')),
+                ('data_version', models.BigIntegerField(verbose_name='Versión de los datos')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Huella')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('completed', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado')),
+                ('total_entities', models.PositiveIntegerField(blank=True, null=True, verbose_name='Entidades')),
+                ('processed_entities', models.PositiveIntegerField(default=0, verbose_name='Entidades procesadas')),
+                ('total_errors', models.PositiveIntegerField(default=0, verbose_name='Errores')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tomado en')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de finalización')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validation_jobs', to='companies.company', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Validación masiva',
+                'verbose_name_plural': 'Validaciones masivas',
+                'db_table': 'validation_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ValidationJobResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_id', models.UUIDField(verbose_name='Entidad')),
+                ('entity_code', models.CharField(max_length=100, verbose_name='Código de entidad')),
+                ('document_type_code', models.CharField(max_length=50, verbose_name='Código del tipo de documento')),
+                ('error_type', models.CharField(max_length=50, verbose_name='Tipo de error')),
+                ('error_message', models.TextField(verbose_name='Mensaje')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='documents.validationjob', verbose_name='Job')),
+            ],
+            options={
+                'verbose_name': 'Resultado de validación masiva',
+                'verbose_name_plural': 'Resultados de validación masiva',
+                'db_table': 'validation_job_results',
+                'ordering': ['entity_code', 'error_type', 'document_type_code', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='validationjob',
+            index=models.Index(fields=['status', 'created_at'], name='validation__status_96c823_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='validationjob',
+            index=models.Index(fields=['created_at', 'id'], name='validation__created_7555f9_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='validationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('fingerprint',), name='unique_active_validation_job'),
+        ),
+        migrations.AddIndex(
+            model_name='validationjobresult',
+            index=models.Index(fields=['job', 'entity_code', 'error_type', 'document_type_code', 'id'], name='validation__job_id_6689d6_idx'),
+        ),
+    ]
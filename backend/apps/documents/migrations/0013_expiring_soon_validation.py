@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:30
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _execute_sql_file(schema_editor, file_name):
+    sql_file_path = os.path.join(settings.BASE_DIR.parent, 'sql', file_name)
+    with open(sql_file_path, 'r', encoding='utf-8') as f:
+        schema_editor.execute(f.read())
+
+
+def replace_validation_function(apps, schema_editor):
+    """Replace fn_validate_documents_bulk with the version that takes as_of and the expiring window."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # The 3-argument version would make calls with 3 arguments ambiguous
+    schema_editor.execute('DROP FUNCTION IF EXISTS fn_validate_documents_bulk(UUID, VARCHAR, UUID[]);')
+    # Frozen copy for this migration; fn_validate_documents_bulk.sql stays as migration 0002 created it
+    _execute_sql_file(schema_editor, 'fn_validate_documents_bulk_v2.sql')
+
+
+def restore_validation_function(apps, schema_editor):
+    """Restore the 3-argument fn_validate_documents_bulk of migration 0002."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP FUNCTION IF EXISTS fn_validate_documents_bulk(UUID, VARCHAR, UUID[], DATE, INTEGER);')
+    _execute_sql_file(schema_editor, 'fn_validate_documents_bulk.sql')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_trigram_search_indexes'),
+        ('documents', '0012_validation_jobs'),
+        ('entities', '0002_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('validation_status', 'A')), fields=['company', 'expiration_date'], include=('entity', 'document_type'), name='documents_approved_expiry_idx'),
+        ),
+        # The new arguments have defaults, so the new function also serves 3-argument calls
+        migrations.RunPython(replace_validation_function, reverse_code=restore_validation_function),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0013_expiring_soon_validation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationRule',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('entity_type', models.CharField(choices=[('vehicle', 'Vehículo'), ('employee', 'Empleado'), ('supplier', 'Proveedor'), ('asset', 'Activo')], max_length=50, verbose_name='Tipo de entidad')),
+                ('kind', models.CharField(choices=[('date_offset', 'Fecha respecto al día de validación'), ('status_in', 'Estado del documento'), ('metadata_required', 'Metadatos obligatorios de la entidad')], max_length=20, verbose_name='Tipo de regla')),
+                ('date_field', models.CharField(blank=True, choices=[('issue_date', 'Fecha de emisión'), ('expiration_date', 'Fecha de vencimiento')], default='', max_length=20, verbose_name='Campo de fecha')),
+                ('operator', models.CharField(blank=True, choices=[('before', 'Antes de'), ('after', 'Después de')], default='', max_length=10, verbose_name='Comparación')),
+                ('offset_days', models.IntegerField(default=0, verbose_name='Días de desfase')),
+                ('statuses', models.JSONField(blank=True, default=list, verbose_name='Estados')),
+                ('metadata_keys', models.JSONField(blank=True, default=list, verbose_name='Llaves de metadatos')),
+                ('error_type', models.SlugField(verbose_name='Tipo de error')),
+                ('message', models.TextField(verbose_name='Mensaje')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activa')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('document_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='validation_rules', to='documents.documenttype', verbose_name='Tipo de documento')),
+            ],
+            options={
+                'verbose_name': 'Regla de validación',
+                'verbose_name_plural': 'Reglas de validación',
+                'db_table': 'validation_rules',
+                'ordering': ['entity_type', 'name'],
+                'indexes': [models.Index(fields=['entity_type', 'is_active'], name='validation__entity__9a6f59_idx')],
+            },
+        ),
+    ]
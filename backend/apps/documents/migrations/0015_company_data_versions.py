@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_trigram_search_indexes'),
+        ('documents', '0014_validation_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyDataVersion',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to='companies.company', verbose_name='Empresa')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Versión')),
+                ('changed_at', models.DateTimeField(auto_now=True, verbose_name='Fecha del último cambio')),
+            ],
+            options={
+                'verbose_name': 'Versión de datos de empresa',
+                'verbose_name_plural': 'Versiones de datos de empresa',
+                'db_table': 'company_data_versions',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0015_company_data_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='claim_token',
+            field=models.UUIDField(blank=True, null=True, verbose_name='Token de la toma'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+REPORTED_KEYS = 50
+
+
+def check_duplicate_s3_keys(apps, schema_editor):
+    """
+    Stop before the unique constraint if documents already share an S3 key.
+
+    Keys used to have second granularity, so two uploads for the same entity
+    and type within one second got the same key and the second object replaced
+    the first in S3. Which row keeps the object cannot be decided here, so the
+    migration names the rows and lets an operator fix or delete them.
+    """
+    Document = apps.get_model('documents', 'Document')
+    duplicated = list(
+        Document.objects.values('s3_key').annotate(total=Count('id')).filter(total__gt=1)
+        .order_by('s3_key').values_list('s3_key', flat=True)
+    )
+    if not duplicated:
+        return
+
+    rows = Document.objects.filter(s3_key__in=duplicated[:REPORTED_KEYS]).order_by(
+        's3_key', 'uploaded_at'
+    ).values_list('s3_key', 'id', 'uploaded_at')
+    details = '\n'.join(f'  {s3_key}: document {document_id} uploaded {uploaded_at}' for s3_key, document_id, uploaded_at in rows)
+    more = f'\n  ... and {len(duplicated) - REPORTED_KEYS} more keys' if len(duplicated) > REPORTED_KEYS else ''
+    raise RuntimeError(
+        f'Found {len(duplicated)} S3 key(s) shared by more than one document, so documents.s3_key cannot be '
+        f'made unique. Each key holds the object of its last upload; fix or delete the other rows '
+        f'and run the migration again:\n{details}{more}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0016_validation_job_claim_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_s3_keys, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='document',
+            name='s3_key',
+            field=models.CharField(max_length=512, unique=True, verbose_name='Clave S3'),
+        ),
+    ]
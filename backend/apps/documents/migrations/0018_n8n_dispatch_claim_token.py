@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0017_unique_document_s3_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='n8ndispatch',
+            name='claim_token',
+            field=models.UUIDField(blank=True, null=True, verbose_name='Token de la toma'),
+        ),
+    ]
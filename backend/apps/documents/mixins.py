@@ -0,0 +1,160 @@
+"""
+Reusable ViewSet mixins.
+"""
+from typing import Dict, Iterable, Optional, Set
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+from .pagination import KeysetPagination
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for list and retrieve: `?fields=id,validation_status`
+    keeps only those fields and `?omit=s3_key` drops fields.
+
+    Besides trimming the serializer, the queryset selects only the columns
+    behind the remaining fields (`.only()`) and drops the `select_related`
+    and `prefetch_related` branches no remaining field reads.
+    """
+    sparse_fields_param = 'fields'
+    sparse_omit_param = 'omit'
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self) -> Optional[Dict[str, object]]:
+        """
+        Campos pedidos por el cliente (nombre -> campo del serializer), o None
+        si no se pidió un subconjunto.
+
+        Raises:
+            ValidationError: Si se piden campos que el serializer no tiene
+        """
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        params = self.request.query_params
+        if self.action not in self.sparse_actions or not (
+            self.sparse_fields_param in params or self.sparse_omit_param in params
+        ):
+            return None
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        available = serializer.fields
+        selected = list(available)
+        for param in (self.sparse_fields_param, self.sparse_omit_param):
+            if param not in params:
+                continue
+            names = [name.strip() for name in params[param].split(',') if name.strip()]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError({
+                    param: f"Campos no disponibles: {', '.join(unknown)}. "
+                           f"Disponibles: {', '.join(available)}"
+                })
+            if param == self.sparse_fields_param:
+                selected = [name for name in selected if name in names]
+            else:
+                selected = [name for name in selected if name not in names]
+
+        self._sparse_fields = {name: available[name] for name in selected}
+        return self._sparse_fields
+
+    def get_sparse_extra_columns(self) -> Iterable[str]:
+        """Campos del modelo que la vista necesita aunque el cliente no los pida."""
+        return ()
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = serializer.child if isinstance(serializer, ListSerializer) else serializer
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        # Se aplica aquí y no en get_queryset para no depender de que la
+        # vista llame a super() al armar su queryset
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        roots = {self._source_root(field) for field in fields.values()}
+        queryset = self._prune_select_related(queryset, roots)
+        queryset = self._prune_prefetch_related(queryset, roots)
+        columns = self._columns_for(queryset.model, roots | set(self.get_sparse_extra_columns()))
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    @staticmethod
+    def _source_root(field) -> str:
+        source_attrs = getattr(field, 'source_attrs', None) or [field.source]
+        return source_attrs[0]
+
+    def _columns_for(self, model, roots: Set[str]) -> Optional[Set[str]]:
+        """
+        Campos del modelo detrás de `roots`, o None si alguno no se puede
+        mapear a una columna (p. ej. un método o una propiedad).
+        """
+        columns = {model._meta.pk.name}
+        keyset = getattr(self, 'keyset_ordering', KeysetPagination.default_ordering)
+        roots = set(roots) | {name.lstrip('-') for name in keyset}
+        for root in roots:
+            if root == '*':
+                return None
+            name = root
+            # get_FOO_display lee la columna FOO
+            if root.startswith('get_') and root.endswith('_display'):
+                name = root[len('get_'):-len('_display')]
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                if self._is_prefetch_target(root):
+                    continue
+                return None
+            if field.concrete:
+                columns.add(field.name)
+        return columns
+
+    def _is_prefetch_target(self, root: str) -> bool:
+        """Atributos que llena un Prefetch(to_attr=...)."""
+        return any(
+            isinstance(lookup, Prefetch) and lookup.to_attr == root
+            for lookup in getattr(self, '_kept_prefetches', ())
+        )
+
+    @staticmethod
+    def _prune_select_related(queryset, roots: Iterable[str]):
+        related = queryset.query.select_related
+        if not isinstance(related, dict):
+            return queryset
+
+        def paths(tree, prefix=''):
+            for name, children in tree.items():
+                path = f'{prefix}{name}'
+                if children:
+                    yield from paths(children, f'{path}__')
+                else:
+                    yield path
+
+        kept = [path for path in paths(related) if path.split('__')[0] in roots]
+        queryset = queryset.select_related(None)
+        return queryset.select_related(*kept) if kept else queryset
+
+    def _prune_prefetch_related(self, queryset, roots: Iterable[str]):
+        lookups = queryset._prefetch_related_lookups
+        kept = [
+            lookup for lookup in lookups
+            if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split('__')[0] in roots
+        ]
+        self._kept_prefetches = kept
+        if len(kept) == len(lookups):
+            return queryset
+        return queryset.prefetch_related(None).prefetch_related(*kept)
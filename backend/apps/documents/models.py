@@ -3,10 +3,13 @@ Document models for FailFast Document Management System.
 """
 import uuid
 from django.db import models
-from django.core.validators import URLValidator
+from django.core.validators import MinValueValidator, URLValidator
 from apps.companies.models import Company
 from apps.entities.models import Entity
-from .constants import ValidationStatus, DocumentAction, EntityType
+from .constants import (
+    ValidationStatus, DocumentAction, EntityType, N8NDispatchStatus, ValidationJobStatus,
+    ValidationRuleKind, ValidationRuleDateField, ValidationRuleOperator
+)
 
 
 class DocumentType(models.Model):
@@ -22,6 +25,9 @@ class DocumentType(models.Model):
         requires_expiration_date: Indica si requiere fecha de vencimiento
         uses_n8n_workflow: Indica si usa flujo de trabajo N8N
         n8n_webhook_url: URL del webhook de N8N
+        n8n_connect_timeout: Timeout de conexión al webhook en segundos (por defecto N8N_CONNECT_TIMEOUT)
+        n8n_read_timeout: Timeout de respuesta del webhook en segundos (por defecto N8N_READ_TIMEOUT)
+        n8n_batch_enabled: Envía los documentos al webhook en lotes (el workflow debe aceptar un arreglo)
         entity_type: Tipo de entidad al que aplica
         created_at: Fecha de creación
     """
@@ -41,6 +47,19 @@ class DocumentType(models.Model):
         validators=[URLValidator()],
         verbose_name='URL Webhook N8N'
     )
+    n8n_connect_timeout = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0.1)],
+        verbose_name='Timeout de conexión N8N (s)'
+    )
+    n8n_read_timeout = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0.1)],
+        verbose_name='Timeout de respuesta N8N (s)'
+    )
+    n8n_batch_enabled = models.BooleanField(default=False, verbose_name='Envío a N8N por lotes')
     entity_type = models.CharField(
         max_length=50,
         choices=ENTITY_TYPE_CHOICES,
@@ -111,7 +130,7 @@ class Document(models.Model):
     file_size = models.BigIntegerField(verbose_name='Tamaño (bytes)')
     mime_type = models.CharField(max_length=100, verbose_name='Tipo MIME')
     s3_bucket = models.CharField(max_length=255, verbose_name='Bucket S3')
-    s3_key = models.CharField(max_length=512, verbose_name='Clave S3')
+    s3_key = models.CharField(max_length=512, unique=True, verbose_name='Clave S3')
     s3_region = models.CharField(max_length=50, verbose_name='Región S3')
     issue_date = models.DateField(null=True, blank=True, verbose_name='Fecha de emisión')
     expiration_date = models.DateField(null=True, blank=True, verbose_name='Fecha de vencimiento')
@@ -137,6 +156,15 @@ class Document(models.Model):
             models.Index(fields=['document_type']),
             models.Index(fields=['validation_status']),
             models.Index(fields=['expiration_date']),
+            models.Index(fields=['uploaded_at', 'id']),
+            # Vencimientos próximos (fn_validate_documents_bulk con
+            # p_expiring_within_days): rango por empresa sin leer la tabla
+            models.Index(
+                fields=['company', 'expiration_date'],
+                include=['entity', 'document_type'],
+                condition=models.Q(validation_status=ValidationStatus.APPROVED),
+                name='documents_approved_expiry_idx'
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -193,8 +221,422 @@ class DocumentValidationLog(models.Model):
         indexes = [
             models.Index(fields=['document']),
             models.Index(fields=['action']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.get_action_display()} - {self.document.file_name} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
+
+
+class OrphanedS3Object(models.Model):
+    """
+    Archivo en S3 que quedó sin documento (por ejemplo, si falló la
+    transacción después de subirlo) y no se pudo eliminar en el momento.
+
+    Attributes:
+        id: Identificador único UUID
+        s3_bucket: Nombre del bucket de S3
+        s3_key: Clave del archivo en S3
+        reason: Causa por la que quedó huérfano
+        attempts: Intentos de eliminación realizados
+        last_error: Último error al intentar eliminarlo
+        created_at: Fecha de creación
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    s3_bucket = models.CharField(max_length=255, verbose_name='Bucket S3')
+    s3_key = models.CharField(max_length=512, verbose_name='Clave S3')
+    reason = models.TextField(blank=True, default='', verbose_name='Razón')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+    last_error = models.TextField(blank=True, default='', verbose_name='Último error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+
+    class Meta:
+        db_table = 'orphaned_s3_objects'
+        verbose_name = 'Archivo S3 huérfano'
+        verbose_name_plural = 'Archivos S3 huérfanos'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.s3_bucket}/{self.s3_key}"
+
+
+class N8NDispatch(models.Model):
+    """
+    Envío pendiente de un documento a un webhook de N8N.
+
+    Los workers de `process_n8n_dispatches` toman los envíos vencidos, los
+    reintentan con backoff exponencial y los marcan como fallidos al agotar
+    `max_attempts`.
+
+    Attributes:
+        id: Identificador único UUID
+        document: Documento a enviar
+        webhook_url: URL del webhook de N8N
+        batched: Se envía junto con otros documentos del mismo webhook
+        status: Estado del envío
+        attempts: Intentos realizados
+        max_attempts: Máximo de intentos antes de marcarlo como fallido
+        next_attempt_at: Fecha a partir de la cual se puede intentar
+        claimed_at: Fecha en que un worker tomó el envío
+        claim_token: Toma vigente; las escrituras de un worker reemplazado no coinciden
+        last_error: Último error recibido
+        created_at: Fecha de creación
+        sent_at: Fecha de envío exitoso
+    """
+    STATUS_CHOICES = N8NDispatchStatus.CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='n8n_dispatches',
+        verbose_name='Documento'
+    )
+    webhook_url = models.CharField(max_length=512, verbose_name='URL Webhook N8N')
+    batched = models.BooleanField(default=False, verbose_name='Por lotes')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=N8NDispatchStatus.PENDING,
+        verbose_name='Estado'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='Máximo de intentos')
+    next_attempt_at = models.DateTimeField(verbose_name='Próximo intento')
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='Tomado en')
+    claim_token = models.UUIDField(null=True, blank=True, verbose_name='Token de la toma')
+    last_error = models.TextField(blank=True, default='', verbose_name='Último error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de envío')
+
+    class Meta:
+        db_table = 'n8n_dispatches'
+        verbose_name = 'Envío a N8N'
+        verbose_name_plural = 'Envíos a N8N'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['batched', 'status', 'webhook_url']),
+            models.Index(fields=['document']),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} -> {self.webhook_url} ({self.get_status_display()})"
+
+
+class EntityComplianceStatus(models.Model):
+    """
+    Estado de frescura de los errores de cumplimiento de una entidad.
+
+    Cada escritura que afecta la validación de la entidad incrementa
+    `version`; el refresco guarda en `refreshed_version` la versión que leyó
+    antes de recalcular. La entidad está desactualizada si
+    `version > refreshed_version` o si se refrescó antes de hoy (los errores
+    por fechas cambian con el día).
+
+    Attributes:
+        entity: Entidad
+        version: Contador de cambios
+        changed_at: Fecha del último cambio
+        refreshed_version: Versión recalculada por el último refresco
+        refreshed_on: Día del último refresco
+        refreshed_at: Fecha del último refresco
+    """
+    entity = models.OneToOneField(
+        Entity,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compliance_status',
+        verbose_name='Entidad'
+    )
+    version = models.PositiveBigIntegerField(default=1, verbose_name='Versión')
+    changed_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha del último cambio')
+    refreshed_version = models.PositiveBigIntegerField(default=0, verbose_name='Versión refrescada')
+    refreshed_on = models.DateField(null=True, blank=True, verbose_name='Día del refresco')
+    refreshed_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha del refresco')
+
+    class Meta:
+        db_table = 'entity_compliance_status'
+        verbose_name = 'Estado de cumplimiento'
+        verbose_name_plural = 'Estados de cumplimiento'
+
+    def __str__(self):
+        return f"{self.entity_id} (v{self.refreshed_version}/{self.version})"
+
+
+class CompanyDataVersion(models.Model):
+    """
+    Versión de los datos de validación de una empresa. La incrementan las
+    escrituras sobre sus documentos y entidades, y los cambios de tipos de
+    documento y reglas de validación (todas las empresas). Forma parte de la
+    llave del cache de `validate` (`apps.documents.validation_cache`).
+
+    Attributes:
+        company: Empresa
+        version: Contador de cambios
+        changed_at: Fecha del último cambio
+    """
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='data_version',
+        verbose_name='Empresa'
+    )
+    version = models.PositiveBigIntegerField(default=1, verbose_name='Versión')
+    changed_at = models.DateTimeField(auto_now=True, verbose_name='Fecha del último cambio')
+
+    class Meta:
+        db_table = 'company_data_versions'
+        verbose_name = 'Versión de datos de empresa'
+        verbose_name_plural = 'Versiones de datos de empresa'
+
+    def __str__(self):
+        return f"{self.company_id} (v{self.version})"
+
+
+class EntityCompliance(models.Model):
+    """
+    Error de cumplimiento vigente de una entidad, tal como lo calcula
+    fn_validate_documents_bulk. Lo mantiene `apps.documents.compliance`.
+
+    Attributes:
+        entity: Entidad con el error
+        company: Empresa de la entidad
+        entity_type: Tipo de la entidad
+        entity_code: Código de la entidad
+        document_type_code: Código del tipo de documento
+        error_type: Tipo de error (missing_mandatory, expired, ...)
+        error_message: Descripción del error
+        computed_at: Fecha del cálculo
+    """
+    entity = models.ForeignKey(
+        Entity,
+        on_delete=models.CASCADE,
+        related_name='compliance_errors',
+        verbose_name='Entidad'
+    )
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='compliance_errors',
+        verbose_name='Empresa'
+    )
+    entity_type = models.CharField(max_length=50, choices=EntityType.CHOICES, verbose_name='Tipo de entidad')
+    entity_code = models.CharField(max_length=100, verbose_name='Código de entidad')
+    document_type_code = models.CharField(max_length=50, verbose_name='Código del tipo de documento')
+    error_type = models.CharField(max_length=50, verbose_name='Tipo de error')
+    error_message = models.TextField(verbose_name='Mensaje')
+    computed_at = models.DateTimeField(verbose_name='Fecha de cálculo')
+
+    class Meta:
+        db_table = 'entity_compliance'
+        verbose_name = 'Error de cumplimiento'
+        verbose_name_plural = 'Errores de cumplimiento'
+        ordering = ['entity_code', 'error_type', 'document_type_code']
+        indexes = [
+            # Lectura de validate: empresa + tipo, ya en el orden de la respuesta
+            models.Index(fields=['company', 'entity_type', 'entity_code', 'error_type', 'document_type_code', 'id']),
+            models.Index(fields=['entity']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_code} - {self.document_type_code}: {self.error_type}"
+
+
+class ValidationJob(models.Model):
+    """
+    Validación masiva ejecutada en segundo plano por `process_validation_jobs`.
+
+    El worker recorre las entidades en grupos de VALIDATION_JOB_CHUNK_SIZE,
+    copia sus errores a `ValidationJobResult` y actualiza el progreso. Dos
+    solicitudes con el mismo `fingerprint` (empresa, tipo, entidades, día y
+    versión de los datos) comparten el job mientras está activo.
+
+    Attributes:
+        id: Identificador único UUID
+        company: Empresa validada
+        entity_type: Tipo de entidad
+        entity_ids: Entidades a validar (None = todas las activas)
+        force_refresh: Recalcula todas las entidades
+        data_version: Versión de los datos al crear el job
+        fingerprint: Llave para unir solicitudes idénticas
+        status: Estado del job
+        total_entities: Entidades a validar
+        processed_entities: Entidades validadas
+        total_errors: Errores encontrados
+        error: Error que hizo fallar el job
+        created_at: Fecha de creación
+        claimed_at: Último avance del worker
+        claim_token: Toma vigente; las escrituras de un worker reemplazado no coinciden
+        started_at: Fecha de inicio
+        finished_at: Fecha de finalización
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='validation_jobs',
+        verbose_name='Empresa'
+    )
+    entity_type = models.CharField(max_length=50, choices=EntityType.CHOICES, verbose_name='Tipo de entidad')
+    entity_ids = models.JSONField(null=True, blank=True, verbose_name='Entidades')
+    force_refresh = models.BooleanField(default=False, verbose_name='Forzar recálculo')
+    data_version = models.BigIntegerField(verbose_name='Versión de los datos')
+    fingerprint = models.CharField(max_length=64, verbose_name='Huella')
+    status = models.CharField(
+        max_length=20,
+        choices=ValidationJobStatus.CHOICES,
+        default=ValidationJobStatus.PENDING,
+        verbose_name='Estado'
+    )
+    total_entities = models.PositiveIntegerField(null=True, blank=True, verbose_name='Entidades')
+    processed_entities = models.PositiveIntegerField(default=0, verbose_name='Entidades procesadas')
+    total_errors = models.PositiveIntegerField(default=0, verbose_name='Errores')
+    error = models.TextField(blank=True, default='', verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='Tomado en')
+    claim_token = models.UUIDField(null=True, blank=True, verbose_name='Token de la toma')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de inicio')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de finalización')
+
+    class Meta:
+        db_table = 'validation_jobs'
+        verbose_name = 'Validación masiva'
+        verbose_name_plural = 'Validaciones masivas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
+        ]
+        constraints = [
+            # Un solo job activo por solicitud idéntica
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=models.Q(status__in=ValidationJobStatus.ACTIVE),
+                name='unique_active_validation_job'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} {self.entity_type} ({self.get_status_display()})"
+
+
+class ValidationJobResult(models.Model):
+    """
+    Error encontrado por un `ValidationJob`.
+
+    Attributes:
+        job: Job que lo encontró
+        entity_id: Entidad con el error
+        entity_code: Código de la entidad
+        document_type_code: Código del tipo de documento
+        error_type: Tipo de error
+        error_message: Descripción del error
+    """
+    job = models.ForeignKey(
+        ValidationJob,
+        on_delete=models.CASCADE,
+        related_name='results',
+        verbose_name='Job'
+    )
+    # Sin FK: el resultado es una foto del momento de la validación
+    entity_id = models.UUIDField(verbose_name='Entidad')
+    entity_code = models.CharField(max_length=100, verbose_name='Código de entidad')
+    document_type_code = models.CharField(max_length=50, verbose_name='Código del tipo de documento')
+    error_type = models.CharField(max_length=50, verbose_name='Tipo de error')
+    error_message = models.TextField(verbose_name='Mensaje')
+
+    class Meta:
+        db_table = 'validation_job_results'
+        verbose_name = 'Resultado de validación masiva'
+        verbose_name_plural = 'Resultados de validación masiva'
+        ordering = ['entity_code', 'error_type', 'document_type_code', 'id']
+        indexes = [
+            # Páginas por keyset dentro de un job
+            models.Index(fields=['job', 'entity_code', 'error_type', 'document_type_code', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_code} - {self.document_type_code}: {self.error_type}"
+
+
+class ValidationRule(models.Model):
+    """
+    Regla de validación configurable, adicional a las fijas de
+    fn_validate_documents_bulk. `apps.documents.rules` compila las reglas
+    activas en una sola consulta junto con la función.
+
+    Tipos de regla (`kind`):
+        date_offset: `date_field` del documento es `operator` (antes/después)
+            de la fecha de validación + `offset_days`
+        status_in: el documento está en uno de `statuses`
+        metadata_required: la entidad no tiene alguna de `metadata_keys` en
+            `Entity.metadata` (si hay `document_type`, solo las entidades con
+            un documento de ese tipo)
+
+    `message` admite `{date}`, `{status}` y `{key}` según el tipo.
+
+    Attributes:
+        id: Identificador único UUID
+        name: Nombre descriptivo
+        entity_type: Tipo de entidad al que aplica
+        document_type: Tipo de documento al que aplica (obligatorio salvo en metadata_required)
+        kind: Tipo de predicado
+        date_field: Fecha del documento que compara date_offset
+        operator: Comparación de date_offset
+        offset_days: Días que se suman a la fecha de validación (pueden ser negativos)
+        statuses: Estados de status_in; en date_offset limita los documentos (vacío = todos)
+        metadata_keys: Llaves de metadata_required
+        error_type: Tipo de error reportado
+        message: Mensaje del error
+        is_active: Regla vigente
+        created_at: Fecha de creación
+        updated_at: Fecha de actualización
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, verbose_name='Nombre')
+    entity_type = models.CharField(max_length=50, choices=EntityType.CHOICES, verbose_name='Tipo de entidad')
+    document_type = models.ForeignKey(
+        DocumentType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='validation_rules',
+        verbose_name='Tipo de documento'
+    )
+    kind = models.CharField(max_length=20, choices=ValidationRuleKind.CHOICES, verbose_name='Tipo de regla')
+    date_field = models.CharField(
+        max_length=20,
+        choices=ValidationRuleDateField.CHOICES,
+        blank=True,
+        default='',
+        verbose_name='Campo de fecha'
+    )
+    operator = models.CharField(
+        max_length=10,
+        choices=ValidationRuleOperator.CHOICES,
+        blank=True,
+        default='',
+        verbose_name='Comparación'
+    )
+    offset_days = models.IntegerField(default=0, verbose_name='Días de desfase')
+    statuses = models.JSONField(default=list, blank=True, verbose_name='Estados')
+    metadata_keys = models.JSONField(default=list, blank=True, verbose_name='Llaves de metadatos')
+    error_type = models.SlugField(max_length=50, verbose_name='Tipo de error')
+    message = models.TextField(verbose_name='Mensaje')
+    is_active = models.BooleanField(default=True, verbose_name='Activa')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')
+
+    class Meta:
+        db_table = 'validation_rules'
+        verbose_name = 'Regla de validación'
+        verbose_name_plural = 'Reglas de validación'
+        ordering = ['entity_type', 'name']
+        indexes = [
+            models.Index(fields=['entity_type', 'is_active']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_type_display()} - {self.name}"
@@ -0,0 +1,239 @@
+"""
+Pagination classes for the API.
+
+`KeysetPagination` pages on (timestamp, id) with an opaque cursor, so page
+10.000 costs the same as page 1: no COUNT(*) and no OFFSET scan.
+`SelectablePagination` (the default pagination class) picks page numbers or
+keyset per request with `?pagination=page|cursor`.
+"""
+import base64
+import json
+from typing import List, Optional, Sequence, Tuple
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique composite key such as
+    ('-uploaded_at', '-id').
+
+    The cursor encodes the key of the last row returned, and the next page is
+    read with `key < cursor`. Each page is a range scan on the matching
+    composite index.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    default_ordering = ('-created_at', '-id')
+
+    def __init__(self, ordering: Optional[Sequence[str]] = None):
+        self.ordering = tuple(ordering or self.default_ordering)
+        self.page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> List:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self._invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.first_key = self._key(rows[0]) if rows else None
+        self.last_key = self._key(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Debe ser un número entero.'})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: 'Debe ser mayor que cero.'})
+        return min(size, self.max_page_size)
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or self.last_key is None:
+            return None
+        return self._link(self.last_key, reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if self.first_key is None:
+            # Página vacía al retroceder: volver al inicio
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.first_key, reverse=True)
+
+    def encode_cursor(self, key: Sequence, reverse: bool = False) -> str:
+        """Cursor opaco para continuar después de la fila con llave `key`."""
+        payload = {'k': [self._to_json(value) for value in key]}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request) -> Tuple[Optional[List], bool]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            key = payload['k']
+            if not isinstance(key, list) or len(key) != len(self.ordering):
+                raise ValueError(key)
+        except (ValueError, TypeError, KeyError):
+            raise NotFound('Cursor inválido')
+        return key, bool(payload.get('r'))
+
+    def _link(self, key: Sequence, reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(key, reverse))
+
+    def _key(self, obj) -> Tuple:
+        # Instancias del modelo o filas de .values()
+        if isinstance(obj, dict):
+            return tuple(obj[field.lstrip('-')] for field in self.ordering)
+        return tuple(getattr(obj, field.lstrip('-')) for field in self.ordering)
+
+    @staticmethod
+    def _to_json(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _invert(ordering: Sequence[str]) -> Tuple[str, ...]:
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    @staticmethod
+    def _after(ordering: Sequence[str], position: Sequence) -> Q:
+        """
+        Filas que van después de `position` en `ordering`.
+
+        For ('-a', '-b') this builds `a <= x AND (a < x OR b < y)`: the first
+        term is a plain range on the index, the second only drops the ties.
+        """
+        fields = [field.lstrip('-') for field in ordering]
+        lookups = ['lt' if field.startswith('-') else 'gt' for field in ordering]
+        bounds = ['lte' if lookup == 'lt' else 'gte' for lookup in lookups]
+
+        condition = Q(**{f'{fields[-1]}__{lookups[-1]}': position[-1]})
+        for index in range(len(fields) - 2, -1, -1):
+            field, value = fields[index], position[index]
+            condition = Q(**{f'{field}__{bounds[index]}': value}) & (
+                Q(**{f'{field}__{lookups[index]}': value}) | condition
+            )
+        return condition
+
+
+class SelectablePagination(BasePagination):
+    """
+    Chooses page-number or keyset pagination per request.
+
+    `?pagination=cursor` or `?pagination=page` selects it explicitly. Without
+    it, views that set `default_pagination = 'cursor'` page by keyset unless
+    the client asks for `?page=` or an `?ordering=` the keyset cannot follow.
+    The keyset comes from the view's `keyset_ordering`.
+    """
+    query_param = 'pagination'
+    PAGE = 'page'
+    CURSOR = 'cursor'
+
+    def __init__(self):
+        self.paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.select(request, view)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return data['results']
+
+    def select(self, request, view=None) -> BasePagination:
+        ordering = tuple(getattr(view, 'keyset_ordering', KeysetPagination.default_ordering))
+        mode = request.query_params.get(self.query_param)
+        requested_ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+
+        if mode not in (None, self.PAGE, self.CURSOR):
+            raise ValidationError({self.query_param: f"Valores permitidos: {self.PAGE}, {self.CURSOR}."})
+
+        if mode is None:
+            if getattr(view, 'default_pagination', self.PAGE) != self.CURSOR:
+                mode = self.PAGE
+            elif 'page' in request.query_params:
+                mode = self.PAGE
+            elif requested_ordering and self._keyset_for(ordering, requested_ordering) is None:
+                mode = self.PAGE
+            else:
+                mode = self.CURSOR
+
+        if mode == self.PAGE:
+            return PageNumberPagination()
+
+        if requested_ordering:
+            keyset = self._keyset_for(ordering, requested_ordering)
+            if keyset is None:
+                field = ordering[0].lstrip('-')
+                raise ValidationError({
+                    api_settings.ORDERING_PARAM:
+                        f"La paginación por cursor solo admite ordering={field} o ordering=-{field}."
+                })
+            ordering = keyset
+        return KeysetPagination(ordering)
+
+    @staticmethod
+    def _keyset_for(ordering: Sequence[str], requested: str) -> Optional[Tuple[str, ...]]:
+        """Keyset en la dirección pedida, o None si el orden pedido es otro."""
+        field = ordering[0].lstrip('-')
+        if requested == f'-{field}':
+            return tuple(f"-{name.lstrip('-')}" for name in ordering)
+        if requested == field:
+            return tuple(name.lstrip('-') for name in ordering)
+        return None
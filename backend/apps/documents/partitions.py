@@ -0,0 +1,158 @@
+"""
+Monthly range partitions of `document_validation_logs` (PostgreSQL only).
+
+Partitions are named `document_validation_logs_pYYYYMM` and cover
+[first day of the month, first day of the next month). Rows outside every
+partition land in `document_validation_logs_default`. The table from before
+partitioning is attached as `document_validation_logs_history` and covers
+every date before the first monthly partition (see migration 0007).
+"""
+import re
+from datetime import date
+from typing import List, Optional
+
+from django.db import connection, transaction
+
+from .models import DocumentValidationLog
+
+PARENT_TABLE = DocumentValidationLog._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+HISTORY_PARTITION = f'{PARENT_TABLE}_history'
+PARTITION_PATTERN = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+UPPER_BOUND_PATTERN = re.compile(r"TO \('(\d{4})-(\d{2})-01")
+
+
+def is_supported() -> bool:
+    """Solo PostgreSQL soporta el particionado."""
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Primer día del mes `months` meses después (o antes) de `value`."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'{PARENT_TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned() -> bool:
+    """Indica si `document_validation_logs` ya es una tabla particionada."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [PARENT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions() -> List[date]:
+    """Meses de las particiones mensuales adjuntas, en orden."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s",
+            [PARENT_TABLE]
+        )
+        months = []
+        for (name,) in cursor.fetchall():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def history_end() -> Optional[date]:
+    """
+    Primer mes que no cubre la partición histórica, o None si no está adjunta
+    (ya se separó o la tabla se particionó sin ella).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND child.relname = %s",
+            [PARENT_TABLE, HISTORY_PARTITION]
+        )
+        row = cursor.fetchone()
+    match = row and UPPER_BOUND_PATTERN.search(row[0])
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def create_partition(month: date) -> Optional[str]:
+    """
+    Crea y adjunta la partición del mes, moviendo a ella las filas que hayan
+    caído en la partición default para ese rango.
+
+    Returns:
+        Nombre de la partición, o None si el mes ya tiene partición (propia o la histórica)
+    """
+    month = month_start(month)
+    covered_until = history_end()
+    if month in list_partitions() or (covered_until and month < covered_until):
+        return None
+
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)'
+        )
+        # Las columnas generadas (search_vector) no aceptan valores en un INSERT
+        columns = ', '.join(f'"{column}"' for column in _stored_columns(cursor))
+        cursor.execute(
+            f'WITH moved AS ('
+            f'  DELETE FROM "{DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s RETURNING *'
+            f') INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+    return name
+
+
+def _stored_columns(cursor) -> List[str]:
+    """Columnas no generadas de la tabla de logs."""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = %s AND is_generated = 'NEVER' ORDER BY ordinal_position",
+        [PARENT_TABLE]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def detach_partition(month: date, drop: bool = False) -> str:
+    """
+    Separa la partición del mes de la tabla de logs. La tabla separada queda
+    como archivo (se puede exportar con pg_dump) salvo que `drop` sea True.
+
+    Returns:
+        Nombre de la partición
+    """
+    return _detach(partition_name(month), drop)
+
+
+def detach_history(drop: bool = False) -> str:
+    """Separa la partición histórica, como `detach_partition`."""
+    return _detach(HISTORY_PARTITION, drop)
+
+
+def _detach(name: str, drop: bool) -> str:
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+    return name
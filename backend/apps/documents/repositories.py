@@ -2,9 +2,11 @@
 Repository pattern implementation for Document Management System.
 Provides abstraction layer between business logic and data access.
 """
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Tuple
 from uuid import UUID
-from django.db.models import QuerySet
+from django.db import connection
+from django.db.models import Case, QuerySet, Value, When
 from .models import Document, DocumentType, DocumentValidationLog
 from .constants import ValidationStatus
 
@@ -56,6 +58,56 @@ class DocumentRepository:
             expiration_date__lt=timezone.now().date()
         ).select_related('company', 'entity', 'document_type')
 
+    @staticmethod
+    def apply_validation_results(results: List[Tuple[str, str, str]],
+                                 validated_at: datetime) -> List[str]:
+        """
+        Apply (document_id, validation_status, validation_reason) to the documents
+        that are still pending, in a single UPDATE. Returns the updated ids.
+        """
+        if not results:
+            return []
+
+        if connection.vendor == 'postgresql':
+            values = ', '.join(['(%s::uuid, %s, %s)'] * len(results))
+            params = [validated_at]
+            for document_id, new_status, reason in results:
+                params.extend([document_id, new_status, reason])
+            params.append(ValidationStatus.PENDING)
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE {Document._meta.db_table} AS d
+                    SET validation_status = v.new_status,
+                        validation_reason = v.reason,
+                        validated_at = %s
+                    FROM (VALUES {values}) AS v(id, new_status, reason)
+                    WHERE d.id = v.id AND d.validation_status = %s
+                    RETURNING d.id
+                """, params)
+                return [str(row[0]) for row in cursor.fetchall()]
+
+        # Other backends: read the pending ids, then one UPDATE with CASE
+        by_id = {document_id: (new_status, reason) for document_id, new_status, reason in results}
+        pending = [
+            str(document_id) for document_id in Document.objects.filter(
+                id__in=list(by_id), validation_status=ValidationStatus.PENDING
+            ).values_list('id', flat=True)
+        ]
+        if pending:
+            Document.objects.filter(
+                id__in=pending, validation_status=ValidationStatus.PENDING
+            ).update(
+                validation_status=Case(
+                    *[When(id=document_id, then=Value(by_id[document_id][0])) for document_id in pending]
+                ),
+                validation_reason=Case(
+                    *[When(id=document_id, then=Value(by_id[document_id][1])) for document_id in pending]
+                ),
+                validated_at=validated_at
+            )
+        return pending
+
     @staticmethod
     def create(document_data: dict) -> Document:
         """Create a new document."""
@@ -112,16 +164,32 @@ class DocumentValidationLogRepository:
         return DocumentValidationLog.objects.create(**log_data)
 
     @staticmethod
-    def find_by_document(document_id: UUID) -> QuerySet:
-        """Find all validation logs for a document."""
-        return DocumentValidationLog.objects.filter(
-            document_id=document_id
-        ).order_by('-created_at')
+    def find_by_document(document_id: UUID, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> QuerySet:
+        """
+        Find all validation logs for a document.
+
+        `since` (inclusive) and `until` (exclusive) bound created_at so that
+        PostgreSQL only scans the matching monthly partitions.
+        """
+        queryset = DocumentValidationLog.objects.filter(document_id=document_id)
+        return DocumentValidationLogRepository._in_period(queryset, since, until).order_by('-created_at')
 
     @staticmethod
-    def find_by_action(document_id: UUID, action: str) -> QuerySet:
+    def find_by_action(document_id: UUID, action: str, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> QuerySet:
         """Find validation logs for a document filtered by action."""
-        return DocumentValidationLog.objects.filter(
+        queryset = DocumentValidationLog.objects.filter(
             document_id=document_id,
             action=action
-        ).order_by('-created_at')
+        )
+        return DocumentValidationLogRepository._in_period(queryset, since, until).order_by('-created_at')
+
+    @staticmethod
+    def _in_period(queryset: QuerySet, since: Optional[datetime],
+                   until: Optional[datetime]) -> QuerySet:
+        if since is not None:
+            queryset = queryset.filter(created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(created_at__lt=until)
+        return queryset
@@ -0,0 +1,161 @@
+"""
+Configurable validation rules (`validation_rules`) compiled into SQL.
+
+The fixed checks (missing mandatory, future issue date, expired, rejected,
+expiring soon) stay in `fn_validate_documents_bulk`. The active
+`ValidationRule` rows add checks without a migration:
+
+- the compiler emits one set-based branch per predicate shape (`date_offset`
+  per date field and operator, `status_in`, `metadata_required`); each branch
+  joins `validation_rules` itself, so any number of rules of the same shape
+  costs one scan, not one query per rule;
+- the branches and the function call form a single statement with five
+  parameters (company, entity type, entity ids, as_of, expiring window);
+- the rules are only read by the statement, so it covers every possible shape
+  and is compiled once per process. Creating, editing or deleting rules (even
+  with `QuerySet.update` or from another process) never makes it stale, and
+  using it costs no extra query.
+
+A branch with no active rules of its shape starts from an empty join with
+`validation_rules` and does not read documents.
+"""
+import functools
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .constants import ValidationRuleDateField, ValidationRuleKind, ValidationRuleOperator
+
+_OPERATORS = {
+    ValidationRuleOperator.BEFORE: '<',
+    ValidationRuleOperator.AFTER: '>',
+}
+_DATE_FIELDS = {field for field, _ in ValidationRuleDateField.CHOICES}
+
+_ARGS = """args AS (
+    SELECT
+        %s::uuid AS company_id,
+        %s::varchar AS entity_type,
+        %s::uuid[] AS entity_ids,
+        COALESCE(%s::date, CURRENT_DATE) AS as_of,
+        %s::integer AS expiring_within_days
+)"""
+
+_FUNCTION = """SELECT f.entity_id, f.entity_code, f.document_type_code, f.error_type, f.error_message
+FROM args a
+CROSS JOIN LATERAL fn_validate_documents_bulk(
+    a.company_id, a.entity_type, a.entity_ids, a.as_of, a.expiring_within_days
+) f"""
+
+_TARGETS = """target_entities AS (
+    SELECT e.id, e.entity_code, e.metadata
+    FROM entities e
+    CROSS JOIN args a
+    WHERE e.company_id = a.company_id
+      AND e.entity_type = a.entity_type
+      AND e.is_active = true
+      AND (a.entity_ids IS NULL OR e.id = ANY(a.entity_ids))
+),
+rules AS (
+    SELECT r.*
+    FROM validation_rules r
+    CROSS JOIN args a
+    WHERE r.is_active = true
+      AND r.entity_type = a.entity_type
+)"""
+
+Shape = Tuple[str, str, str]
+
+# Todas las formas (kind, date_field, operator) que admite ValidationRule
+SHAPES: List[Shape] = [
+    (ValidationRuleKind.DATE_OFFSET, date_field, operator)
+    for date_field in sorted(_DATE_FIELDS)
+    for operator in sorted(_OPERATORS)
+] + [
+    (ValidationRuleKind.STATUS_IN, '', ''),
+    (ValidationRuleKind.METADATA_REQUIRED, '', ''),
+]
+
+
+def compile_statement(shapes: Iterable[Shape]) -> str:
+    """
+    Consulta con fn_validate_documents_bulk y una rama por forma de regla.
+    Recibe los parámetros de `statement_params`.
+    """
+    branches = [_branch(*shape) for shape in shapes]
+    branches = [branch for branch in branches if branch]
+    if not branches:
+        return f'WITH {_ARGS}\n{_FUNCTION}'
+    return '\nUNION ALL\n'.join([f'WITH {_ARGS},\n{_TARGETS}\n{_FUNCTION}'] + branches)
+
+
+def statement_params(company_id, entity_type: str, entity_ids: Optional[Sequence] = None,
+                     as_of=None, expiring_within_days: Optional[int] = None) -> List:
+    """
+    Parámetros de la consulta compilada para una empresa y tipo de entidad
+    (`entity_ids` None = todas las entidades activas).
+    """
+    ids = None if entity_ids is None else [str(entity_id) for entity_id in entity_ids]
+    return [str(company_id), entity_type, ids, as_of, expiring_within_days]
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_statement() -> str:
+    """
+    Consulta con una rama por cada forma de regla. Se compila una vez por
+    proceso; las reglas se leen al ejecutarla, así que no hay que recompilarla
+    cuando cambian.
+    """
+    return compile_statement(SHAPES)
+
+
+def _branch(kind: str, date_field: str, operator: str) -> Optional[str]:
+    if kind == ValidationRuleKind.DATE_OFFSET:
+        # Nombres de columna de una lista cerrada, nunca del usuario
+        if date_field not in _DATE_FIELDS or operator not in _OPERATORS:
+            return None
+        return f"""SELECT te.id, te.entity_code, dt.code, r.error_type::varchar,
+       REPLACE(r.message, '{{date}}', TO_CHAR(d.{date_field}, 'YYYY-MM-DD'))
+FROM rules r
+INNER JOIN documents d ON d.document_type_id = r.document_type_id
+INNER JOIN target_entities te ON te.id = d.entity_id
+INNER JOIN document_types dt ON dt.id = d.document_type_id
+CROSS JOIN args a
+WHERE r.kind = '{ValidationRuleKind.DATE_OFFSET}'
+  AND r.date_field = '{date_field}'
+  AND r.operator = '{operator}'
+  AND d.company_id = a.company_id
+  AND d.{date_field} {_OPERATORS[operator]} a.as_of + r.offset_days
+  AND (jsonb_array_length(r.statuses) = 0 OR r.statuses @> to_jsonb(d.validation_status::text))"""
+
+    if kind == ValidationRuleKind.STATUS_IN:
+        return f"""SELECT te.id, te.entity_code, dt.code, r.error_type::varchar,
+       REPLACE(r.message, '{{status}}', d.validation_status)
+FROM rules r
+INNER JOIN documents d ON d.document_type_id = r.document_type_id
+INNER JOIN target_entities te ON te.id = d.entity_id
+INNER JOIN document_types dt ON dt.id = d.document_type_id
+CROSS JOIN args a
+WHERE r.kind = '{ValidationRuleKind.STATUS_IN}'
+  AND d.company_id = a.company_id
+  AND r.statuses @> to_jsonb(d.validation_status::text)"""
+
+    if kind == ValidationRuleKind.METADATA_REQUIRED:
+        return f"""SELECT te.id, te.entity_code, COALESCE(dt.code, '')::varchar, r.error_type::varchar,
+       REPLACE(r.message, '{{key}}', k.key)
+FROM rules r
+CROSS JOIN LATERAL jsonb_array_elements_text(r.metadata_keys) AS k(key)
+INNER JOIN target_entities te ON COALESCE(te.metadata ->> k.key, '') = ''
+LEFT JOIN document_types dt ON dt.id = r.document_type_id
+CROSS JOIN args a
+WHERE r.kind = '{ValidationRuleKind.METADATA_REQUIRED}'
+  AND (
+      r.document_type_id IS NULL
+      OR EXISTS (
+          SELECT 1
+          FROM documents d
+          WHERE d.company_id = a.company_id
+            AND d.entity_id = te.id
+            AND d.document_type_id = r.document_type_id
+      )
+  )"""
+
+    return None
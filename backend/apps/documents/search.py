@@ -0,0 +1,70 @@
+"""
+Search backend for the API list endpoints.
+
+On PostgreSQL every search term becomes a condition that an index can serve:
+- fields listed in the view's `search_vectors` match a generated `tsvector`
+  column with a prefix `tsquery` (GIN index);
+- other fields use `icontains`, which is served by the `gin_trgm_ops`
+  indexes on `UPPER(column)` (see the `*_search_indexes` migrations);
+- fields on related models (`entity__entity_code`) are matched with
+  `entity_id IN (SELECT id FROM entities WHERE ...)`, so the related table
+  uses its own index instead of a join with an OR across tables.
+
+Other backends use DRF's `SearchFilter` unchanged.
+"""
+import re
+from typing import Dict
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+TSQUERY_WORD = re.compile(r'[^\W_]+')
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """SearchFilter that builds index-friendly conditions on PostgreSQL."""
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        vectors = getattr(view, 'search_vectors', {})
+        for term in search_terms:
+            queryset = queryset.filter(self.build_condition(queryset.model, search_fields, term, vectors))
+        return queryset
+
+    def build_condition(self, model, search_fields, term: str, vectors: Dict[str, str]) -> Q:
+        """Condición OR de `term` sobre todos los campos de búsqueda."""
+        condition = Q()
+        for field in search_fields:
+            condition |= self.match_field(model, field, term, vectors)
+        return condition
+
+    def match_field(self, model, field: str, term: str, vectors: Dict[str, str]) -> Q:
+        """Condición de `term` sobre un campo de búsqueda de `model`."""
+        if field in vectors:
+            words = TSQUERY_WORD.findall(term)
+            if words:
+                tsquery = ' & '.join(f'{word}:*' for word in words)
+                column = f'"{model._meta.db_table}"."{vectors[field]}"'
+                return Q(RawSQL(
+                    f"{column} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()
+                ))
+
+        name, _, rest = field.partition('__')
+        if rest:
+            # search_vectors solo aplica a columnas de la tabla principal
+            relation = model._meta.get_field(name)
+            subquery = relation.related_model.objects.filter(
+                self.match_field(relation.related_model, rest, term, {})
+            ).values('pk')
+            return Q(**{f'{name}__in': subquery})
+
+        return Q(**{f'{field}__icontains': term})
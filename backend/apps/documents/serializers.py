@@ -1,8 +1,11 @@
 """
 Serializers for Document Management System.
 """
+from django.conf import settings
+from django.core import signing
 from rest_framework import serializers
-from .models import DocumentType, Document, DocumentValidationLog
+from .constants import EntityType, FileUpload, ValidationRuleKind, ValidationStatus
+from .models import DocumentType, Document, DocumentValidationLog, ValidationJob, ValidationRule
 from apps.companies.serializers import CompanySerializer
 from apps.entities.serializers import EntitySerializer
 
@@ -16,6 +19,7 @@ class DocumentTypeSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'code', 'name', 'is_mandatory', 'requires_issue_date',
             'requires_expiration_date', 'uses_n8n_workflow', 'n8n_webhook_url',
+            'n8n_connect_timeout', 'n8n_read_timeout', 'n8n_batch_enabled',
             'entity_type', 'entity_type_display', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
@@ -29,6 +33,50 @@ class DocumentTypeSerializer(serializers.ModelSerializer):
         return data
 
 
+class ValidationRuleSerializer(serializers.ModelSerializer):
+    """Serializer para ValidationRule."""
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    statuses = serializers.ListField(
+        child=serializers.ChoiceField(choices=ValidationStatus.CHOICES),
+        required=False
+    )
+    metadata_keys = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False
+    )
+
+    class Meta:
+        model = ValidationRule
+        fields = [
+            'id', 'name', 'entity_type', 'document_type', 'kind', 'kind_display',
+            'date_field', 'operator', 'offset_days', 'statuses', 'metadata_keys',
+            'error_type', 'message', 'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        """Validar los campos que exige cada tipo de regla."""
+        def value(name, default=None):
+            return data.get(name, getattr(self.instance, name, default))
+
+        kind = value('kind')
+        document_type = value('document_type')
+        if document_type and document_type.entity_type != value('entity_type'):
+            raise serializers.ValidationError(
+                "El tipo de documento no corresponde al tipo de entidad de la regla"
+            )
+
+        if kind in (ValidationRuleKind.DATE_OFFSET, ValidationRuleKind.STATUS_IN) and not document_type:
+            raise serializers.ValidationError("Esta regla requiere un tipo de documento")
+        if kind == ValidationRuleKind.DATE_OFFSET and not (value('date_field') and value('operator')):
+            raise serializers.ValidationError("Una regla de fecha requiere date_field y operator")
+        if kind == ValidationRuleKind.STATUS_IN and not value('statuses'):
+            raise serializers.ValidationError("Una regla de estado requiere al menos un estado")
+        if kind == ValidationRuleKind.METADATA_REQUIRED and not value('metadata_keys'):
+            raise serializers.ValidationError("Una regla de metadatos requiere al menos una llave")
+        return data
+
+
 class DocumentValidationLogSerializer(serializers.ModelSerializer):
     """Serializer para DocumentValidationLog."""
     action_display = serializers.CharField(source='get_action_display', read_only=True)
@@ -67,33 +115,89 @@ class DocumentSerializer(serializers.ModelSerializer):
         ]
 
 
-class DocumentUploadSerializer(serializers.Serializer):
-    """Serializer para cargar documentos."""
+class DocumentDetailSerializer(DocumentSerializer):
+    """Document detail with only the latest logs (prefetched as `latest_validation_logs`)."""
+    validation_logs = DocumentValidationLogSerializer(
+        source='latest_validation_logs', many=True, read_only=True
+    )
+
+
+class DocumentListSerializer(serializers.ModelSerializer):
+    """
+    Flat serializer for document lists.
+
+    Related objects are rendered only when named in the `expand` context
+    (`?expand=company,entity,document_type,logs`).
+    """
+    EXPANDABLE_FIELDS = {
+        'company': 'company_detail',
+        'entity': 'entity_detail',
+        'document_type': 'document_type_detail',
+        'logs': 'validation_logs',
+    }
+
+    company_detail = CompanySerializer(source='company', read_only=True)
+    entity_detail = EntitySerializer(source='entity', read_only=True)
+    document_type_detail = DocumentTypeSerializer(source='document_type', read_only=True)
+    validation_status_display = serializers.CharField(source='get_validation_status_display', read_only=True)
+    validation_logs = DocumentValidationLogSerializer(
+        source='latest_validation_logs', many=True, read_only=True
+    )
+
+    class Meta:
+        model = Document
+        fields = [
+            'id', 'company', 'company_detail', 'entity', 'entity_detail',
+            'document_type', 'document_type_detail', 'file_name', 'file_size',
+            'mime_type', 's3_bucket', 's3_key', 's3_region', 'issue_date',
+            'expiration_date', 'validation_status', 'validation_status_display',
+            'validation_reason', 'uploaded_by', 'uploaded_at', 'validated_at',
+            'validation_logs'
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', ())
+        for name, field_name in self.EXPANDABLE_FIELDS.items():
+            if name not in expand:
+                self.fields.pop(field_name)
+
+
+class DocumentTargetSerializer(serializers.Serializer):
+    """Valida empresa, entidad, tipo de documento y fechas de una carga."""
     company_id = serializers.UUIDField()
     entity_id = serializers.UUIDField()
     document_type_id = serializers.UUIDField()
-    file = serializers.FileField()
     issue_date = serializers.DateField(required=False, allow_null=True)
     expiration_date = serializers.DateField(required=False, allow_null=True)
     uploaded_by = serializers.CharField(max_length=255, required=False, default='system')
 
-    def validate(self, data):
-        """Validaciones personalizadas."""
+    @staticmethod
+    def resolve_target(company_id, entity_id, document_type_id):
+        """
+        Obtiene y valida empresa, entidad y tipo de documento.
+
+        Returns:
+            Tupla (company, entity, doc_type)
+
+        Raises:
+            serializers.ValidationError: Si alguno no existe o no es válido
+        """
         from apps.companies.models import Company
         from apps.entities.models import Entity
-        from .utils import validate_file_size, validate_file_type
 
         # Validar que existan los objetos
         try:
-            company = Company.objects.get(id=data['company_id'])
+            company = Company.objects.get(id=company_id)
             if not company.is_active:
                 raise serializers.ValidationError("La empresa no está activa")
         except Company.DoesNotExist:
             raise serializers.ValidationError("La empresa no existe")
 
         try:
-            entity = Entity.objects.get(id=data['entity_id'])
-            if entity.company_id != data['company_id']:
+            entity = Entity.objects.get(id=entity_id)
+            if entity.company_id != company.id:
                 raise serializers.ValidationError("La entidad no pertenece a la empresa especificada")
             if not entity.is_active:
                 raise serializers.ValidationError("La entidad no está activa")
@@ -101,7 +205,7 @@ class DocumentUploadSerializer(serializers.Serializer):
             raise serializers.ValidationError("La entidad no existe")
 
         try:
-            doc_type = DocumentType.objects.get(id=data['document_type_id'])
+            doc_type = DocumentType.objects.get(id=document_type_id)
             if doc_type.entity_type != entity.entity_type:
                 raise serializers.ValidationError(
                     f"El tipo de documento {doc_type.code} no aplica para entidades de tipo {entity.entity_type}"
@@ -109,12 +213,13 @@ class DocumentUploadSerializer(serializers.Serializer):
         except DocumentType.DoesNotExist:
             raise serializers.ValidationError("El tipo de documento no existe")
 
-        # Validar archivo
-        try:
-            validate_file_size(data['file'])
-            validate_file_type(data['file'])
-        except ValueError as e:
-            raise serializers.ValidationError(str(e))
+        return company, entity, doc_type
+
+    def validate(self, data):
+        """Validaciones personalizadas."""
+        company, entity, doc_type = self.resolve_target(
+            data['company_id'], data['entity_id'], data['document_type_id']
+        )
 
         # Validar fechas según tipo de documento
         if doc_type.requires_issue_date and not data.get('issue_date'):
@@ -135,6 +240,75 @@ class DocumentUploadSerializer(serializers.Serializer):
         return data
 
 
+class DocumentUploadSerializer(DocumentTargetSerializer):
+    """Serializer para cargar documentos."""
+    file = serializers.FileField()
+
+    def validate(self, data):
+        """Validar destino y archivo."""
+        from .utils import validate_file_size, validate_file_type
+
+        data = super().validate(data)
+
+        try:
+            validate_file_size(data['file'], settings.DOCUMENT_MAX_UPLOAD_SIZE_MB)
+            validate_file_type(data['file'])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+        return data
+
+
+class DocumentUploadInitSerializer(DocumentTargetSerializer):
+    """Serializer para iniciar una carga directa a S3."""
+    file_name = serializers.CharField(max_length=255)
+    file_size = serializers.IntegerField(min_value=1)
+    mime_type = serializers.CharField(max_length=100)
+
+    def validate(self, data):
+        """Validar destino y el archivo declarado por el cliente."""
+        from .utils import validate_size, validate_content_type
+
+        data = super().validate(data)
+
+        try:
+            validate_size(data['file_size'], settings.DOCUMENT_MAX_UPLOAD_SIZE_MB)
+            validate_content_type(data['mime_type'])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+        return data
+
+
+class DocumentUploadConfirmSerializer(serializers.Serializer):
+    """Serializer para confirmar una carga directa a S3."""
+    upload_token = serializers.CharField()
+
+    def validate_upload_token(self, value):
+        """Verificar firma y vigencia del token emitido por upload-init."""
+        try:
+            return signing.loads(
+                value,
+                salt=FileUpload.UPLOAD_TOKEN_SALT,
+                max_age=settings.DOCUMENT_UPLOAD_URL_EXPIRATION
+            )
+        except signing.SignatureExpired:
+            raise serializers.ValidationError("El token de carga expiró")
+        except signing.BadSignature:
+            raise serializers.ValidationError("Token de carga inválido")
+
+    def validate(self, data):
+        """Revalidar el destino con los datos firmados."""
+        upload = data['upload_token']
+        target = DocumentTargetSerializer(data=upload)
+        target.is_valid(raise_exception=True)
+
+        data = dict(target.validated_data)
+        for key in ('s3_key', 'file_name', 'file_size', 'mime_type'):
+            data[key] = upload[key]
+        return data
+
+
 class DocumentApproveRejectSerializer(serializers.Serializer):
     """Serializer para aprobar/rechazar documentos."""
     reason = serializers.CharField(required=True)
@@ -148,11 +322,40 @@ class N8NCallbackSerializer(serializers.Serializer):
     metadata = serializers.JSONField(required=False, default=dict)
 
 
+class N8NCallbackItemSerializer(N8NCallbackSerializer):
+    """Resultado de N8N para un documento dentro de un callback masivo."""
+    document_id = serializers.UUIDField()
+
+
+class N8NCallbackBulkSerializer(serializers.Serializer):
+    """Serializer para callbacks masivos de N8N."""
+    results = serializers.ListField(
+        child=N8NCallbackItemSerializer(),
+        allow_empty=False,
+        max_length=settings.N8N_CALLBACK_BULK_MAX_ITEMS
+    )
+
+
+class OneOrManyField(serializers.ListField):
+    """Lista que también acepta un solo valor (se convierte en lista de uno)."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            data = [data]
+        # Sin repetidos, en el orden recibido
+        return list(dict.fromkeys(super().to_internal_value(data)))
+
+
 class DocumentValidateSerializer(serializers.Serializer):
     """Serializer para validación masiva."""
-    company_id = serializers.UUIDField()
-    entity_type = serializers.ChoiceField(
-        choices=['vehicle', 'employee', 'supplier', 'asset']
+    ALL_ENTITY_TYPES = 'all'
+
+    # Una empresa o varias (reportes de portafolio)
+    company_id = OneOrManyField(child=serializers.UUIDField(), allow_empty=False)
+    # Un tipo, varios, o 'all'
+    entity_type = OneOrManyField(
+        child=serializers.ChoiceField(choices=[*EntityType.ALL, ALL_ENTITY_TYPES]),
+        allow_empty=False
     )
     entity_ids = serializers.ListField(
         child=serializers.UUIDField(),
@@ -160,3 +363,38 @@ class DocumentValidateSerializer(serializers.Serializer):
         allow_null=True,
         allow_empty=True
     )
+    # Recalcula todas las entidades, no solo las que cambiaron
+    force_refresh = serializers.BooleanField(required=False, default=False)
+    # Fecha a la que se evalúa (por defecto hoy)
+    as_of = serializers.DateField(required=False, allow_null=True)
+    # Reporta como expiring_soon los aprobados que vencen dentro de estos días
+    expiring_within_days = serializers.IntegerField(
+        required=False, allow_null=True, min_value=1, max_value=3650
+    )
+
+    def validate_entity_type(self, value):
+        """'all' equivale a todos los tipos de entidad."""
+        if self.ALL_ENTITY_TYPES in value:
+            return list(EntityType.ALL)
+        return value
+
+
+class ValidationJobSerializer(serializers.ModelSerializer):
+    """Serializer para ValidationJob."""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ValidationJob
+        fields = [
+            'id', 'company', 'entity_type', 'entity_ids', 'force_refresh', 'status',
+            'status_display', 'total_entities', 'processed_entities', 'progress',
+            'total_errors', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Porcentaje de entidades procesadas."""
+        if not obj.total_entities:
+            return 100.0 if obj.finished_at else 0.0
+        return round(obj.processed_entities * 100 / obj.total_entities, 1)
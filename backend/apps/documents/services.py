@@ -2,38 +2,51 @@
 Service layer for document management.
 Handles S3 uploads, N8N webhooks, and business logic.
 """
-import boto3
+import hashlib
+import logging
+import random
+import uuid
 import requests
 import mimetypes
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q
 from django.utils import timezone
 from botocore.exceptions import ClientError
-from .models import Document
-from .constants import ValidationStatus, DocumentAction, N8NStatus
+from . import audit, compliance
+from .models import (
+    Document, DocumentValidationLog, OrphanedS3Object, N8NDispatch, ValidationJob, ValidationJobResult
+)
+from .constants import (
+    ValidationStatus, DocumentAction, N8NStatus, N8NDispatchStatus, N8NCallbackOutcome,
+    ValidationJobStatus
+)
 from .signals import (
     document_uploaded, document_approved, document_rejected,
-    document_n8n_sent, document_n8n_callback_received
+    document_n8n_sent, documents_n8n_batch_sent,
+    document_n8n_callback_received, documents_n8n_callbacks_received
 )
 from .repositories import DocumentRepository, DocumentValidationLogRepository
+from .circuit_breaker import CircuitBreaker, WebhookUnavailable
+from .clients import get_http_session, get_s3_client
+from .upload_handlers import S3StreamedFile
+
+logger = logging.getLogger(__name__)
 
 
 class S3Service:
     """
     Service for interacting with AWS S3.
+
+    Uses the process-wide pooled client from the client registry, so creating
+    an instance is cheap and does not open new connections.
     """
 
-    def __init__(self):
-        from botocore.config import Config
-
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
-            config=Config(signature_version='s3v4')
-        )
+    def __init__(self, s3_client=None):
+        self.s3_client = s3_client or get_s3_client()
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
         self.region = settings.AWS_S3_REGION_NAME
 
@@ -52,13 +65,12 @@ class S3Service:
         Returns:
             Dict con bucket, key, region, file_name, file_size, mime_type
         """
-        # Generar la clave S3
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_extension = file_obj.name.split('.')[-1] if '.' in file_obj.name else ''
-        s3_key = (
-            f"companies/{company_id}/"
-            f"{entity_type}s/{entity_id}/"
-            f"{document_type_code}_{timestamp}.{file_extension}"
+        # El archivo ya fue transferido por S3MultipartUploadHandler
+        if isinstance(file_obj, S3StreamedFile):
+            return dict(file_obj.s3_metadata)
+
+        s3_key = self.build_s3_key(
+            file_obj.name, company_id, entity_id, entity_type, document_type_code
         )
 
         # Determinar tipo MIME
@@ -95,6 +107,83 @@ class S3Service:
         except ClientError as e:
             raise Exception(f"Error al subir archivo a S3: {str(e)}")
 
+    @staticmethod
+    def build_s3_key(file_name: str, company_id: str, entity_id: str,
+                     entity_type: str, document_type_code: str) -> str:
+        """
+        Genera la clave S3 de un documento.
+
+        Args:
+            file_name: Nombre original del archivo
+            company_id: ID de la empresa
+            entity_id: ID de la entidad
+            entity_type: Tipo de entidad (vehicle, employee, etc.)
+            document_type_code: Código del tipo de documento
+
+        Returns:
+            Clave S3, única aunque se pidan dos en el mismo segundo
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_extension = file_name.split('.')[-1] if '.' in file_name else ''
+        return (
+            f"companies/{company_id}/"
+            f"{entity_type}s/{entity_id}/"
+            f"{document_type_code}_{timestamp}_{uuid.uuid4().hex}.{file_extension}"
+        )
+
+    def generate_presigned_post(self, s3_key: str, mime_type: str, max_size: int,
+                                expiration: int = 900) -> Dict[str, Any]:
+        """
+        Genera un POST pre-firmado para que el cliente suba el archivo directo a S3.
+
+        Args:
+            s3_key: Clave destino en S3
+            mime_type: Tipo MIME que debe enviar el cliente
+            max_size: Tamaño máximo permitido en bytes
+            expiration: Tiempo de expiración en segundos
+
+        Returns:
+            Dict con url y fields del formulario
+        """
+        try:
+            return self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Fields={'Content-Type': mime_type},
+                Conditions=[
+                    {'Content-Type': mime_type},
+                    ['content-length-range', 1, max_size],
+                ],
+                ExpiresIn=expiration
+            )
+        except ClientError as e:
+            raise Exception(f"Error al generar POST pre-firmado: {str(e)}")
+
+    def get_file_metadata(self, s3_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta (HEAD) un archivo en S3.
+
+        Args:
+            s3_key: Clave del archivo en S3
+
+        Returns:
+            Dict con file_size y mime_type, o None si el archivo no existe
+        """
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=s3_key
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise Exception(f"Error al consultar archivo en S3: {str(e)}")
+
+        return {
+            'file_size': response['ContentLength'],
+            'mime_type': response.get('ContentType') or 'application/octet-stream'
+        }
+
     def generate_presigned_url(self, s3_key: str, expiration: int = 300) -> str:
         """
         Genera una URL pre-firmada para descargar un archivo de S3.
@@ -138,42 +227,114 @@ class S3Service:
         except ClientError as e:
             raise Exception(f"Error al eliminar archivo de S3: {str(e)}")
 
+    def discard_file(self, s3_key: str, reason: str) -> bool:
+        """
+        Elimina un archivo que quedó sin documento. Si S3 falla, lo registra
+        en `OrphanedS3Object` para que `cleanup_orphaned_s3_objects` lo
+        reintente.
+
+        Args:
+            s3_key: Clave del archivo en S3
+            reason: Causa por la que el archivo quedó huérfano
+
+        Returns:
+            True si se eliminó, False si quedó en cola
+        """
+        try:
+            return self.delete_file(s3_key)
+        except Exception as e:
+            logger.exception("No se pudo eliminar %s de S3; queda en cola", s3_key)
+            OrphanedS3Object.objects.create(
+                s3_bucket=self.bucket_name,
+                s3_key=s3_key,
+                reason=reason,
+                last_error=str(e)
+            )
+            return False
+
 
 class N8NService:
     """
     Service for interacting with N8N workflows.
+
+    Requests go through a keep-alive session per webhook origin taken from the
+    client registry, so consecutive dispatches reuse TCP/TLS connections, and
+    through a `CircuitBreaker` per webhook URL that fails fast while the webhook
+    is down and caps the requests in flight.
     """
 
     def __init__(self):
         self.base_url = settings.N8N_BASE_URL
         self.api_key = settings.N8N_API_KEY
 
-    def trigger_workflow(self, webhook_url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def get_timeout(document_type=None) -> Tuple[float, float]:
+        """
+        Timeouts (conexión, respuesta) para el webhook de un tipo de documento.
+
+        Args:
+            document_type: DocumentType; sus timeouts reemplazan los globales
+
+        Returns:
+            Tupla (connect, read) en segundos
+        """
+        connect_timeout = settings.N8N_CONNECT_TIMEOUT
+        read_timeout = settings.N8N_READ_TIMEOUT
+        if document_type is not None:
+            connect_timeout = document_type.n8n_connect_timeout or connect_timeout
+            read_timeout = document_type.n8n_read_timeout or read_timeout
+        return connect_timeout, read_timeout
+
+    @staticmethod
+    def get_session(webhook_url: str):
+        """Retorna la sesión compartida para el origen del webhook."""
+        parts = urlsplit(webhook_url)
+        return get_http_session(f'{parts.scheme}://{parts.netloc}')
+
+    def trigger_workflow(self, webhook_url: str, payload: Any,
+                         timeout: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
         """
         Dispara un workflow de N8N mediante webhook.
 
         Args:
             webhook_url: URL del webhook de N8N
-            payload: Datos a enviar
+            payload: Datos a enviar (un objeto, o un arreglo en envíos por lotes)
+            timeout: Tupla (connect, read) en segundos; por defecto los globales
 
         Returns:
             Respuesta del webhook
+
+        Raises:
+            WebhookUnavailable: El circuito está abierto o no hay slots libres;
+                el webhook no se llamó
         """
-        try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
+        headers = {
+            'Content-Type': 'application/json',
+        }
 
-            if self.api_key:
-                headers['Authorization'] = f'Bearer {self.api_key}'
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
 
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
+        breaker = CircuitBreaker(webhook_url)
+        with breaker.guard():
+            try:
+                response = self.get_session(webhook_url).post(
+                    webhook_url,
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout or self.get_timeout()
+                )
+            except requests.exceptions.RequestException as e:
+                breaker.record_failure()
+                raise Exception(f"Error al disparar webhook N8N: {str(e)}")
 
+            # Solo errores del servidor cuentan para el circuito; un 4xx es del payload
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+        try:
             response.raise_for_status()
             return response.json() if response.content else {}
 
@@ -181,12 +342,419 @@ class N8NService:
             raise Exception(f"Error al disparar webhook N8N: {str(e)}")
 
 
+class N8NDispatchService:
+    """
+    Durable, asynchronous dispatch of documents to N8N webhooks.
+
+    Uploads only enqueue an `N8NDispatch` row in the same transaction as the
+    document; workers (`process_n8n_dispatches`) deliver them with retries.
+    Document types with `n8n_batch_enabled` are grouped by webhook and sent as
+    one array payload once `N8N_BATCH_MAX_SIZE` or `N8N_BATCH_MAX_WAIT` is hit.
+    """
+
+    def __init__(self, s3_service=None, n8n_service=None):
+        self._s3_service = s3_service
+        self._n8n_service = n8n_service
+
+    @property
+    def s3_service(self):
+        if self._s3_service is None:
+            self._s3_service = S3Service()
+        return self._s3_service
+
+    @property
+    def n8n_service(self):
+        if self._n8n_service is None:
+            self._n8n_service = N8NService()
+        return self._n8n_service
+
+    @staticmethod
+    def enqueue(document: Document) -> Optional[N8NDispatch]:
+        """
+        Encola el envío de un documento si su tipo usa N8N.
+
+        Args:
+            document: Documento recién cargado
+
+        Returns:
+            N8NDispatch creado, o None si el tipo de documento no usa N8N
+        """
+        doc_type = document.document_type
+        if not (doc_type.uses_n8n_workflow and doc_type.n8n_webhook_url):
+            return None
+
+        return N8NDispatch.objects.create(
+            document=document,
+            webhook_url=doc_type.n8n_webhook_url,
+            batched=doc_type.n8n_batch_enabled,
+            max_attempts=settings.N8N_DISPATCH_MAX_ATTEMPTS,
+            next_attempt_at=timezone.now()
+        )
+
+    def build_payload(self, document: Document) -> Dict[str, Any]:
+        """
+        Construye el payload del webhook. Se genera al momento del envío para
+        que la URL pre-firmada no expire mientras el envío espera en cola.
+
+        Args:
+            document: Documento a enviar
+
+        Returns:
+            Payload para N8N
+        """
+        entity = document.entity
+        callback_base = settings.DJANGO_CALLBACK_BASE_URL
+        s3_url = self.s3_service.generate_presigned_url(
+            s3_key=document.s3_key,
+            expiration=3600  # 1 hora
+        )
+
+        return {
+            'document_id': str(document.id),
+            'company_id': str(document.company_id),
+            'entity_type': entity.entity_type,
+            'entity_id': str(entity.id),
+            'entity_code': entity.entity_code,
+            'document_type': document.document_type.code,
+            'file_name': document.file_name,
+            's3_bucket': document.s3_bucket,
+            's3_key': document.s3_key,
+            's3_url': s3_url,
+            'issue_date': str(document.issue_date) if document.issue_date else None,
+            'expiration_date': str(document.expiration_date) if document.expiration_date else None,
+            'callback_url': f"{callback_base}/api/documents/{document.id}/n8n-callback/"
+        }
+
+    @staticmethod
+    def _due_filter(now) -> Q:
+        """Envíos pendientes vencidos o tomados por un worker que no terminó."""
+        stale = now - timedelta(seconds=settings.N8N_DISPATCH_CLAIM_TIMEOUT)
+        return (
+            Q(status=N8NDispatchStatus.PENDING, next_attempt_at__lte=now)
+            | Q(status=N8NDispatchStatus.PROCESSING, claimed_at__lt=stale)
+        )
+
+    @staticmethod
+    def _claim(queryset, limit: int, now) -> List[N8NDispatch]:
+        """
+        Marca como tomados hasta `limit` envíos del queryset que nadie más tenga
+        bloqueados. Cada toma lleva un `claim_token` nuevo: un worker anterior
+        que siga enviando ya no coincide al registrar su resultado.
+        """
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by('next_attempt_at')
+                .values_list('id', flat=True)[:limit]
+            )
+            N8NDispatch.objects.filter(id__in=ids).update(
+                status=N8NDispatchStatus.PROCESSING,
+                claimed_at=now,
+                claim_token=uuid.uuid4()
+            )
+
+        return list(
+            N8NDispatch.objects.select_related(
+                'document', 'document__entity', 'document__document_type'
+            ).filter(id__in=ids).order_by('next_attempt_at')
+        )
+
+    def claim_due(self, batch_size: int) -> List[N8NDispatch]:
+        """
+        Toma envíos individuales vencidos para este worker. Los envíos que otro
+        worker tomó y no terminó dentro de `N8N_DISPATCH_CLAIM_TIMEOUT` se
+        vuelven a tomar.
+
+        Args:
+            batch_size: Máximo de envíos a tomar
+
+        Returns:
+            Envíos tomados
+        """
+        now = timezone.now()
+        queryset = N8NDispatch.objects.filter(self._due_filter(now), batched=False)
+        return self._claim(queryset, batch_size, now)
+
+    def claim_batches(self) -> Dict[str, List[N8NDispatch]]:
+        """
+        Toma los lotes listos para enviar: webhooks con `N8N_BATCH_MAX_SIZE`
+        envíos vencidos, o cuyo envío más antiguo lleva `N8N_BATCH_MAX_WAIT`
+        segundos esperando.
+
+        Returns:
+            Envíos tomados agrupados por URL del webhook
+        """
+        now = timezone.now()
+        max_size = settings.N8N_BATCH_MAX_SIZE
+        waited_since = now - timedelta(seconds=settings.N8N_BATCH_MAX_WAIT)
+        due = N8NDispatch.objects.filter(self._due_filter(now), batched=True)
+
+        ready_urls = [
+            group['webhook_url']
+            for group in due.values('webhook_url').annotate(
+                total=Count('id'), oldest=Min('next_attempt_at')
+            ).order_by()
+            if group['total'] >= max_size or group['oldest'] <= waited_since
+        ]
+
+        batches = {}
+        for webhook_url in ready_urls:
+            dispatches = self._claim(due.filter(webhook_url=webhook_url), max_size, now)
+            if dispatches:
+                batches[webhook_url] = dispatches
+        return batches
+
+    def process_due(self, batch_size: int = 50) -> int:
+        """
+        Toma y entrega los envíos individuales vencidos y los lotes listos.
+
+        Returns:
+            Número de envíos procesados
+        """
+        dispatches = self.claim_due(batch_size)
+        for dispatch in dispatches:
+            self.deliver(dispatch)
+
+        processed = len(dispatches)
+        for webhook_url, batch in self.claim_batches().items():
+            self.deliver_batch(webhook_url, batch)
+            processed += len(batch)
+        return processed
+
+    def deliver(self, dispatch: N8NDispatch) -> bool:
+        """
+        Envía un documento a N8N y registra el resultado.
+
+        El resultado solo se guarda (y la señal solo se envía) si el envío
+        sigue tomado por este worker: si otro lo retomó, él registra el suyo.
+
+        Returns:
+            True si el envío fue exitoso
+        """
+        document = dispatch.document
+        try:
+            payload = self.build_payload(document)
+            self.n8n_service.trigger_workflow(
+                dispatch.webhook_url,
+                payload,
+                timeout=N8NService.get_timeout(document.document_type)
+            )
+        except WebhookUnavailable as e:
+            self._defer([dispatch], e)
+            return False
+        except Exception as e:
+            self._record_failure(dispatch, e)
+            return False
+
+        dispatch.attempts += 1
+        dispatch.status = N8NDispatchStatus.SENT
+        dispatch.sent_at = timezone.now()
+        dispatch.last_error = ''
+        if not self._save_owned(dispatch, ['attempts', 'status', 'sent_at', 'last_error']):
+            return False
+
+        document_n8n_sent.send(
+            sender=N8NDispatchService,
+            document=document,
+            webhook_url=dispatch.webhook_url,
+            error=None
+        )
+        return True
+
+    def deliver_batch(self, webhook_url: str, dispatches: List[N8NDispatch]) -> bool:
+        """
+        Envía varios documentos al mismo webhook en una sola llamada, con un
+        arreglo de payloads, y registra el resultado de todos con un insert.
+
+        Returns:
+            True si el envío fue exitoso
+        """
+        documents = [dispatch.document for dispatch in dispatches]
+        try:
+            payload = [self.build_payload(document) for document in documents]
+            self.n8n_service.trigger_workflow(
+                webhook_url,
+                payload,
+                timeout=N8NService.get_timeout(documents[0].document_type)
+            )
+        except WebhookUnavailable as e:
+            self._defer(dispatches, e)
+            return False
+        except Exception as e:
+            with transaction.atomic():
+                # Con las filas bloqueadas, claim (skip_locked) no las retoma antes del bulk_update
+                dispatches = self._lock_owned(dispatches)
+                dead = [dispatch for dispatch in dispatches if self._apply_failure(dispatch, e)]
+                N8NDispatch.objects.bulk_update(
+                    dispatches, ['attempts', 'last_error', 'status', 'next_attempt_at']
+                )
+            if dead:
+                logger.error(
+                    "Lote de %s envíos a %s descartado tras agotar intentos: %s",
+                    len(dead), webhook_url, e
+                )
+                documents_n8n_batch_sent.send(
+                    sender=N8NDispatchService,
+                    documents=[dispatch.document for dispatch in dead],
+                    webhook_url=webhook_url,
+                    error=e
+                )
+            return False
+
+        with transaction.atomic():
+            dispatches = self._lock_owned(dispatches)
+            N8NDispatch.objects.filter(id__in=[dispatch.id for dispatch in dispatches]).update(
+                attempts=F('attempts') + 1,
+                status=N8NDispatchStatus.SENT,
+                sent_at=timezone.now(),
+                last_error=''
+            )
+        if not dispatches:
+            return False
+
+        documents_n8n_batch_sent.send(
+            sender=N8NDispatchService,
+            documents=[dispatch.document for dispatch in dispatches],
+            webhook_url=webhook_url,
+            error=None
+        )
+        return True
+
+    @staticmethod
+    def _defer(dispatches: List[N8NDispatch], error: WebhookUnavailable) -> None:
+        """
+        Reprograma envíos que no llegaron a salir (circuito abierto o sin slots)
+        sin consumir intentos.
+        """
+        N8NDispatchService._owned(dispatches).update(
+            status=N8NDispatchStatus.PENDING,
+            next_attempt_at=timezone.now() + timedelta(seconds=error.retry_after),
+            last_error=str(error)
+        )
+
+    def _record_failure(self, dispatch: N8NDispatch, error: Exception) -> None:
+        """Reprograma el envío con backoff exponencial o lo marca como fallido."""
+        dead = self._apply_failure(dispatch, error)
+        if not self._save_owned(dispatch, ['attempts', 'last_error', 'status', 'next_attempt_at']):
+            return
+
+        if dead:
+            logger.error(
+                "Envío a N8N del documento %s descartado tras %s intentos: %s",
+                dispatch.document_id, dispatch.attempts, error
+            )
+            document_n8n_sent.send(
+                sender=N8NDispatchService,
+                document=dispatch.document,
+                webhook_url=dispatch.webhook_url,
+                error=error
+            )
+
+    @staticmethod
+    def _owned(dispatches: List[N8NDispatch]):
+        """Envíos de la lista que siguen tomados con el mismo `claim_token`."""
+        owned = Q(pk__in=[])
+        for dispatch in dispatches:
+            owned |= Q(id=dispatch.id, claim_token=dispatch.claim_token)
+        return N8NDispatch.objects.filter(owned)
+
+    def _lock_owned(self, dispatches: List[N8NDispatch]) -> List[N8NDispatch]:
+        """
+        Bloquea los envíos que siguen siendo de este worker y los devuelve; los
+        demás se descartan. Debe llamarse dentro de una transacción.
+        """
+        owned_ids = set(self._owned(dispatches).select_for_update().values_list('id', flat=True))
+        lost = [dispatch for dispatch in dispatches if dispatch.id not in owned_ids]
+        if lost:
+            self._claim_lost(lost)
+        return [dispatch for dispatch in dispatches if dispatch.id in owned_ids]
+
+    def _save_owned(self, dispatch: N8NDispatch, fields: List[str]) -> bool:
+        """
+        Guarda `fields` del envío si sigue tomado por este worker.
+
+        Returns:
+            False si otro worker lo retomó (no se escribió nada)
+        """
+        if self._owned([dispatch]).update(**{field: getattr(dispatch, field) for field in fields}):
+            return True
+        self._claim_lost([dispatch])
+        return False
+
+    @staticmethod
+    def _claim_lost(dispatches: List[N8NDispatch]) -> None:
+        logger.warning(
+            'Envíos a N8N %s retomados por otro worker; se descarta el resultado',
+            ', '.join(str(dispatch.id) for dispatch in dispatches)
+        )
+
+    def _apply_failure(self, dispatch: N8NDispatch, error: Exception) -> bool:
+        """
+        Registra un intento fallido en el envío (sin guardarlo).
+
+        Returns:
+            True si el envío agotó sus intentos
+        """
+        dispatch.attempts += 1
+        dispatch.last_error = str(error)
+
+        if dispatch.attempts >= dispatch.max_attempts:
+            dispatch.status = N8NDispatchStatus.DEAD
+            return True
+
+        dispatch.status = N8NDispatchStatus.PENDING
+        dispatch.next_attempt_at = timezone.now() + self.backoff(dispatch.attempts)
+        return False
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        """Espera antes del siguiente intento: base * 2^(intentos-1), con jitter y tope."""
+        delay = min(
+            settings.N8N_DISPATCH_BACKOFF_BASE * (2 ** (attempts - 1)),
+            settings.N8N_DISPATCH_BACKOFF_MAX
+        )
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
 class DocumentValidationService:
     """
     Service for document validation business logic.
     Uses signals for event-driven architecture.
     """
 
+    @staticmethod
+    def create_validation_log(document: Document, action: str, new_status: str,
+                              performed_by: str, reason: str,
+                              previous_status: Optional[str] = None,
+                              metadata: Optional[Dict] = None) -> DocumentValidationLog:
+        """
+        Registra una entrada en el log de auditoría.
+
+        Dentro de una transacción la entrada se escribe al hacer commit, junto
+        con las demás del mismo bloque, en un solo INSERT.
+
+        Args:
+            document: Documento
+            action: Acción realizada (DocumentAction)
+            new_status: Estado resultante
+            performed_by: Usuario o sistema que realizó la acción
+            reason: Razón de la acción
+            previous_status: Estado anterior
+            metadata: Metadatos adicionales
+
+        Returns:
+            Entrada del log
+        """
+        return audit.record(
+            document=document,
+            action=action,
+            previous_status=previous_status,
+            new_status=new_status,
+            reason=reason,
+            performed_by=performed_by,
+            metadata=metadata or {}
+        )
+
     @staticmethod
     def approve_document(document: Document, reason: str, performed_by: str) -> Document:
         """
@@ -278,3 +846,220 @@ class DocumentValidationService:
         )
 
         return document
+
+    @staticmethod
+    def process_n8n_callbacks_bulk(items: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Aplica muchos resultados de N8N con un solo UPDATE (solo sobre documentos
+        pendientes) y un solo insert de logs.
+
+        Args:
+            items: Lista de {document_id, status, reason, metadata}
+
+        Returns:
+            Resultado por item, en el mismo orden: applied, already_processed o not_found
+        """
+        results = {}
+        for item in items:
+            document_id = str(item['document_id'])
+            if document_id in results:
+                continue
+            new_status = (
+                ValidationStatus.APPROVED if item['status'] == N8NStatus.APPROVED
+                else ValidationStatus.REJECTED
+            )
+            results[document_id] = {
+                'document_id': document_id,
+                'new_status': new_status,
+                'reason': item['reason'],
+                'metadata': item.get('metadata') or {}
+            }
+
+        with transaction.atomic():
+            applied = set(DocumentRepository.apply_validation_results(
+                [(r['document_id'], r['new_status'], r['reason']) for r in results.values()],
+                validated_at=timezone.now()
+            ))
+            existing = applied | {
+                str(document_id) for document_id in Document.objects.filter(
+                    id__in=[document_id for document_id in results if document_id not in applied]
+                ).values_list('id', flat=True)
+            }
+
+            # Observers write all log rows with one insert
+            documents_n8n_callbacks_received.send(
+                sender=DocumentValidationService,
+                results=[results[document_id] for document_id in results if document_id in applied]
+            )
+
+        outcomes = []
+        seen = set()
+        for item in items:
+            document_id = str(item['document_id'])
+            if document_id not in existing:
+                outcome = N8NCallbackOutcome.NOT_FOUND
+            elif document_id in applied and document_id not in seen:
+                outcome = N8NCallbackOutcome.APPLIED
+            else:
+                outcome = N8NCallbackOutcome.ALREADY_PROCESSED
+            seen.add(document_id)
+            outcomes.append({'document_id': document_id, 'outcome': outcome})
+        return outcomes
+
+
+class ValidationJobService:
+    """
+    Asynchronous bulk validation for companies too large to validate within
+    an HTTP request.
+
+    `submit` creates a `ValidationJob`, or returns the active job of an
+    identical request; `process_validation_jobs` workers run it in chunks of
+    `VALIDATION_JOB_CHUNK_SIZE` entities, saving results and progress after
+    each chunk.
+    """
+
+    @staticmethod
+    def fingerprint(company_id, entity_type: str, entity_ids: Optional[List[str]],
+                    force_refresh: bool, data_version: int) -> str:
+        """Llave de una solicitud: iguales argumentos, día y versión de los datos."""
+        key = '|'.join([
+            str(company_id),
+            entity_type,
+            ','.join(entity_ids) if entity_ids else '*',
+            '1' if force_refresh else '0',
+            str(data_version),
+            timezone.localdate().isoformat(),
+        ])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def submit(cls, company_id, entity_type: str, entity_ids: Optional[List] = None,
+               force_refresh: bool = False) -> Tuple[ValidationJob, bool]:
+        """
+        Crea un job de validación masiva, o devuelve el job activo de una
+        solicitud idéntica.
+
+        Returns:
+            (job, True si se creó)
+        """
+        entity_ids = sorted({str(entity_id) for entity_id in entity_ids}) if entity_ids else None
+        compliance.track(company_id, entity_type)
+        data_version = compliance.data_version(company_id, entity_type)
+        fingerprint = cls.fingerprint(company_id, entity_type, entity_ids, force_refresh, data_version)
+
+        active = ValidationJob.objects.filter(fingerprint=fingerprint, status__in=ValidationJobStatus.ACTIVE)
+        job = active.first()
+        if job is not None:
+            return job, False
+        try:
+            with transaction.atomic():
+                job = ValidationJob.objects.create(
+                    company_id=company_id,
+                    entity_type=entity_type,
+                    entity_ids=entity_ids,
+                    force_refresh=force_refresh,
+                    data_version=data_version,
+                    fingerprint=fingerprint
+                )
+            return job, True
+        except IntegrityError:
+            # Otra solicitud idéntica lo creó primero
+            return active.get(), False
+
+    @staticmethod
+    def claim() -> Optional[ValidationJob]:
+        """
+        Toma el job pendiente más antiguo, o uno en ejecución cuyo worker no
+        avanza hace más de `VALIDATION_JOB_CLAIM_TIMEOUT` segundos (se reinicia).
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.VALIDATION_JOB_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            job = ValidationJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ValidationJobStatus.PENDING)
+                | Q(status=ValidationJobStatus.RUNNING, claimed_at__lt=stale)
+            ).order_by('created_at').first()
+            if job is None:
+                return None
+
+            job.results.all().delete()
+            job.status = ValidationJobStatus.RUNNING
+            job.claimed_at = now
+            # Un worker anterior que siga corriendo ya no coincide con el token
+            job.claim_token = uuid.uuid4()
+            job.started_at = job.started_at or now
+            job.processed_entities = 0
+            job.total_errors = 0
+            job.save(update_fields=[
+                'status', 'claimed_at', 'claim_token', 'started_at', 'processed_entities', 'total_errors'
+            ])
+        return job
+
+    @staticmethod
+    def run(job: ValidationJob) -> ValidationJob:
+        """
+        Valida las entidades del job por grupos y guarda resultados y progreso
+        después de cada grupo.
+
+        Todas las escrituras filtran por el `claim_token` de la toma: si otro
+        worker retomó el job (ver `claim`), este se detiene sin escribir más.
+
+        Returns:
+            El job completado o fallido, o como lo dejó el worker que lo retomó
+        """
+        owned = ValidationJob.objects.filter(id=job.id, claim_token=job.claim_token)
+        try:
+            entity_ids = list(
+                compliance.target_entities(job.company_id, job.entity_type, job.entity_ids)
+                .order_by('entity_code').values_list('id', flat=True)
+            )
+            if not owned.update(total_entities=len(entity_ids)):
+                return ValidationJobService._claim_lost(job)
+
+            chunk_size = settings.VALIDATION_JOB_CHUNK_SIZE
+            for start in range(0, len(entity_ids), chunk_size):
+                chunk = entity_ids[start:start + chunk_size]
+                compliance.refresh_stale(job.company_id, job.entity_type, chunk, force=job.force_refresh)
+                with transaction.atomic():
+                    # Con la fila bloqueada, claim (skip_locked) no la retoma a mitad del grupo
+                    if not list(owned.select_for_update().values_list('id', flat=True)):
+                        return ValidationJobService._claim_lost(job)
+                    results = ValidationJobResult.objects.bulk_create([
+                        ValidationJobResult(job=job, **error)
+                        for error in compliance.errors_for([job.company_id], [job.entity_type], chunk)
+                        .values(*compliance.ERROR_FIELDS)
+                    ])
+                    owned.update(
+                        processed_entities=F('processed_entities') + len(chunk),
+                        total_errors=F('total_errors') + len(results),
+                        claimed_at=timezone.now()
+                    )
+
+            status, error = ValidationJobStatus.COMPLETED, ''
+        except Exception as e:
+            logger.exception('Validation job %s failed', job.id)
+            status, error = ValidationJobStatus.FAILED, str(e)
+
+        if not owned.update(status=status, error=error, finished_at=timezone.now()):
+            return ValidationJobService._claim_lost(job)
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def _claim_lost(job: ValidationJob) -> ValidationJob:
+        logger.warning('Validation job %s was claimed by another worker; stopping', job.id)
+        job.refresh_from_db()
+        return job
+
+    def process_next(self) -> bool:
+        """
+        Toma y ejecuta un job.
+
+        Returns:
+            True si había un job para ejecutar
+        """
+        job = self.claim()
+        if job is None:
+            return False
+        self.run(job)
+        return True
@@ -1,10 +1,17 @@
 """
 Django signals for Document Management System.
 Implements the Observer pattern for document events.
+
+Audit receivers write through `audit`, which batches the rows of a transaction
+into one INSERT at commit time. Compliance receivers mark the entities whose
+stored validation errors (`compliance`) must be recomputed.
 """
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import Signal, receiver
 from django.utils import timezone
-from .models import Document, DocumentValidationLog
+from apps.entities.models import Entity
+from . import audit, compliance, validation_cache
+from .models import Document, DocumentType, DocumentValidationLog, ValidationRule
 from .constants import DocumentAction, ValidationStatus
 
 # Define custom signals
@@ -12,13 +19,16 @@ document_uploaded = Signal()
 document_approved = Signal()
 document_rejected = Signal()
 document_n8n_sent = Signal()
+documents_n8n_batch_sent = Signal()
 document_n8n_callback_received = Signal()
+documents_n8n_callbacks_received = Signal()
+n8n_circuit_state_changed = Signal()
 
 
 @receiver(document_uploaded)
 def log_document_upload(sender, document, performed_by, reason, **kwargs):
     """Log when a document is uploaded."""
-    DocumentValidationLog.objects.create(
+    audit.record(
         document=document,
         action=DocumentAction.UPLOADED,
         previous_status=None,
@@ -34,7 +44,7 @@ def log_document_approval(sender, document, performed_by, reason, **kwargs):
     """Log when a document is approved."""
     previous_status = document.validation_status
 
-    DocumentValidationLog.objects.create(
+    audit.record(
         document=document,
         action=DocumentAction.APPROVED,
         previous_status=previous_status,
@@ -50,7 +60,7 @@ def log_document_rejection(sender, document, performed_by, reason, **kwargs):
     """Log when a document is rejected."""
     previous_status = document.validation_status
 
-    DocumentValidationLog.objects.create(
+    audit.record(
         document=document,
         action=DocumentAction.REJECTED,
         previous_status=previous_status,
@@ -62,32 +72,48 @@ def log_document_rejection(sender, document, performed_by, reason, **kwargs):
 
 
 @receiver(document_n8n_sent)
-def log_n8n_sent(sender, document, webhook_url, **kwargs):
-    """Log when a document is sent to N8N."""
-    DocumentValidationLog.objects.create(
+def log_n8n_sent(sender, document, webhook_url, error=None, **kwargs):
+    """Log when a document is sent to N8N, or when sending it failed."""
+    if error:
+        reason = f'Error al enviar a N8N: {str(error)}'
+        metadata = {'webhook_url': webhook_url, 'error': str(error)}
+    else:
+        reason = 'Documento enviado a N8N para validación'
+        metadata = {'webhook_url': webhook_url}
+
+    audit.record(
         document=document,
         action=DocumentAction.N8N_SENT,
         previous_status=document.validation_status,
         new_status=ValidationStatus.PENDING,
-        reason='Documento enviado a N8N para validación',
+        reason=reason,
         performed_by='system',
-        metadata={'webhook_url': webhook_url}
+        metadata=metadata
     )
 
 
-@receiver(document_n8n_sent)
-def handle_n8n_send_failure(sender, document, error, **kwargs):
-    """Log when N8N send fails."""
+@receiver(documents_n8n_batch_sent)
+def log_n8n_batch_sent(sender, documents, webhook_url, error, **kwargs):
+    """Log the documents sent to N8N in one batch."""
     if error:
-        DocumentValidationLog.objects.create(
+        reason = f'Error al enviar a N8N: {str(error)}'
+        metadata = {'webhook_url': webhook_url, 'error': str(error), 'batch_size': len(documents)}
+    else:
+        reason = 'Documento enviado a N8N para validación'
+        metadata = {'webhook_url': webhook_url, 'batch_size': len(documents)}
+
+    audit.record_many([
+        DocumentValidationLog(
             document=document,
             action=DocumentAction.N8N_SENT,
             previous_status=document.validation_status,
             new_status=ValidationStatus.PENDING,
-            reason=f'Error al enviar a N8N: {str(error)}',
+            reason=reason,
             performed_by='system',
-            metadata={'error': str(error)}
+            metadata=metadata
         )
+        for document in documents
+    ])
 
 
 @receiver(document_n8n_callback_received)
@@ -96,7 +122,7 @@ def log_n8n_callback(sender, document, status, reason, metadata, **kwargs):
     previous_status = document.validation_status
     new_status = ValidationStatus.APPROVED if status == 'approved' else ValidationStatus.REJECTED
 
-    DocumentValidationLog.objects.create(
+    audit.record(
         document=document,
         action=DocumentAction.N8N_CALLBACK,
         previous_status=previous_status,
@@ -107,6 +133,97 @@ def log_n8n_callback(sender, document, status, reason, metadata, **kwargs):
     )
 
 
+@receiver(documents_n8n_callbacks_received)
+def log_n8n_callbacks(sender, results, **kwargs):
+    """Log the N8N callbacks applied in bulk."""
+    audit.record_many([
+        DocumentValidationLog(
+            document_id=result['document_id'],
+            action=DocumentAction.N8N_CALLBACK,
+            previous_status=ValidationStatus.PENDING,
+            new_status=result['new_status'],
+            reason=result['reason'],
+            performed_by='n8n',
+            metadata=result['metadata'] or {}
+        )
+        for result in results
+    ])
+
+
+@receiver(pre_save, sender=Document)
+def remember_document_owner(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored entity and company so moving a document also refreshes the ones it leaves."""
+    instance._previous_owner = None
+    if instance._state.adding:
+        return
+    # Los cambios de estado guardan con update_fields y no mueven el documento
+    if update_fields is not None and not {'entity', 'entity_id', 'company', 'company_id'} & set(update_fields):
+        return
+    instance._previous_owner = Document.objects.filter(pk=instance.pk).values_list(
+        'entity_id', 'company_id'
+    ).first()
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def mark_document_entity_stale(sender, instance, **kwargs):
+    """A document change affects the compliance of its entity, and of the one it moved from."""
+    previous_entity_id, previous_company_id = getattr(instance, '_previous_owner', None) or (None, None)
+    compliance.mark_stale({instance.entity_id, previous_entity_id} - {None})
+    validation_cache.bump_on_commit({instance.company_id, previous_company_id} - {None})
+
+
+@receiver(documents_n8n_callbacks_received)
+def mark_n8n_callback_entities_stale(sender, results, **kwargs):
+    """Bulk callbacks update documents without post_save."""
+    if results:
+        documents = Document.objects.filter(id__in=[result['document_id'] for result in results])
+        compliance.mark_stale(documents.values('entity_id'))
+        validation_cache.bump_on_commit(documents.values_list('company_id', flat=True).distinct())
+
+
+@receiver(pre_save, sender=Entity)
+def remember_entity_company(sender, instance, **kwargs):
+    """Keep the stored company so moving an entity also bumps the company it leaves."""
+    instance._previous_company_id = None if instance._state.adding else (
+        Entity.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Entity)
+@receiver(post_delete, sender=Entity)
+def bump_entity_company_version(sender, instance, **kwargs):
+    """Creating, updating or deleting an entity changes its company's validation results."""
+    validation_cache.bump_on_commit(
+        {instance.company_id, getattr(instance, '_previous_company_id', None)} - {None}
+    )
+
+
+@receiver(post_save, sender=Entity)
+def mark_entity_stale(sender, instance, created, **kwargs):
+    """Mark an updated entity and drop rows that no longer apply to it."""
+    if created:
+        return
+    compliance.mark_stale([instance.pk])
+    compliance.discard_outdated_rows(instance)
+
+
+@receiver(post_save, sender=DocumentType)
+@receiver(post_delete, sender=DocumentType)
+def mark_document_type_entities_stale(sender, instance, **kwargs):
+    """Mandatory and date rules of a document type apply to every entity of its type."""
+    compliance.mark_entity_type_stale(instance.entity_type)
+    validation_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=ValidationRule)
+@receiver(post_delete, sender=ValidationRule)
+def mark_validation_rule_entities_stale(sender, instance, **kwargs):
+    """A validation rule applies to every entity of its type."""
+    compliance.mark_entity_type_stale(instance.entity_type)
+    validation_cache.bump_on_commit()
+
+
 # Future: Add more signal handlers as needed
 # Example:
 # @receiver(document_approved)
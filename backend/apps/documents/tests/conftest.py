@@ -0,0 +1,22 @@
+"""
+Shared fixtures for document tests.
+"""
+import pytest
+from django.core.cache import cache
+from apps.documents.clients import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_client_registry():
+    """Ensure every test builds its own external clients."""
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with closed N8N circuit breakers."""
+    cache.clear()
+    yield
+    cache.clear()
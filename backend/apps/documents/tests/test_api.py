@@ -1,17 +1,27 @@
 """
 API tests for Document endpoints.
 """
+import csv
+import io
+import json
 import pytest
 from io import BytesIO
 from datetime import date, timedelta
 from unittest.mock import patch, Mock
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from apps.documents.models import Document, DocumentValidationLog
+from apps.documents.models import (
+    Document, DocumentValidationLog, N8NDispatch, EntityComplianceStatus, ValidationJobResult
+)
+from apps.documents.services import ValidationJobService
+from apps.entities.models import Entity
 from .factories import (
     CompanyFactory, EntityFactory, DocumentTypeFactory,
-    DocumentFactory
+    DocumentFactory, DocumentValidationLogFactory
 )
 
 
@@ -49,6 +59,63 @@ class TestDocumentTypeAPI:
         assert response.data['code'] == 'SOAT'
 
 
+    def test_n8n_circuits(self, api_client):
+        """Test the circuit breaker state of each configured webhook is listed."""
+        DocumentTypeFactory(uses_n8n_workflow=True, n8n_webhook_url='http://n8n.local/webhook/a')
+        DocumentTypeFactory(uses_n8n_workflow=True, n8n_webhook_url='http://n8n.local/webhook/a')
+        DocumentTypeFactory(uses_n8n_workflow=False)
+
+        response = api_client.get(reverse('document-type-n8n-circuits'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]['webhook_url'] == 'http://n8n.local/webhook/a'
+        assert response.data[0]['state'] == 'closed'
+
+
+@pytest.mark.django_db
+class TestValidationRuleAPI:
+    def test_create_validation_rule(self, api_client):
+        """Test creating a rule marks the entities of its type for recomputation."""
+        doc_type = DocumentTypeFactory(code='SOAT', entity_type='vehicle')
+        entity = EntityFactory(entity_type='vehicle')
+        state = EntityComplianceStatus.objects.create(entity=entity)
+
+        response = api_client.post(reverse('validation-rule-list'), {
+            'name': 'SOAT por vencer en 15 días',
+            'entity_type': 'vehicle',
+            'document_type': str(doc_type.id),
+            'kind': 'date_offset',
+            'date_field': 'expiration_date',
+            'operator': 'before',
+            'offset_days': 15,
+            'statuses': ['A'],
+            'error_type': 'soat_due',
+            'message': 'SOAT vence el {date}',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['statuses'] == ['A']
+        state.refresh_from_db()
+        assert state.version == 2
+
+    def test_validation_rule_requires_fields_of_its_kind(self, api_client):
+        """Test each kind of rule validates its own fields."""
+        doc_type = DocumentTypeFactory(entity_type='employee')
+        url = reverse('validation-rule-list')
+        base = {'name': 'Regla', 'entity_type': 'vehicle', 'error_type': 'custom', 'message': 'Falta {key}'}
+
+        no_statuses = api_client.post(url, {**base, 'kind': 'status_in'}, format='json')
+        wrong_type = api_client.post(url, {
+            **base, 'kind': 'status_in', 'document_type': str(doc_type.id), 'statuses': ['R'],
+        }, format='json')
+        metadata = api_client.post(url, {**base, 'kind': 'metadata_required', 'metadata_keys': ['vin']}, format='json')
+
+        assert no_statuses.status_code == status.HTTP_400_BAD_REQUEST
+        assert wrong_type.status_code == status.HTTP_400_BAD_REQUEST
+        assert metadata.status_code == status.HTTP_201_CREATED
+
+
 @pytest.mark.django_db
 class TestDocumentAPI:
     def test_list_documents(self, api_client):
@@ -61,6 +128,275 @@ class TestDocumentAPI:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) == 5
 
+    def test_list_documents_is_flat(self, api_client, django_assert_num_queries):
+        """Test que el listado no anida relaciones ni logs por defecto."""
+        for document in DocumentFactory.create_batch(5):
+            DocumentValidationLogFactory.create_batch(3, document=document)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('document-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        row = response.data['results'][0]
+        for field in ('company_detail', 'entity_detail', 'document_type_detail', 'validation_logs'):
+            assert field not in row
+        assert row['validation_status_display'] == 'Pendiente'
+
+    def test_list_documents_expand(self, api_client, django_assert_num_queries):
+        """Test que ?expand= agrega relaciones y logs sin consultas por fila."""
+        for document in DocumentFactory.create_batch(3):
+            DocumentValidationLogFactory.create_batch(2, document=document)
+
+        with django_assert_num_queries(2):
+            response = api_client.get(reverse('document-list'), {'expand': 'entity,logs'})
+
+        assert response.status_code == status.HTTP_200_OK
+        row = response.data['results'][0]
+        assert row['entity_detail']['company_detail']['id'] == str(row['entity_detail']['company'])
+        assert len(row['validation_logs']) == 2
+        assert 'document_type_detail' not in row
+
+    def test_list_documents_invalid_expand(self, api_client):
+        """Test valor de expand no permitido."""
+        response = api_client.get(reverse('document-list'), {'expand': 'owner'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_retrieve_document_limits_logs(self, api_client, settings):
+        """Test que el detalle incluye solo los logs más recientes."""
+        settings.DOCUMENT_DETAIL_LOG_LIMIT = 2
+        document = DocumentFactory()
+        logs = DocumentValidationLogFactory.create_batch(4, document=document)
+        for days, log in enumerate(reversed(logs)):
+            DocumentValidationLog.objects.filter(id=log.id).update(
+                created_at=timezone.now() - timedelta(days=days)
+            )
+
+        response = api_client.get(reverse('document-detail', kwargs={'pk': document.id}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['company_detail']['id'] == str(document.company_id)
+        assert [log['id'] for log in response.data['validation_logs']] == [
+            str(logs[-1].id), str(logs[-2].id)
+        ]
+
+    def test_list_documents_sparse_fields(self, api_client):
+        """Test que ?fields= recorta la respuesta y las columnas consultadas."""
+        DocumentFactory.create_batch(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse('document-list'), {
+                'fields': 'id,validation_status,expiration_date'
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'validation_status', 'expiration_date'}
+        assert len(queries) == 1
+        assert 's3_key' not in queries[0]['sql']
+        assert 'file_name' not in queries[0]['sql']
+
+    def test_list_documents_omit_fields(self, api_client):
+        """Test que ?omit= quita campos."""
+        DocumentFactory()
+
+        response = api_client.get(reverse('document-list'), {'omit': 's3_bucket,s3_key,s3_region'})
+
+        assert response.status_code == status.HTTP_200_OK
+        row = response.data['results'][0]
+        assert 's3_key' not in row
+        assert 'file_name' in row
+
+    def test_sparse_fields_drop_unused_relations(self, api_client, django_assert_num_queries):
+        """Test que los prefetch y joins que no se piden no se ejecutan."""
+        for document in DocumentFactory.create_batch(2):
+            DocumentValidationLogFactory(document=document)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('document-list'), {
+                'expand': 'entity,logs', 'fields': 'id,entity_detail'
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'entity_detail'}
+
+    def test_retrieve_document_sparse_fields(self, api_client):
+        """Test ?fields= en el detalle."""
+        document = DocumentFactory()
+        DocumentValidationLogFactory(document=document)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(
+                reverse('document-detail', kwargs={'pk': document.id}),
+                {'fields': 'id,validation_logs'}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['validation_logs']) == 1
+        assert 'companies' not in queries[0]['sql']
+
+    def test_sparse_fields_unknown_field(self, api_client):
+        """Test campo inexistente en ?fields=."""
+        response = api_client.get(reverse('document-list'), {'fields': 'id,password'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_entities_sparse_fields(self, api_client):
+        """Test que ?fields= también aplica a entidades."""
+        EntityFactory.create_batch(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse('entity-list'), {'fields': 'id,entity_code'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'entity_code'}
+        assert 'JOIN' not in queries[0]['sql']
+
+    def test_list_documents_include(self, api_client, django_assert_num_queries):
+        """Test que ?include= entrega cada relación una sola vez en `included`."""
+        company = CompanyFactory()
+        entity = EntityFactory(company=company)
+        doc_type = DocumentTypeFactory(entity_type=entity.entity_type)
+        DocumentFactory.create_batch(4, company=company, entity=entity, document_type=doc_type)
+
+        with django_assert_num_queries(4):
+            response = api_client.get(reverse('document-list'), {
+                'include': 'company,entity,document_type'
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'results' not in response.data
+        assert len(response.data['data']) == 4
+        row = response.data['data'][0]
+        assert 'company_detail' not in row
+        assert row['entity'] == entity.id
+        included = response.data['included']
+        assert list(included['companies']) == [str(company.id)]
+        assert list(included['entities']) == [str(entity.id)]
+        assert 'company_detail' not in included['entities'][str(entity.id)]
+        assert list(included['document_types']) == [str(doc_type.id)]
+
+    def test_list_documents_include_with_sparse_fields(self, api_client, django_assert_num_queries):
+        """Test que ?include= funciona aunque ?fields= omita la llave foránea."""
+        DocumentFactory.create_batch(2)
+
+        with django_assert_num_queries(2):
+            response = api_client.get(reverse('document-list'), {
+                'include': 'company', 'fields': 'id'
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['data'][0]) == {'id'}
+        assert len(response.data['included']['companies']) == 2
+
+    def test_search_documents(self, api_client):
+        """Test búsqueda por nombre de archivo y código de entidad."""
+        entity = EntityFactory(entity_code='XYZ987')
+        match = DocumentFactory(entity=entity, file_name='soat.pdf')
+        DocumentFactory(file_name='licencia.pdf')
+
+        response = api_client.get(reverse('document-list'), {'search': 'xyz98'})
+        assert [row['id'] for row in response.data['results']] == [str(match.id)]
+
+        response = api_client.get(reverse('document-list'), {'search': 'soat'})
+        assert [row['id'] for row in response.data['results']] == [str(match.id)]
+
+    def test_export_documents_ndjson(self, api_client):
+        """Test export NDJSON con los filtros del listado."""
+        company = CompanyFactory()
+        entity = EntityFactory(company=company, entity_code='ABC123')
+        DocumentFactory.create_batch(3, company=company, entity=entity)
+        DocumentFactory()
+
+        response = api_client.get(reverse('document-export'), {'company': str(company.id)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'attachment' in response['Content-Disposition']
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        assert len(rows) == 3
+        assert {row['company'] for row in rows} == {str(company.id)}
+        assert rows[0]['entity_code'] == 'ABC123'
+
+    def test_export_documents_csv(self, api_client):
+        """Test export CSV."""
+        DocumentFactory.create_batch(2, file_name='soat.pdf', issue_date=None)
+
+        response = api_client.get(reverse('document-export'), {'output': 'csv'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert len(rows) == 2
+        assert rows[0]['file_name'] == 'soat.pdf'
+        assert rows[0]['issue_date'] == ''
+
+    def test_export_documents_invalid_output(self, api_client):
+        """Test formato de export no soportado."""
+        response = api_client.get(reverse('document-export'), {'output': 'xlsx'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] is True
+
+    def test_list_documents_cursor_pagination(self, api_client):
+        """Test que el cursor recorre todos los documentos, incluso con fechas iguales."""
+        documents = DocumentFactory.create_batch(5)
+        Document.objects.update(uploaded_at=timezone.now())
+
+        seen = []
+        pages = []
+        url = reverse('document-list') + '?page_size=2'
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            pages.append(response.data)
+            seen.extend(document['id'] for document in response.data['results'])
+            url = response.data['next']
+
+        assert sorted(seen) == sorted(str(document.id) for document in documents)
+        assert len(pages) == 3
+        assert pages[0]['previous'] is None
+
+        previous = api_client.get(pages[1]['previous'])
+        assert previous.data['results'] == pages[0]['results']
+
+    def test_list_documents_page_number_pagination(self, api_client):
+        """Test que ?page= sigue usando paginación por número de página."""
+        DocumentFactory.create_batch(3)
+
+        response = api_client.get(reverse('document-list'), {'page': 1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 3
+
+    def test_list_documents_invalid_cursor(self, api_client):
+        """Test cursor inválido."""
+        response = api_client.get(reverse('document-list'), {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_list_documents_cursor_rejects_other_ordering(self, api_client):
+        """Test que el cursor solo admite el orden por fecha de carga."""
+        response = api_client.get(reverse('document-list'), {
+            'pagination': 'cursor', 'ordering': 'file_name'
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.get(reverse('document-list'), {'ordering': 'file_name'})
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' in response.data
+
+    def test_list_document_types_cursor_on_request(self, api_client):
+        """Test que ?pagination=cursor está disponible en los demás listados."""
+        DocumentTypeFactory.create_batch(3)
+
+        response = api_client.get(reverse('document-type-list'), {'pagination': 'cursor', 'page_size': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is not None
+
     @patch('apps.documents.views.S3Service')
     def test_upload_document(self, mock_s3_service, api_client):
         """Test uploading a document."""
@@ -104,6 +440,304 @@ class TestDocumentAPI:
         assert 'id' in response.data
         assert response.data['status'] == 'P'
 
+    @patch('apps.documents.services.requests.post')
+    @patch('apps.documents.views.S3Service')
+    def test_upload_enqueues_n8n_dispatch(self, mock_s3_service, mock_post, api_client):
+        """Test the upload queues the N8N dispatch instead of calling the webhook."""
+        mock_s3_service.return_value.upload_file.return_value = {
+            's3_bucket': 'test-bucket',
+            's3_key': 'test/key.pdf',
+            's3_region': 'us-east-1',
+            'file_name': 'test.pdf',
+            'file_size': 1024,
+            'mime_type': 'application/pdf'
+        }
+        company = CompanyFactory()
+        entity = EntityFactory(company=company, entity_type='vehicle')
+        doc_type = DocumentTypeFactory(
+            entity_type='vehicle',
+            uses_n8n_workflow=True,
+            n8n_webhook_url='http://n8n.local/webhook/validate'
+        )
+        test_file = BytesIO(b'PDF content here')
+        test_file.name = 'test.pdf'
+
+        response = api_client.post(reverse('document-upload'), {
+            'company_id': str(company.id),
+            'entity_id': str(entity.id),
+            'document_type_id': str(doc_type.id),
+            'file': test_file
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['n8n_triggered'] is True
+        dispatch = N8NDispatch.objects.get(document_id=response.data['id'])
+        assert dispatch.status == 'pending'
+        assert dispatch.webhook_url == 'http://n8n.local/webhook/validate'
+        mock_post.assert_not_called()
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_compensates_s3_when_db_fails(self, mock_s3_service, api_client):
+        """Test the S3 file is discarded when the document cannot be created."""
+        mock_s3 = Mock()
+        mock_s3.upload_file.return_value = {
+            's3_bucket': 'test-bucket',
+            's3_key': 'test/key.pdf',
+            's3_region': 'us-east-1',
+            'file_name': 'test.pdf',
+            'file_size': 1024,
+            'mime_type': 'application/pdf'
+        }
+        mock_s3_service.return_value = mock_s3
+
+        with patch('apps.documents.views.Document.objects.create', side_effect=Exception('DB down')):
+            response = api_client.post(reverse('document-upload'), self._upload_form(), format='multipart')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        mock_s3.discard_file.assert_called_once()
+        assert mock_s3.discard_file.call_args.args[0] == 'test/key.pdf'
+
+    @patch('apps.documents.clients.boto3.client')
+    def test_upload_document_streaming_to_s3(self, mock_boto_client, api_client, settings):
+        """Test uploads are streamed to S3 without being re-uploaded."""
+        settings.S3_STREAMING_UPLOADS = True
+        mock_s3 = Mock()
+        mock_s3.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_s3.upload_part.return_value = {'ETag': 'etag-1'}
+        mock_boto_client.return_value = mock_s3
+
+        company = CompanyFactory()
+        entity = EntityFactory(company=company, entity_type='vehicle')
+        doc_type = DocumentTypeFactory(entity_type='vehicle')
+        test_file = BytesIO(b'PDF content here')
+        test_file.name = 'test.pdf'
+
+        response = api_client.post(reverse('document-upload'), {
+            'company_id': str(company.id),
+            'entity_id': str(entity.id),
+            'document_type_id': str(doc_type.id),
+            'file': test_file,
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        document = Document.objects.get(id=response.data['id'])
+        assert document.s3_key.startswith(settings.S3_STREAMING_UPLOAD_PREFIX)
+        assert document.file_size == len(b'PDF content here')
+        mock_s3.complete_multipart_upload.assert_called_once()
+        mock_s3.upload_fileobj.assert_not_called()
+
+    @patch('apps.documents.clients.boto3.client')
+    def test_streamed_upload_discarded_on_validation_error(self, mock_boto_client, api_client, settings):
+        """Test a streamed file is removed from S3 when validation fails."""
+        settings.S3_STREAMING_UPLOADS = True
+        mock_s3 = Mock()
+        mock_s3.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_s3.upload_part.return_value = {'ETag': 'etag-1'}
+        mock_boto_client.return_value = mock_s3
+        test_file = BytesIO(b'PDF content here')
+        test_file.name = 'test.pdf'
+
+        response = api_client.post(reverse('document-upload'), {
+            'company_id': '00000000-0000-0000-0000-000000000000',
+            'entity_id': '00000000-0000-0000-0000-000000000000',
+            'document_type_id': '00000000-0000-0000-0000-000000000000',
+            'file': test_file,
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_s3.delete_object.assert_called_once()
+
+    def _upload_form(self, file_name='test.pdf', content=b'PDF content here'):
+        company = CompanyFactory()
+        entity = EntityFactory(company=company, entity_type='vehicle')
+        doc_type = DocumentTypeFactory(entity_type='vehicle')
+        test_file = BytesIO(content)
+        test_file.name = file_name
+        return {
+            'company_id': str(company.id),
+            'entity_id': str(entity.id),
+            'document_type_id': str(doc_type.id),
+            'file': test_file,
+        }
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_rejects_large_content_length(self, mock_s3_service, api_client, settings):
+        """Test uploads are rejected from Content-Length before reading the body."""
+        settings.DOCUMENT_MAX_UPLOAD_SIZE_MB = 1
+
+        response = api_client.post(
+            reverse('document-upload'), self._upload_form(), format='multipart',
+            CONTENT_LENGTH=str(50 * 1024 * 1024)
+        )
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        mock_s3_service.assert_not_called()
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_rejects_invalid_target_headers(self, mock_s3_service, api_client):
+        """Test company/entity/type headers are validated before the body."""
+        data = self._upload_form()
+        other_company = CompanyFactory()
+
+        response = api_client.post(
+            reverse('document-upload'), data, format='multipart',
+            HTTP_X_COMPANY_ID=str(other_company.id),
+            HTTP_X_ENTITY_ID=data['entity_id'],
+            HTTP_X_DOCUMENT_TYPE_ID=data['document_type_id'],
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'no pertenece' in response.json()['message']
+        mock_s3_service.assert_not_called()
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_rejects_file_type_on_part_header(self, mock_s3_service, api_client):
+        """Test the file part content type is rejected with 415."""
+        response = api_client.post(
+            reverse('document-upload'), self._upload_form(file_name='script.sh'), format='multipart'
+        )
+
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        mock_s3_service.return_value.upload_file.assert_not_called()
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_rejects_oversized_part(self, mock_s3_service, api_client, settings):
+        """Test the file part is rejected as soon as it exceeds the limit."""
+        settings.DOCUMENT_MAX_UPLOAD_SIZE_MB = 1
+        settings.DOCUMENT_UPLOAD_FORM_OVERHEAD_BYTES = 10 * 1024 * 1024
+
+        response = api_client.post(
+            reverse('document-upload'),
+            self._upload_form(content=b'x' * (2 * 1024 * 1024)),
+            format='multipart'
+        )
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        mock_s3_service.return_value.upload_file.assert_not_called()
+
+    def _upload_init_data(self, **overrides):
+        company = CompanyFactory()
+        entity = EntityFactory(company=company, entity_type='vehicle')
+        doc_type = DocumentTypeFactory(entity_type='vehicle', uses_n8n_workflow=False)
+        data = {
+            'company_id': str(company.id),
+            'entity_id': str(entity.id),
+            'document_type_id': str(doc_type.id),
+            'file_name': 'soat.pdf',
+            'file_size': 2048,
+            'mime_type': 'application/pdf',
+            'uploaded_by': 'test@example.com'
+        }
+        data.update(overrides)
+        return data
+
+    @patch('apps.documents.views.S3Service')
+    def test_upload_init_and_confirm(self, mock_s3_service, api_client,
+                                     django_capture_on_commit_callbacks):
+        """Test the direct-to-S3 two-phase upload."""
+        mock_s3 = Mock()
+        mock_s3.bucket_name = 'test-bucket'
+        mock_s3.region = 'us-east-1'
+        mock_s3.build_s3_key.return_value = 'companies/c/vehicles/e/SOAT.pdf'
+        mock_s3.generate_presigned_post.return_value = {
+            'url': 'https://test-bucket.s3.amazonaws.com/',
+            'fields': {'key': 'companies/c/vehicles/e/SOAT.pdf'}
+        }
+        mock_s3.get_file_metadata.return_value = {
+            'file_size': 2048,
+            'mime_type': 'application/pdf'
+        }
+        mock_s3_service.return_value = mock_s3
+
+        response = api_client.post(
+            reverse('document-upload-init'), self._upload_init_data(), format='json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['upload_url'] == 'https://test-bucket.s3.amazonaws.com/'
+        post_kwargs = mock_s3.generate_presigned_post.call_args.kwargs
+        assert post_kwargs['max_size'] == 2048
+        assert post_kwargs['mime_type'] == 'application/pdf'
+
+        upload_token = response.data['upload_token']
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                reverse('document-confirm'), {'upload_token': upload_token}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        document = Document.objects.get(id=response.data['id'])
+        assert document.s3_key == 'companies/c/vehicles/e/SOAT.pdf'
+        assert document.file_size == 2048
+        assert DocumentValidationLog.objects.filter(document=document, action='uploaded').exists()
+
+        # A second confirmation of the same upload is rejected
+        response = api_client.post(
+            reverse('document-confirm'), {'upload_token': upload_token}, format='json'
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    @patch('apps.documents.views.S3Service')
+    def test_concurrent_confirm_returns_conflict(self, mock_s3_service, api_client):
+        """Test a confirm that loses the race to another confirm of the same token gets 409."""
+        s3_key = 'companies/c/vehicles/e/SOAT.pdf'
+        mock_s3 = Mock()
+        mock_s3.bucket_name = 'test-bucket'
+        mock_s3.region = 'us-east-1'
+        mock_s3.build_s3_key.return_value = s3_key
+        mock_s3.generate_presigned_post.return_value = {'url': 'u', 'fields': {}}
+        mock_s3_service.return_value = mock_s3
+
+        init = api_client.post(reverse('document-upload-init'), self._upload_init_data(), format='json')
+
+        def head(key):
+            # La otra confirmación crea el documento después de la verificación previa
+            DocumentFactory(s3_key=key)
+            return {'file_size': 2048, 'mime_type': 'application/pdf'}
+
+        mock_s3.get_file_metadata.side_effect = head
+        response = api_client.post(
+            reverse('document-confirm'), {'upload_token': init.data['upload_token']}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert Document.objects.filter(s3_key=s3_key).count() == 1
+
+    def test_upload_init_rejects_invalid_file(self, api_client):
+        """Test upload-init validates declared size and type."""
+        url = reverse('document-upload-init')
+
+        response = api_client.post(url, self._upload_init_data(mime_type='text/x-sh'), format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(url, self._upload_init_data(file_size=50 * 1024 * 1024), format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch('apps.documents.views.S3Service')
+    def test_confirm_requires_object_in_s3(self, mock_s3_service, api_client):
+        """Test confirm fails when the file was never uploaded."""
+        mock_s3 = Mock()
+        mock_s3.build_s3_key.return_value = 'companies/c/vehicles/e/SOAT.pdf'
+        mock_s3.generate_presigned_post.return_value = {'url': 'u', 'fields': {}}
+        mock_s3.get_file_metadata.return_value = None
+        mock_s3_service.return_value = mock_s3
+
+        init = api_client.post(reverse('document-upload-init'), self._upload_init_data(), format='json')
+        response = api_client.post(
+            reverse('document-confirm'), {'upload_token': init.data['upload_token']}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Document.objects.count() == 0
+
+    def test_confirm_rejects_tampered_token(self, api_client):
+        """Test confirm rejects tokens not signed by upload-init."""
+        response = api_client.post(
+            reverse('document-confirm'), {'upload_token': 'not-a-token'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     def test_approve_document(self, api_client):
         """Test approving a document."""
         doc_type = DocumentTypeFactory(uses_n8n_workflow=False)
@@ -204,3 +838,461 @@ class TestDocumentAPI:
         response = api_client.post(url, data, format='json')
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_n8n_callback_bulk(self, api_client, django_assert_max_num_queries,
+                               django_capture_on_commit_callbacks):
+        """Test bulk N8N callback reports applied, already processed and not found."""
+        approved = DocumentFactory(validation_status='P')
+        rejected = DocumentFactory(validation_status='P')
+        processed = DocumentFactory(validation_status='A')
+        missing_id = '00000000-0000-0000-0000-000000000000'
+
+        data = {'results': [
+            {'document_id': str(approved.id), 'status': 'approved', 'reason': 'OK'},
+            {'document_id': str(rejected.id), 'status': 'rejected', 'reason': 'Vencido',
+             'metadata': {'confidence': 0.9}},
+            {'document_id': str(processed.id), 'status': 'rejected', 'reason': 'Tarde'},
+            {'document_id': missing_id, 'status': 'approved', 'reason': 'OK'},
+        ]}
+
+        # Incluye el UPDATE que marca las entidades para recalcular su cumplimiento
+        # y, al confirmar, las empresas afectadas y el incremento de su versión de datos
+        with django_assert_max_num_queries(10), django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(reverse('document-n8n-callback-bulk'), data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['outcome'] for item in response.data['results']] == [
+            'applied', 'applied', 'already_processed', 'not_found'
+        ]
+        assert response.data['applied'] == 2
+        approved.refresh_from_db()
+        rejected.refresh_from_db()
+        processed.refresh_from_db()
+        assert approved.validation_status == 'A'
+        assert rejected.validation_status == 'R'
+        assert rejected.validation_reason == 'Vencido'
+        assert processed.validation_status == 'A'
+        logs = DocumentValidationLog.objects.filter(action='n8n_callback')
+        assert logs.count() == 2
+        assert logs.get(document=rejected).metadata == {'confidence': 0.9}
+
+    def test_n8n_callback_bulk_requires_results(self, api_client):
+        """Test bulk N8N callback rejects an empty list."""
+        response = api_client.post(
+            reverse('document-n8n-callback-bulk'), {'results': []}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_validate_reads_stored_compliance_errors(self, api_client):
+        """Test que validate solo recalcula entidades con cambios y lee entity_compliance."""
+        company = CompanyFactory()
+        first = EntityFactory(company=company, entity_code='AAA111')
+        second = EntityFactory(company=company, entity_code='BBB222')
+
+        def compute(company_id, entity_type, entity_ids):
+            return [
+                {
+                    'entity_id': entity.id,
+                    'entity_code': entity.entity_code,
+                    'document_type_code': 'SOAT',
+                    'error_type': 'missing_mandatory',
+                    'error_message': 'Documento obligatorio faltante: SOAT',
+                }
+                for entity in (second, first) if str(entity.id) in map(str, entity_ids)
+            ]
+
+        url = reverse('document-validate')
+        payload = {'company_id': str(company.id), 'entity_type': 'vehicle'}
+        with patch('apps.documents.compliance.compute_errors', side_effect=compute) as compute_errors:
+            response = api_client.post(url, payload, format='json')
+            again = api_client.post(url, payload, format='json')
+            forced = api_client.post(url, {**payload, 'force_refresh': True}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['validated_entities'] == 2
+        assert response.data['total_errors'] == 2
+        assert [error['entity_code'] for error in response.data['errors']] == ['AAA111', 'BBB222']
+        assert set(response.data['errors'][0]) == {
+            'entity_id', 'entity_code', 'document_type_code', 'error_type', 'error_message'
+        }
+        assert again.data == response.data
+        assert forced.data == response.data
+        # Primera llamada y force_refresh; la segunda solo leyó la tabla
+        assert compute_errors.call_count == 2
+
+    def test_validate_cached_until_company_data_changes(self, api_client, django_capture_on_commit_callbacks):
+        """Test que validate reutiliza la respuesta hasta que cambian los datos de la empresa."""
+        company = CompanyFactory()
+        entity = EntityFactory(company=company)
+        doc_type = DocumentTypeFactory(entity_type='vehicle')
+        url = reverse('document-validate')
+        payload = {'company_id': str(company.id), 'entity_type': 'vehicle'}
+
+        with patch('apps.documents.views.compliance.refresh_stale_many') as refresh:
+            first = api_client.post(url, payload, format='json')
+            cached = api_client.post(url, payload, format='json')
+            summary = api_client.post(url + '?mode=summary', payload, format='json')
+            with django_capture_on_commit_callbacks(execute=True):
+                DocumentFactory(company=company, entity=entity, document_type=doc_type)
+            changed = api_client.post(url, payload, format='json')
+
+        assert first.status_code == cached.status_code == summary.status_code == status.HTTP_200_OK
+        assert cached.data == first.data
+        # Primera llamada, resumen (otra llave) y después de la escritura
+        assert refresh.call_count == 3
+        assert changed.status_code == status.HTTP_200_OK
+
+    def test_validate_filters_entity_ids(self, api_client):
+        """Test que validate con entity_ids solo devuelve esas entidades."""
+        company = CompanyFactory()
+        entity, other = EntityFactory.create_batch(2, company=company)
+
+        def compute(company_id, entity_type, entity_ids):
+            return [
+                {
+                    'entity_id': entity_id,
+                    'entity_code': 'X',
+                    'document_type_code': 'SOAT',
+                    'error_type': 'rejected',
+                    'error_message': 'Documento rechazado requiere reemplazo',
+                }
+                for entity_id in entity_ids
+            ]
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=compute):
+            response = api_client.post(reverse('document-validate'), {
+                'company_id': str(company.id),
+                'entity_type': 'vehicle',
+                'entity_ids': [str(entity.id)],
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [str(error['entity_id']) for error in response.data['errors']] == [str(entity.id)]
+
+    @staticmethod
+    def _compliance_errors(company_id, entity_type, entity_ids):
+        """fn_validate_documents_bulk simulada: 2 errores por entidad."""
+        errors = []
+        for entity in Entity.objects.filter(id__in=entity_ids):
+            errors.append({
+                'entity_id': entity.id, 'entity_code': entity.entity_code,
+                'document_type_code': 'SOAT', 'error_type': 'missing_mandatory',
+                'error_message': 'Documento obligatorio faltante: SOAT',
+            })
+            errors.append({
+                'entity_id': entity.id, 'entity_code': entity.entity_code,
+                'document_type_code': 'SOAT', 'error_type': 'rejected',
+                'error_message': 'Documento rechazado requiere reemplazo',
+            })
+        return errors
+
+    def test_validate_summary(self, api_client):
+        """Test que mode=summary devuelve conteos agregados."""
+        company = CompanyFactory()
+        EntityFactory.create_batch(3, company=company)
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=self._compliance_errors):
+            response = api_client.post(
+                reverse('document-validate') + '?mode=summary',
+                {'company_id': str(company.id), 'entity_type': 'vehicle'}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['validated_entities'] == 3
+        assert response.data['total_errors'] == 6
+        assert response.data['by_error_type'] == {'missing_mandatory': 3, 'rejected': 3}
+        assert response.data['by_document_type'] == {'SOAT': 6}
+        assert [row['total'] for row in response.data['by_entity']] == [2, 2, 2]
+        assert 'errors' not in response.data
+
+    def test_validate_streams_ndjson(self, api_client):
+        """Test que output=ndjson transmite un error por línea."""
+        company = CompanyFactory()
+        EntityFactory(company=company, entity_code='AAA111')
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=self._compliance_errors):
+            response = api_client.post(
+                reverse('document-validate') + '?output=ndjson',
+                {'company_id': str(company.id), 'entity_type': 'vehicle'}, format='json'
+            )
+            body = b''.join(response.streaming_content).decode()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert [line['error_type'] for line in lines] == ['missing_mandatory', 'rejected']
+        assert lines[0]['entity_code'] == 'AAA111'
+
+    def test_validate_keyset_pagination(self, api_client):
+        """Test que pagination=cursor recorre los errores en orden y sin repetir."""
+        company = CompanyFactory()
+        EntityFactory.create_batch(3, company=company)
+        url = reverse('document-validate') + '?pagination=cursor&page_size=4'
+        payload = {'company_id': str(company.id), 'entity_type': 'vehicle'}
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=self._compliance_errors):
+            first = api_client.post(url, payload, format='json')
+            second = api_client.post(first.data['next'], payload, format='json')
+
+        assert first.status_code == status.HTTP_200_OK
+        assert len(first.data['results']) == 4
+        assert len(second.data['results']) == 2
+        assert second.data['next'] is None
+        keys = [
+            (error['entity_code'], error['error_type'], error['document_type_code'])
+            for error in first.data['results'] + second.data['results']
+        ]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == 6
+
+    def test_validate_invalid_mode(self, api_client):
+        """Test que un modo o formato desconocido responde 400."""
+        entity = EntityFactory()
+        payload = {'company_id': str(entity.company_id), 'entity_type': 'vehicle'}
+
+        invalid_mode = api_client.post(reverse('document-validate') + '?mode=full', payload, format='json')
+        summary_csv = api_client.post(
+            reverse('document-validate') + '?mode=summary&output=csv', payload, format='json'
+        )
+
+        assert invalid_mode.status_code == status.HTTP_400_BAD_REQUEST
+        assert invalid_mode.data['error'] is True
+        assert summary_csv.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_validate_several_companies_and_all_entity_types(self, api_client):
+        """Test que validate acepta varias empresas y entity_type='all', en un solo orden."""
+        first, second = CompanyFactory.create_batch(2)
+        EntityFactory(company=first, entity_type='vehicle', entity_code='CCC333')
+        EntityFactory(company=first, entity_type='employee', entity_code='AAA111')
+        EntityFactory(company=second, entity_type='supplier', entity_code='BBB222')
+        EntityFactory(company=CompanyFactory(), entity_type='vehicle', entity_code='ZZZ999')
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=self._compliance_errors) as compute:
+            response = api_client.post(reverse('document-validate'), {
+                'company_id': [str(first.id), str(second.id)],
+                'entity_type': 'all',
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['validated_entities'] == 3
+        assert [error['entity_code'] for error in response.data['errors']] == [
+            'AAA111', 'AAA111', 'BBB222', 'BBB222', 'CCC333', 'CCC333'
+        ]
+        # Una llamada por empresa y tipo con entidades
+        assert compute.call_count == 3
+
+    def test_validate_entity_type_list(self, api_client):
+        """Test que entity_type acepta una lista y rechaza tipos desconocidos."""
+        company = CompanyFactory()
+        EntityFactory(company=company, entity_type='vehicle')
+        EntityFactory(company=company, entity_type='asset')
+        url = reverse('document-validate')
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=self._compliance_errors):
+            response = api_client.post(url, {
+                'company_id': str(company.id), 'entity_type': ['vehicle', 'employee'],
+            }, format='json')
+        invalid = api_client.post(url, {
+            'company_id': str(company.id), 'entity_type': ['vehicle', 'ship'],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['validated_entities'] == 1
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_validate_job_mode_requires_single_scope(self, api_client):
+        """Test que mode=job no acepta varias empresas o tipos."""
+        company = CompanyFactory()
+
+        response = api_client.post(reverse('document-validate') + '?mode=job', {
+            'company_id': str(company.id), 'entity_type': 'all',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] is True
+
+    def test_validate_expiring_within_days(self, api_client):
+        """Test que as_of y expiring_within_days calculan en el momento, sin entity_compliance."""
+        entity = EntityFactory()
+        as_of = date(2025, 1, 1)
+        expiring = {
+            'entity_id': entity.id, 'entity_code': entity.entity_code,
+            'document_type_code': 'SOAT', 'error_type': 'expiring_soon',
+            'error_message': 'Documento vence el 2025-01-20',
+        }
+
+        with patch('apps.documents.views.compliance.iter_errors_as_of', return_value=iter([expiring])) as iter_errors, \
+                patch('apps.documents.compliance.compute_errors') as compute:
+            response = api_client.post(reverse('document-validate'), {
+                'company_id': str(entity.company_id), 'entity_type': 'vehicle',
+                'as_of': as_of.isoformat(), 'expiring_within_days': 30,
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['errors'] == [expiring]
+        args = iter_errors.call_args.args
+        assert [str(company_id) for company_id in args[0]] == [str(entity.company_id)]
+        assert args[1:] == (['vehicle'], None, as_of, 30)
+        compute.assert_not_called()
+
+    def test_validate_expiring_summary(self, api_client):
+        """Test que mode=summary con ventana usa el resumen calculado en el momento."""
+        entity = EntityFactory()
+
+        with patch('apps.documents.views.compliance.summarize_as_of', return_value={'total_errors': 4}) as summary:
+            response = api_client.post(reverse('document-validate') + '?mode=summary', {
+                'company_id': str(entity.company_id), 'entity_type': 'vehicle', 'expiring_within_days': 30,
+            }, format='json')
+
+        assert response.data == {'total_errors': 4}
+        assert summary.call_args.args[3] == timezone.localdate()
+
+    def test_validate_as_of_rejects_job_and_invalid_window(self, api_client):
+        """Test que as_of no admite mode=job y la ventana debe ser positiva."""
+        entity = EntityFactory()
+        payload = {'company_id': str(entity.company_id), 'entity_type': 'vehicle'}
+
+        job = api_client.post(reverse('document-validate') + '?mode=job', {
+            **payload, 'as_of': '2025-01-01',
+        }, format='json')
+        window = api_client.post(reverse('document-validate'), {
+            **payload, 'expiring_within_days': 0,
+        }, format='json')
+
+        assert job.status_code == status.HTTP_400_BAD_REQUEST
+        assert window.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_validate_error(self, api_client):
+        """Test que un error del cálculo responde 500 con el formato de error."""
+        entity = EntityFactory()
+
+        with patch('apps.documents.compliance.compute_errors', side_effect=Exception('boom')):
+            response = api_client.post(reverse('document-validate'), {
+                'company_id': str(entity.company_id),
+                'entity_type': 'vehicle',
+            }, format='json')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.data['error'] is True
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDocumentUploadTransactions:
+    @patch('apps.documents.views.S3Service')
+    def test_s3_transfer_runs_outside_transaction(self, mock_s3_service, api_client):
+        """Test no database transaction is open while the file goes to S3."""
+        from django.db import connection
+        in_transaction = []
+
+        def upload_file(**kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return {
+                's3_bucket': 'test-bucket',
+                's3_key': 'test/key.pdf',
+                's3_region': 'us-east-1',
+                'file_name': 'test.pdf',
+                'file_size': 16,
+                'mime_type': 'application/pdf'
+            }
+
+        mock_s3_service.return_value.upload_file.side_effect = upload_file
+        company = CompanyFactory()
+        entity = EntityFactory(company=company)
+        doc_type = DocumentTypeFactory(entity_type=entity.entity_type)
+        test_file = BytesIO(b'PDF content here')
+        test_file.name = 'test.pdf'
+
+        response = api_client.post(reverse('document-upload'), {
+            'company_id': str(company.id),
+            'entity_id': str(entity.id),
+            'document_type_id': str(doc_type.id),
+            'file': test_file,
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert in_transaction == [False]
+
+
+@pytest.mark.django_db
+class TestDocumentValidationLogAPI:
+    def test_filter_by_created_at_range(self, api_client):
+        """Test que los logs se pueden acotar por fecha de creación."""
+        document = DocumentFactory()
+        now = timezone.now()
+        old_log, recent_log = DocumentValidationLogFactory.create_batch(2, document=document)
+        DocumentValidationLog.objects.filter(id=old_log.id).update(created_at=now - timedelta(days=60))
+
+        response = api_client.get(reverse('validation-log-list'), {
+            'document': str(document.id),
+            'created_at__gte': (now - timedelta(days=7)).isoformat(),
+            'created_at__lt': (now + timedelta(days=1)).isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [log['id'] for log in response.data['results']] == [str(recent_log.id)]
+
+    def test_cursor_page_seeks_without_offset(self, api_client):
+        """Test que una página por cursor filtra por la posición en vez de saltar filas."""
+        DocumentValidationLogFactory.create_batch(3, document=DocumentFactory())
+        first = api_client.get(reverse('validation-log-list'), {'page_size': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(first.data['next'])
+
+        assert response.status_code == status.HTTP_200_OK
+        page_query = next(
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "document_validation_logs"' in query['sql']
+        )
+        assert 'OFFSET' not in page_query
+        assert '"document_validation_logs"."created_at" <' in page_query
+
+
+@pytest.mark.django_db
+class TestValidationJobAPI:
+    def test_validate_job_mode_returns_job(self, api_client):
+        """Test que mode=job responde 202 y une solicitudes idénticas."""
+        entity = EntityFactory()
+        url = reverse('document-validate') + '?mode=job'
+        payload = {'company_id': str(entity.company_id), 'entity_type': 'vehicle'}
+
+        with patch('apps.documents.compliance.compute_errors') as compute:
+            first = api_client.post(url, payload, format='json')
+            second = api_client.post(url, payload, format='json')
+
+        assert first.status_code == status.HTTP_202_ACCEPTED
+        assert first.data['status'] == 'pending'
+        assert first.data['created'] is True
+        assert second.data['job_id'] == first.data['job_id']
+        assert second.data['created'] is False
+        assert first.data['url'].endswith(f"/api/validation-jobs/{first.data['job_id']}/")
+        # El cálculo ocurre en el worker, no en el request
+        compute.assert_not_called()
+
+    def test_retrieve_job_with_paginated_results(self, api_client):
+        """Test que el detalle del job trae progreso y errores paginados."""
+        entity = EntityFactory()
+        job, _ = ValidationJobService.submit(entity.company_id, 'vehicle')
+        job.status = 'completed'
+        job.total_entities = 1
+        job.processed_entities = 1
+        job.total_errors = 3
+        job.save()
+        for code in ('C', 'A', 'B'):
+            ValidationJobResult.objects.create(
+                job=job, entity_id=entity.id, entity_code=entity.entity_code,
+                document_type_code=code, error_type='missing_mandatory',
+                error_message=f'Documento obligatorio faltante: {code}'
+            )
+
+        url = reverse('validation-job-detail', args=[job.id])
+        first = api_client.get(url, {'page_size': 2})
+        second = api_client.get(first.data['next'])
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.data['status'] == 'completed'
+        assert first.data['progress'] == 100.0
+        assert [row['document_type_code'] for row in first.data['results']] == ['A', 'B']
+        assert [row['document_type_code'] for row in second.data['results']] == ['C']
+        assert second.data['next'] is None
@@ -0,0 +1,454 @@
+"""
+Performance benchmarks for Document endpoints.
+
+The benchmarks are marked slow and deselected by default (pytest.ini). Run
+only them with: pytest -m slow -s
+"""
+import contextlib
+import importlib.util
+import io
+import statistics
+import threading
+import time
+import tracemalloc
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest.mock import Mock, patch
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.pagination import PageNumberPagination
+from apps.documents.clients import build_s3_client, registry
+from apps.companies.models import Company
+from apps.documents.models import Document, DocumentType, DocumentValidationLog
+from apps.entities.models import Entity
+from apps.documents.pagination import KeysetPagination
+from apps.documents.services import N8NService, S3Service
+from apps.documents.views import DocumentViewSet
+from .factories import (
+    CompanyFactory, EntityFactory, DocumentTypeFactory, DocumentFactory
+)
+
+
+@pytest.fixture
+def fake_aws_settings(settings):
+    """Static credentials so boto3 can sign URLs without network access."""
+    settings.AWS_ACCESS_KEY_ID = 'AKIABENCHMARK'
+    settings.AWS_SECRET_ACCESS_KEY = 'benchmark-secret'
+    settings.AWS_S3_REGION_NAME = 'us-east-1'
+
+
+def _time_requests(client, url, iterations):
+    """Return elapsed seconds for `iterations` GET requests to `url`."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+    return time.perf_counter() - start
+
+
+def _per_request_s3_client():
+    """Patch the viewset to build a fresh boto3 client per request, as before."""
+    original_init = DocumentViewSet.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self._s3_service = S3Service(s3_client=build_s3_client())
+
+    return patch.object(DocumentViewSet, '__init__', init)
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+@pytest.mark.usefixtures('fake_aws_settings')
+class TestS3ClientBenchmark:
+    iterations = 50
+
+    @pytest.mark.parametrize('endpoint', ['list', 'download'])
+    def test_shared_client_vs_per_request(self, endpoint):
+        """Compare per-request boto3 construction with the shared client."""
+        document = DocumentFactory()
+        if endpoint == 'list':
+            url = reverse('document-list')
+        else:
+            url = reverse('document-download', kwargs={'pk': document.id})
+        client = APIClient()
+
+        with _per_request_s3_client():
+            per_request = _time_requests(client, url, self.iterations)
+        registry.reset()
+        with patch('apps.documents.clients.build_s3_client', wraps=build_s3_client) as built:
+            shared = _time_requests(client, url, self.iterations)
+
+        print(
+            f"\n[{endpoint}] {self.iterations} requests: "
+            f"per-request client {per_request * 1000:.1f} ms, "
+            f"shared client {shared * 1000:.1f} ms "
+            f"({per_request / shared:.1f}x, {built.call_count} shared clients built)"
+        )
+        # Los tiempos solo se imprimen; el cliente compartido se construye a lo sumo una vez
+        assert built.call_count <= 1
+
+
+class _TransferProbe:
+    """
+    Fake S3 upload that records how many DB transactions stay open during transfers.
+
+    The in-memory SQLite test database fails concurrent writers with "table is
+    locked" instead of waiting, so requests only touch the database while
+    holding `db_access`; the probe releases it for the duration of the transfer.
+    """
+
+    def __init__(self, transfer_seconds):
+        self.transfer_seconds = transfer_seconds
+        self.lock = threading.Lock()
+        self.db_access = threading.Lock()
+        self.open_transactions = 0
+        self.peak_open_transactions = 0
+
+    def upload_file(self, **kwargs):
+        holding = connection.in_atomic_block
+        with self.lock:
+            self.open_transactions += holding
+            self.peak_open_transactions = max(self.peak_open_transactions, self.open_transactions)
+        self.db_access.release()
+        try:
+            time.sleep(self.transfer_seconds)
+        finally:
+            self.db_access.acquire()
+        with self.lock:
+            self.open_transactions -= holding
+        return {
+            's3_bucket': 'bench-bucket',
+            's3_key': f"bench/{kwargs['entity_id']}/{time.perf_counter_ns()}.pdf",
+            's3_region': 'us-east-1',
+            'file_name': 'big.pdf',
+            'file_size': 1024,
+            'mime_type': 'application/pdf'
+        }
+
+
+def _transfer_inside_transaction():
+    """Patch the viewset to run the S3 transfer inside a transaction, as before."""
+    original = DocumentViewSet._upload_file_to_s3
+
+    def upload_in_transaction(self, *args, **kwargs):
+        with transaction.atomic():
+            return original(self, *args, **kwargs)
+
+    return patch.object(DocumentViewSet, '_upload_file_to_s3', upload_in_transaction)
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+class TestUploadConnectionLoad:
+    concurrency = 6
+
+    def _run_concurrent_uploads(self, probe):
+        company = CompanyFactory()
+        doc_type = DocumentTypeFactory(entity_type='vehicle')
+        entities = [EntityFactory(company=company, entity_type='vehicle') for _ in range(self.concurrency)]
+
+        def upload(entity):
+            try:
+                data = BytesIO(b'x' * 1024)
+                data.name = 'big.pdf'
+                return APIClient().post(reverse('document-upload'), {
+                    'company_id': str(company.id),
+                    'entity_id': str(entity.id),
+                    'document_type_id': str(doc_type.id),
+                    'file': data,
+                }, format='multipart').status_code
+            finally:
+                connections.close_all()
+
+        original_upload = DocumentViewSet.upload
+
+        def upload_with_db_access(view, request, *args, **kwargs):
+            with probe.db_access:
+                return original_upload(view, request, *args, **kwargs)
+
+        with patch('apps.documents.views.S3Service') as mock_s3_service, \
+                patch.object(DocumentViewSet, 'upload', upload_with_db_access):
+            mock_s3_service.return_value = Mock(upload_file=probe.upload_file)
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                return list(executor.map(upload, entities))
+
+    def test_concurrent_large_uploads_hold_no_transactions(self):
+        """Compare DB transactions held open during concurrent S3 transfers."""
+        legacy = _TransferProbe(transfer_seconds=0.2)
+        with _transfer_inside_transaction():
+            self._run_concurrent_uploads(legacy)
+
+        staged = _TransferProbe(transfer_seconds=0.2)
+        statuses = self._run_concurrent_uploads(staged)
+
+        print(
+            f"\n{self.concurrency} concurrent uploads: peak transactions held during S3 transfer "
+            f"{legacy.peak_open_transactions} (transfer inside atomic) vs "
+            f"{staged.peak_open_transactions} (staged pipeline)"
+        )
+        assert statuses == [status.HTTP_201_CREATED] * self.concurrency
+        assert staged.peak_open_transactions == 0
+        assert legacy.peak_open_transactions > staged.peak_open_transactions
+
+
+class _StubWebhookHandler(BaseHTTPRequestHandler):
+    """Minimal N8N webhook: reads the JSON body and answers 200 with keep-alive."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = b'{"received": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_webhook():
+    """Local HTTP server standing in for an N8N webhook; counts accepted connections."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubWebhookHandler)
+    server.connections = 0
+    server.url = f'http://127.0.0.1:{server.server_port}/webhook/validate'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.slow
+class TestN8NDispatchLatency:
+    dispatches = 1000
+
+    def test_pooled_session_vs_new_connection(self, stub_webhook):
+        """Compare 1,000 sequential webhook calls with and without connection reuse."""
+        payload = {'document_id': 'bench', 'file_name': 'soat.pdf'}
+
+        start = time.perf_counter()
+        for _ in range(self.dispatches):
+            response = requests.post(stub_webhook.url, json=payload, timeout=(5, 30))
+            response.raise_for_status()
+        new_connection = time.perf_counter() - start
+        new_connection_count = stub_webhook.connections
+
+        service = N8NService()
+        start = time.perf_counter()
+        for _ in range(self.dispatches):
+            service.trigger_workflow(stub_webhook.url, payload)
+        pooled = time.perf_counter() - start
+        pooled_count = stub_webhook.connections - new_connection_count
+
+        print(
+            f"\n{self.dispatches} webhook dispatches: "
+            f"new connection {new_connection * 1000 / self.dispatches:.2f} ms/call "
+            f"({new_connection_count} connections), "
+            f"pooled session {pooled * 1000 / self.dispatches:.2f} ms/call "
+            f"({pooled_count} connections, {new_connection / pooled:.1f}x)"
+        )
+        # Los tiempos solo se imprimen; la reutilización se mide contando conexiones
+        assert new_connection_count == self.dispatches
+        assert pooled_count == 1
+
+
+def _median_request(client, url, params, iterations=5):
+    """Median seconds of `iterations` GET requests."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(url, params)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == status.HTTP_200_OK
+    return statistics.median(timings)
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestKeysetPaginationDepth:
+    page_size = 10
+    pages = 10000
+
+    @pytest.fixture
+    def validation_logs(self):
+        """pages * page_size logs with distinct created_at values."""
+        document = DocumentFactory()
+        DocumentValidationLog.objects.bulk_create(
+            [
+                DocumentValidationLog(document=document, action='uploaded', new_status='P',
+                                      performed_by='bench')
+                for _ in range(self.page_size * self.pages)
+            ],
+            batch_size=5000
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_validation_logs "
+                "SET created_at = datetime('2024-01-01', '+' || rowid || ' seconds')"
+            )
+
+    @pytest.mark.usefixtures('validation_logs')
+    def test_latency_is_flat_across_pages(self):
+        """
+        Compare page 1 and page 10,000 of the validation logs with cursor and
+        page numbers. Only prints the timings; the SQL of a cursor page is
+        checked in test_api (TestDocumentValidationLogAPI).
+        """
+        url = reverse('validation-log-list')
+        client = APIClient()
+
+        offset = self.page_size * (self.pages - 1)
+        last_of_previous_page = DocumentValidationLog.objects.order_by(
+            '-created_at', '-id'
+        ).values_list('created_at', 'id')[offset - 1]
+        deep_cursor = KeysetPagination(('-created_at', '-id')).encode_cursor(last_of_previous_page)
+
+        cursor_first = _median_request(client, url, {'page_size': self.page_size})
+        cursor_deep = _median_request(client, url, {'page_size': self.page_size, 'cursor': deep_cursor})
+        with patch.object(PageNumberPagination, 'page_size', self.page_size):
+            page_first = _median_request(client, url, {'pagination': 'page', 'page': 1})
+            page_deep = _median_request(client, url, {'pagination': 'page', 'page': self.pages})
+
+        print(
+            f"\nvalidation logs, {self.page_size} per page: "
+            f"cursor page 1 {cursor_first * 1000:.1f} ms, "
+            f"page {self.pages} {cursor_deep * 1000:.1f} ms; "
+            f"page number page 1 {page_first * 1000:.1f} ms, "
+            f"page {self.pages} {page_deep * 1000:.1f} ms"
+        )
+
+
+def _load_demo_data():
+    """Run setup_demo_data.py against the test database, silencing its output."""
+    spec = importlib.util.spec_from_file_location(
+        'setup_demo_data', settings.BASE_DIR / 'setup_demo_data.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with contextlib.redirect_stdout(io.StringIO()):
+        module.create_demo_data()
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestSideLoadingPayload:
+    page_size = 500
+    documents_per_pair = 25
+
+    @pytest.fixture
+    def demo_documents(self):
+        """Demo data scaled up: documents_per_pair documents per entity and document type."""
+        _load_demo_data()
+        documents = []
+        for entity in Entity.objects.all():
+            for doc_type in DocumentType.objects.filter(entity_type=entity.entity_type):
+                documents.extend(
+                    Document(
+                        company_id=entity.company_id, entity=entity, document_type=doc_type,
+                        file_name=f'{doc_type.code}-{index}.pdf', file_size=1024,
+                        mime_type='application/pdf', s3_bucket='demo', s3_region='us-east-1',
+                        s3_key=f'demo/{entity.entity_code}/{doc_type.code}/{index}.pdf',
+                        uploaded_by='demo'
+                    )
+                    for index in range(self.documents_per_pair)
+                )
+        Document.objects.bulk_create(documents)
+        return len(documents)
+
+    def test_include_vs_nested_expand(self, demo_documents):
+        """Compare payload size and response time of nested expand and side-loading."""
+        url = reverse('document-list')
+        client = APIClient()
+        relations = 'company,entity,document_type'
+        page_size = min(self.page_size, demo_documents)
+
+        nested = client.get(url, {'expand': relations, 'page_size': page_size})
+        side_loaded = client.get(url, {'include': relations, 'page_size': page_size})
+        assert len(nested.data['results']) == len(side_loaded.data['data']) == page_size
+
+        nested_time = _median_request(client, url, {'expand': relations, 'page_size': page_size})
+        side_loaded_time = _median_request(client, url, {'include': relations, 'page_size': page_size})
+
+        print(
+            f"\n{page_size} documents (demo data: {Company.objects.count()} companies, "
+            f"{Entity.objects.count()} entities, {DocumentType.objects.count()} types): "
+            f"nested {len(nested.content) / 1024:.0f} KiB in {nested_time * 1000:.1f} ms, "
+            f"side-loaded {len(side_loaded.content) / 1024:.0f} KiB in {side_loaded_time * 1000:.1f} ms "
+            f"({len(nested.content) / len(side_loaded.content):.1f}x smaller, "
+            f"{nested_time / side_loaded_time:.1f}x faster)"
+        )
+        # Los tiempos solo se imprimen; el tamaño de la respuesta no depende de la carga
+        assert len(side_loaded.content) < len(nested.content) / 2
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestDocumentExportStreaming:
+    sizes = (5000, 25000)
+
+    @staticmethod
+    def _create_documents(count):
+        entity = EntityFactory()
+        doc_type = DocumentTypeFactory(entity_type=entity.entity_type)
+        Document.objects.bulk_create(
+            [
+                Document(
+                    company_id=entity.company_id, entity=entity, document_type=doc_type,
+                    file_name=f'doc-{index}.pdf', file_size=1024, mime_type='application/pdf',
+                    s3_bucket='bench', s3_key=f'bench/{entity.id}/{index}.pdf', s3_region='us-east-1',
+                    uploaded_by='bench'
+                )
+                for index in range(count)
+            ],
+            batch_size=5000
+        )
+        return entity.company_id
+
+    def _export(self, company_id):
+        """Stream the export; return (seconds to first block, total seconds, bytes, peak memory)."""
+        client = APIClient()
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get(reverse('document-export'), {'company': str(company_id)})
+        content = iter(response.streaming_content)
+        received = len(next(content))
+        first_block = time.perf_counter() - start
+        for block in content:
+            received += len(block)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return first_block, total, received, peak
+
+    def test_memory_is_flat_and_first_byte_is_fast(self):
+        """Export 5k and 25k documents: peak memory should not grow with the row count."""
+        results = {}
+        for size in self.sizes:
+            company_id = self._create_documents(size)
+            results[size] = self._export(company_id)
+
+        for size, (first_block, total, received, peak) in results.items():
+            print(
+                f"\nexport {size} documents: first block {first_block * 1000:.0f} ms, "
+                f"total {total:.2f} s, {received / 1024 / 1024:.1f} MiB, "
+                f"peak memory {peak / 1024 / 1024:.1f} MiB"
+            )
+
+        # Los tiempos solo se imprimen; la memoria (tracemalloc) no depende de la carga del equipo
+        small_peak, large_peak = (results[size][3] for size in self.sizes)
+        assert large_peak < small_peak * 1.5
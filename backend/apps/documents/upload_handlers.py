@@ -0,0 +1,253 @@
+"""
+Upload handlers for Document Management System.
+Streams multipart file uploads straight into S3 multipart uploads.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from rest_framework import status
+from rest_framework.exceptions import APIException, UnsupportedMediaType
+
+from .clients import get_s3_client
+from .constants import FileUpload
+
+logger = logging.getLogger(__name__)
+
+
+class FileTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'El archivo excede el tamaño máximo permitido.'
+    default_code = 'file_too_large'
+
+
+class UploadPrecheckHandler(FileUploadHandler):
+    """
+    Rechaza el archivo en cuanto llega su encabezado o supera el tamaño
+    máximo, sin esperar a que se lea el resto del request.
+
+    Debe ir primero en la lista de handlers.
+    """
+
+    def __init__(self, request=None, max_size_mb=None, allowed_types=None):
+        super().__init__(request)
+        if max_size_mb is None:
+            max_size_mb = settings.DOCUMENT_MAX_UPLOAD_SIZE_MB
+        self.max_size_mb = max_size_mb
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.allowed_types = allowed_types or FileUpload.ALLOWED_MIME_TYPES
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 charset=None, content_type_extra=None):
+        super().new_file(
+            field_name, file_name, content_type, content_length, charset, content_type_extra
+        )
+        if content_type not in self.allowed_types:
+            raise UnsupportedMediaType(
+                content_type,
+                detail=(
+                    f"Tipo de archivo no permitido: {content_type}. "
+                    f"Tipos permitidos: {', '.join(self.allowed_types)}"
+                )
+            )
+        if content_length is not None and content_length > self.max_size_bytes:
+            self._raise_too_large()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size_bytes:
+            self._raise_too_large()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def _raise_too_large(self):
+        raise FileTooLarge(
+            f"El archivo excede el tamaño máximo permitido de {self.max_size_mb}MB."
+        )
+
+
+class S3StreamedFile(UploadedFile):
+    """
+    Archivo que ya fue transferido a S3 por `S3MultipartUploadHandler`.
+
+    No tiene contenido local; `s3_metadata` contiene los datos que normalmente
+    retorna `S3Service.upload_file`.
+    """
+
+    def __init__(self, name, content_type, size, charset, content_type_extra, s3_metadata):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.s3_metadata = s3_metadata
+
+    def open(self, mode=None):
+        raise ValueError("El contenido de este archivo está en S3")
+
+    def close(self):
+        pass
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """
+    Envía el archivo a S3 mientras se recibe el request.
+
+    Cada chunk se acumula hasta completar una parte (`S3_MULTIPART_PART_SIZE`)
+    y las partes se suben en paralelo desde un pool pequeño de threads. Como
+    máximo hay `S3_MULTIPART_CONCURRENCY` partes en vuelo, así que la memoria
+    usada por carga es constante sin importar el tamaño del archivo y nada se
+    escribe a disco.
+    """
+
+    def __init__(self, request=None, s3_client=None, field_name='file'):
+        super().__init__(request)
+        self.s3_client = s3_client or get_s3_client()
+        self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+        self.region = settings.AWS_S3_REGION_NAME
+        self.part_size = max(settings.S3_MULTIPART_PART_SIZE, 5 * 1024 * 1024)
+        self.concurrency = settings.S3_MULTIPART_CONCURRENCY
+        self.target_field = field_name
+        self.active = False
+        self.upload_id = None
+        self.s3_key = None
+        self.streamed_file = None
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 charset=None, content_type_extra=None):
+        super().new_file(
+            field_name, file_name, content_type, content_length, charset, content_type_extra
+        )
+        if field_name != self.target_field or self.active:
+            return
+
+        self.active = True
+        self.s3_key = self.build_staging_key(file_name)
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.s3_key,
+            ContentType=content_type or 'application/octet-stream'
+        )
+        self.upload_id = response['UploadId']
+        self._buffer = bytearray()
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='s3-part'
+        )
+        raise StopFutureHandlers()
+
+    @staticmethod
+    def build_staging_key(file_name):
+        """Clave S3 para archivos recibidos antes de conocer empresa y entidad."""
+        date_prefix = datetime.now().strftime('%Y/%m/%d')
+        return f"{settings.S3_STREAMING_UPLOAD_PREFIX}{date_prefix}/{uuid.uuid4()}/{file_name}"
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active or self.streamed_file is not None:
+            return raw_data
+
+        self._buffer += raw_data
+        if len(self._buffer) >= self.part_size:
+            self._submit_part()
+        return None
+
+    def _submit_part(self):
+        """Envía el buffer actual como la siguiente parte del multipart upload."""
+        self._raise_failed_parts()
+        self._slots.acquire()
+        part_number = len(self._futures) + 1
+        body = bytes(self._buffer)
+        self._buffer = bytearray()
+        try:
+            self._futures.append(
+                self._executor.submit(self._upload_part, part_number, body)
+            )
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _upload_part(self, part_number, body):
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.s3_key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        finally:
+            self._slots.release()
+
+    def _raise_failed_parts(self):
+        for future in self._futures:
+            if future.done() and future.exception():
+                raise future.exception()
+
+    def file_complete(self, file_size):
+        if not self.active or self.streamed_file is not None:
+            return None
+
+        try:
+            if self._buffer or not self._futures:
+                self._submit_part()
+            parts = [future.result() for future in self._futures]
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.s3_key,
+                UploadId=self.upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+
+        self.upload_id = None
+        self.streamed_file = S3StreamedFile(
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+            s3_metadata={
+                's3_bucket': self.bucket_name,
+                's3_key': self.s3_key,
+                's3_region': self.region,
+                'file_name': self.file_name,
+                'file_size': file_size,
+                'mime_type': self.content_type or 'application/octet-stream'
+            }
+        )
+        return self.streamed_file
+
+    def upload_interrupted(self):
+        self.abort()
+
+    def abort(self):
+        """
+        Descarta lo que se haya enviado a S3: aborta el multipart upload en
+        curso o elimina el objeto si ya se había completado.
+        """
+        if not self.active:
+            return
+
+        try:
+            if self.upload_id:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.s3_key,
+                    UploadId=self.upload_id
+                )
+            elif self.streamed_file is not None:
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=self.s3_key)
+        except Exception:
+            logger.exception("No se pudo descartar la carga %s en S3", self.s3_key)
+        finally:
+            self.active = False
+            self.upload_id = None
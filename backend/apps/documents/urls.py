@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentTypeViewSet, DocumentViewSet, DocumentValidationLogViewSet
+from .views import (
+    DocumentTypeViewSet, DocumentViewSet, DocumentValidationLogViewSet, ValidationJobViewSet,
+    ValidationRuleViewSet
+)
 
 router = DefaultRouter()
 router.register(r'document-types', DocumentTypeViewSet, basename='document-type')
+router.register(r'validation-rules', ValidationRuleViewSet, basename='validation-rule')
 router.register(r'documents', DocumentViewSet, basename='document')
 router.register(r'validation-logs', DocumentValidationLogViewSet, basename='validation-log')
+router.register(r'validation-jobs', ValidationJobViewSet, basename='validation-job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -4,6 +4,7 @@ Utility functions for document management.
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status
+from .constants import FileUpload
 
 
 def custom_exception_handler(exc, context):
@@ -37,19 +38,26 @@ def validate_file_type(file_obj, allowed_types=None):
     Raises:
         ValueError: Si el tipo no es permitido
     """
-    if allowed_types is None:
-        allowed_types = [
-            'application/pdf',
-            'image/jpeg',
-            'image/png',
-            'image/jpg',
-            'application/msword',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'application/vnd.ms-excel',
-            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        ]
-
     content_type = file_obj.content_type if hasattr(file_obj, 'content_type') else None
+    return validate_content_type(content_type, allowed_types)
+
+
+def validate_content_type(content_type, allowed_types=None):
+    """
+    Valida un tipo MIME declarado.
+
+    Args:
+        content_type: Tipo MIME
+        allowed_types: Lista de tipos MIME permitidos
+
+    Returns:
+        bool: True si es válido
+
+    Raises:
+        ValueError: Si el tipo no es permitido
+    """
+    if allowed_types is None:
+        allowed_types = FileUpload.ALLOWED_MIME_TYPES
 
     if content_type not in allowed_types:
         raise ValueError(
@@ -71,15 +79,32 @@ def validate_file_size(file_obj, max_size_mb=10):
     Returns:
         bool: True si es válido
 
+    Raises:
+        ValueError: Si el tamaño excede el límite
+    """
+    return validate_size(file_obj.size, max_size_mb)
+
+
+def validate_size(size, max_size_mb=10):
+    """
+    Valida un tamaño en bytes.
+
+    Args:
+        size: Tamaño en bytes
+        max_size_mb: Tamaño máximo en MB
+
+    Returns:
+        bool: True si es válido
+
     Raises:
         ValueError: Si el tamaño excede el límite
     """
     max_size_bytes = max_size_mb * 1024 * 1024
 
-    if file_obj.size > max_size_bytes:
+    if size > max_size_bytes:
         raise ValueError(
             f"El archivo excede el tamaño máximo permitido de {max_size_mb}MB. "
-            f"Tamaño actual: {file_obj.size / (1024 * 1024):.2f}MB"
+            f"Tamaño actual: {size / (1024 * 1024):.2f}MB"
         )
 
     return True
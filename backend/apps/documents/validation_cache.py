@@ -0,0 +1,162 @@
+"""
+Result cache for the bulk validation endpoint.
+
+Dashboards call `validate` with the same arguments many times while nothing
+changes. JSON responses are kept in the Django cache (Redis with `REDIS_URL`,
+otherwise the per-process LocMemCache, which evicts the least recently used
+entries) under a key built from:
+
+- the request arguments (companies, entity types, entities, mode, as_of,
+  expiring window);
+- the `CompanyDataVersion` of every company in the request, bumped after
+  commit by the writes that change its validation results (see `signals.py`);
+- the current date, because the date rules change with the day.
+
+Identical requests that miss the cache at the same time share one computation
+(single-flight): the first one takes a lock key with `cache.add` and the
+others poll for its result for up to VALIDATE_CACHE_WAIT seconds. The lock
+holds a per-request token and lives VALIDATE_CACHE_LOCK_TIMEOUT seconds (the
+compute budget); it is only released by the request that owns it.
+"""
+import hashlib
+import json
+import time
+import uuid
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.companies.models import Company
+from .models import CompanyDataVersion
+
+KEY_PREFIX = 'validate'
+POLL_INTERVAL = 0.05
+
+
+def bump(company_ids: Optional[Iterable] = None) -> None:
+    """
+    Incrementa la versión de datos de las empresas.
+
+    Args:
+        company_ids: Empresas; None = todas (cambió un tipo de documento o una regla)
+    """
+    if company_ids is None:
+        company_ids = Company.objects.values_list('id', flat=True)
+    company_ids = {str(company_id) for company_id in company_ids if company_id}
+    if not company_ids:
+        return
+
+    CompanyDataVersion.objects.filter(company_id__in=company_ids).update(
+        version=F('version') + 1,
+        changed_at=timezone.now()
+    )
+    # Sin fila la versión es 0; la primera escritura la deja en 1. Las que
+    # ya existían se ignoran (el UPDATE ya las incrementó)
+    CompanyDataVersion.objects.bulk_create(
+        [CompanyDataVersion(company_id=company_id) for company_id in company_ids],
+        ignore_conflicts=True
+    )
+
+
+def bump_on_commit(company_ids: Optional[Iterable] = None) -> None:
+    """
+    Como `bump`, al confirmar la transacción en curso: no bloquea la fila de
+    la empresa mientras dura la escritura, y si hay rollback no cambia nada.
+    `company_ids` puede ser un queryset; se evalúa al confirmar.
+    """
+    transaction.on_commit(partial(bump, company_ids))
+
+
+def versions(company_ids: Sequence) -> Dict[str, int]:
+    """Versión de datos de cada empresa (0 si nunca cambió)."""
+    stored = {
+        str(company_id): version for company_id, version in CompanyDataVersion.objects.filter(
+            company_id__in=company_ids
+        ).values_list('company_id', 'version')
+    }
+    return {str(company_id): stored.get(str(company_id), 0) for company_id in company_ids}
+
+
+def cache_key(company_ids: Sequence, entity_types: Sequence[str], entity_ids: Optional[Sequence] = None,
+              **options) -> str:
+    """
+    Llave del cache para una validación.
+
+    Args:
+        company_ids: Empresas
+        entity_types: Tipos de entidad
+        entity_ids: Entidades (None = todas)
+        **options: Otros argumentos que cambian la respuesta (mode, as_of, ...)
+    """
+    arguments = {
+        'company_ids': sorted(str(company_id) for company_id in company_ids),
+        'entity_types': sorted(entity_types),
+        'entity_ids': sorted(str(entity_id) for entity_id in entity_ids) if entity_ids else None,
+        'options': options,
+        'versions': versions(company_ids),
+        'date': timezone.localdate(),
+    }
+    digest = hashlib.sha256(
+        json.dumps(arguments, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+def get_or_compute(key: str, compute: Callable[[], Dict], refresh: bool = False) -> Dict:
+    """
+    Resultado guardado en `key`, o el de `compute()`. Si otra solicitud ya
+    está calculando la misma llave, espera su resultado.
+
+    Args:
+        key: Llave de `cache_key`
+        compute: Calcula la respuesta
+        refresh: Ignora el resultado guardado (force_refresh) y lo reemplaza
+    """
+    timeout = settings.VALIDATE_CACHE_TIMEOUT
+    if timeout <= 0:
+        return compute()
+
+    if not refresh:
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.VALIDATE_CACHE_WAIT
+    while not cache.add(lock_key, token, timeout=settings.VALIDATE_CACHE_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            # El cálculo en curso tarda demasiado; se calcula sin esperarlo
+            return compute()
+        time.sleep(POLL_INTERVAL)
+        if not refresh:
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+    try:
+        result = compute()
+        if _cacheable(result):
+            cache.set(key, result, timeout=timeout)
+        return result
+    finally:
+        _release(lock_key, token)
+
+
+def _release(lock_key: str, token: str) -> None:
+    """
+    Libera el lock solo si sigue siendo de esta solicitud: si expiró durante
+    el cálculo, otra solicitud ya puede tener el suyo.
+    """
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _cacheable(result: Dict) -> bool:
+    """Las respuestas con demasiados errores no se guardan."""
+    return len(result.get('errors', ())) <= settings.VALIDATE_CACHE_MAX_ERRORS
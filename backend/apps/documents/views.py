@@ -1,28 +1,49 @@
 """
 Views for Document Management System.
 """
+from typing import Dict, Iterator
+
 from django.conf import settings
-from django.db import connection, transaction
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .models import DocumentType, Document, DocumentValidationLog
+from apps.companies.models import Company
+from apps.companies.serializers import CompanySerializer
+from apps.entities.models import Entity
+from apps.entities.serializers import EntitySerializer
+from . import compliance, exports, validation_cache
+from .models import DocumentType, Document, DocumentValidationLog, ValidationJob, ValidationRule
 from .serializers import (
-    DocumentTypeSerializer, DocumentSerializer, DocumentValidationLogSerializer,
-    DocumentUploadSerializer, DocumentApproveRejectSerializer,
-    N8NCallbackSerializer, DocumentValidateSerializer
+    DocumentTypeSerializer, DocumentSerializer, DocumentListSerializer, DocumentDetailSerializer,
+    DocumentValidationLogSerializer,
+    DocumentUploadSerializer, DocumentUploadInitSerializer,
+    DocumentUploadConfirmSerializer, DocumentApproveRejectSerializer,
+    N8NCallbackSerializer, N8NCallbackBulkSerializer, DocumentValidateSerializer,
+    ValidationJobSerializer, ValidationRuleSerializer
 )
-from .services import S3Service, N8NService, DocumentValidationService
-from .constants import ValidationStatus, DocumentAction
-from .signals import document_uploaded, document_n8n_sent
+from .services import S3Service, N8NDispatchService, DocumentValidationService, ValidationJobService
+from .constants import ValidationStatus, DocumentAction, FileUpload, N8NCallbackOutcome, ValidateMode
+from .signals import document_uploaded
+from .circuit_breaker import CircuitBreaker
+from .mixins import SparseFieldsetMixin
+from .pagination import KeysetPagination, SelectablePagination
+from .search import IndexedSearchFilter
+from .upload_handlers import S3MultipartUploadHandler, UploadPrecheckHandler
 
 
-class DocumentTypeViewSet(viewsets.ModelViewSet):
+class DocumentTypeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar tipos de documentos.
 
@@ -35,55 +56,325 @@ class DocumentTypeViewSet(viewsets.ModelViewSet):
     """
     queryset = DocumentType.objects.all()
     serializer_class = DocumentTypeSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['entity_type', 'is_mandatory', 'uses_n8n_workflow']
     search_fields = ['code', 'name']
     ordering_fields = ['code', 'name', 'created_at']
     ordering = ['entity_type', 'name']
 
+    @swagger_auto_schema(
+        method='get',
+        responses={
+            200: openapi.Response(
+                description="Estado del circuit breaker de cada webhook N8N",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'webhook_url': openapi.Schema(type=openapi.TYPE_STRING),
+                            'state': openapi.Schema(type=openapi.TYPE_STRING),
+                            'opened_at': openapi.Schema(type=openapi.TYPE_NUMBER),
+                            'changed_at': openapi.Schema(type=openapi.TYPE_NUMBER),
+                            'recent_failures': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'in_flight': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'max_concurrency': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        }
+                    )
+                )
+            )
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='n8n-circuits')
+    def n8n_circuits(self, request):
+        """
+        Estado del circuit breaker de cada webhook N8N configurado
+        (closed, open, half_open), fallas recientes y requests en curso.
+        """
+        webhook_urls = DocumentType.objects.filter(
+            uses_n8n_workflow=True, n8n_webhook_url__isnull=False
+        ).exclude(n8n_webhook_url='').values_list('n8n_webhook_url', flat=True).distinct()
+
+        return Response([
+            CircuitBreaker(webhook_url).snapshot() for webhook_url in sorted(set(webhook_urls))
+        ])
+
+
+class ValidationRuleViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar reglas de validación configurables.
+
+    list: Listar las reglas
+    create: Crear una regla
+    retrieve: Obtener detalle de una regla
+    update: Actualizar una regla
+    partial_update: Actualizar parcialmente una regla
+    destroy: Eliminar una regla
+    """
+    queryset = ValidationRule.objects.all()
+    serializer_class = ValidationRuleSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['entity_type', 'document_type', 'kind', 'is_active']
+    ordering_fields = ['name', 'created_at', 'updated_at']
+    ordering = ['entity_type', 'name']
+
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar documentos.
 
     list: Listar todos los documentos
     retrieve: Obtener detalle de un documento
     """
-    queryset = Document.objects.select_related(
-        'company', 'entity', 'document_type'
-    ).prefetch_related('validation_logs').all()
+    queryset = Document.objects.all()
     serializer_class = DocumentSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['company', 'entity', 'document_type', 'validation_status']
     search_fields = ['file_name', 'entity__entity_code', 'entity__entity_name']
+    search_vectors = {'file_name': 'search_vector'}
     ordering_fields = ['uploaded_at', 'expiration_date', 'file_name']
     ordering = ['-uploaded_at']
+    default_pagination = 'cursor'
+    keyset_ordering = ('-uploaded_at', '-id')
 
     # Serializer class mapping - follows Open/Closed Principle
     serializer_classes = {
         'upload': DocumentUploadSerializer,
+        'upload_init': DocumentUploadInitSerializer,
+        'confirm': DocumentUploadConfirmSerializer,
         'approve': DocumentApproveRejectSerializer,
         'reject': DocumentApproveRejectSerializer,
         'n8n_callback': N8NCallbackSerializer,
+        'n8n_callback_bulk': N8NCallbackBulkSerializer,
         'validate': DocumentValidateSerializer,
+        'list': DocumentListSerializer,
+        'retrieve': DocumentDetailSerializer,
     }
 
-    def __init__(self, *args, s3_service=None, n8n_service=None, **kwargs):
+    # ?include= value -> (key in `included`, model, serializer, nested fields left out)
+    include_relations = {
+        'company': ('companies', Company, CompanySerializer, ()),
+        'entity': ('entities', Entity, EntitySerializer, ('company_detail',)),
+        'document_type': ('document_types', DocumentType, DocumentTypeSerializer, ()),
+    }
+
+    # ?expand= value -> relation to load for it
+    expand_relations = {
+        'company': 'company',
+        'entity': 'entity__company',
+        'document_type': 'document_type',
+    }
+
+    def __init__(self, *args, s3_service=None, **kwargs):
         """
         Initialize with dependency injection support.
 
         Args:
             s3_service: S3Service instance (injected for testing)
-            n8n_service: N8NService instance (injected for testing)
         """
         super().__init__(*args, **kwargs)
-        self.s3_service = s3_service or S3Service()
-        self.n8n_service = n8n_service or N8NService()
+        self._s3_service = s3_service
+
+    @property
+    def s3_service(self):
+        """S3Service built on first use; list/retrieve never touch S3."""
+        if self._s3_service is None:
+            self._s3_service = S3Service()
+        return self._s3_service
+
+    def initial(self, request, *args, **kwargs):
+        """Install the upload handlers before the body is parsed."""
+        super().initial(request, *args, **kwargs)
+        self.s3_upload_handler = None
+        if self.action != 'upload':
+            return
+
+        upload_handlers = request._request.upload_handlers
+        if settings.S3_STREAMING_UPLOADS:
+            self.s3_upload_handler = S3MultipartUploadHandler(
+                request._request, s3_client=self.s3_service.s3_client
+            )
+            upload_handlers.insert(0, self.s3_upload_handler)
+        upload_handlers.insert(0, UploadPrecheckHandler(request._request))
+
+    def _discard_streamed_upload(self):
+        """Abort or delete anything the streaming handler already sent to S3."""
+        if getattr(self, 's3_upload_handler', None) is not None:
+            self.s3_upload_handler.abort()
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action using dictionary mapping."""
         return self.serializer_classes.get(self.action, DocumentSerializer)
 
+    def get_expand(self):
+        """Relations requested with ?expand= on the list endpoint."""
+        if not hasattr(self, '_expand'):
+            self._expand = self._parse_relations('expand', DocumentListSerializer.EXPANDABLE_FIELDS)
+        return self._expand
+
+    def get_include(self):
+        """Relations requested with ?include= (side-loaded into `included`)."""
+        if not hasattr(self, '_include'):
+            self._include = self._parse_relations('include', self.include_relations)
+        return self._include
+
+    def _parse_relations(self, param, allowed):
+        raw = self.request.query_params.get(param, '')
+        names = {name.strip() for name in raw.split(',') if name.strip()}
+        unknown = names - set(allowed)
+        if unknown:
+            raise ValidationError({
+                param: f"Valores no permitidos: {', '.join(sorted(unknown))}. "
+                       f"Permitidos: {', '.join(allowed)}"
+            })
+        return frozenset(names)
+
+    def get_sparse_extra_columns(self):
+        """Las llaves foráneas de ?include= se leen aunque ?fields= no las pida."""
+        if self.action != 'list':
+            return ()
+        include = self.get_include()
+        return [name for name in self.include_relations if name in include]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['expand'] = self.get_expand()
+        return context
+
+    def get_queryset(self):
+        """
+        Load only what the action renders: the list loads relations and logs
+        only when expanded; retrieve loads everything but only the latest logs.
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            expand = self.get_expand()
+            relations = [path for name, path in self.expand_relations.items() if name in expand]
+            if relations:
+                queryset = queryset.select_related(*relations)
+            if 'logs' in expand:
+                queryset = queryset.prefetch_related(self.latest_logs_prefetch())
+            return queryset
+        if self.action == 'retrieve':
+            return queryset.select_related(
+                'company', 'entity__company', 'document_type'
+            ).prefetch_related(self.latest_logs_prefetch())
+        return queryset.select_related('company', 'entity', 'document_type')
+
+    @staticmethod
+    def latest_logs_prefetch():
+        """Prefetch de los últimos DOCUMENT_DETAIL_LOG_LIMIT logs de cada documento."""
+        # Un prefetch con slice solo se puede guardar en un atributo (to_attr)
+        return Prefetch(
+            'validation_logs',
+            queryset=DocumentValidationLog.objects.order_by('-created_at', '-id')[
+                :settings.DOCUMENT_DETAIL_LOG_LIMIT
+            ],
+            to_attr='latest_validation_logs'
+        )
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'expand', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='Relaciones a anidar, separadas por coma: company, entity, document_type, logs'
+            ),
+            openapi.Parameter(
+                'include', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description=(
+                    'Relaciones a incluir una sola vez en `included` (respuesta `data` + `included`): '
+                    'company, entity, document_type'
+                )
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        Listado plano de documentos; `?expand=` agrega relaciones y logs.
+
+        Con `?include=` la respuesta trae `data` (las filas) e `included`, con
+        cada empresa, entidad o tipo de documento referenciado una sola vez.
+        """
+        include = self.get_include()
+        if not include:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        documents = list(queryset) if page is None else page
+        data = self.get_serializer(documents, many=True).data
+        if page is None:
+            response = Response({'data': data})
+        else:
+            response = self.get_paginated_response(data)
+            response.data['data'] = response.data.pop('results')
+        response.data['included'] = self._build_included(documents, include)
+        return response
+
+    def _build_included(self, documents, include):
+        """Serialize each related object referenced by `documents` once, keyed by id."""
+        included = {}
+        for name, (key, model, serializer_class, nested_fields) in self.include_relations.items():
+            if name not in include:
+                continue
+            field = Document._meta.get_field(name)
+            ids = {getattr(document, field.attname) for document in documents}
+            serializer = serializer_class(
+                model.objects.filter(pk__in=ids), many=True, context=self.get_serializer_context()
+            )
+            for field_name in nested_fields:
+                serializer.child.fields.pop(field_name)
+            included[key] = {str(item['id']): item for item in serializer.data}
+        return included
+
+    @swagger_auto_schema(
+        method='get',
+        manual_parameters=[openapi.Parameter(
+            'output', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            enum=[exports.NDJSON, exports.CSV], default=exports.NDJSON,
+            description='Formato del archivo'
+        )],
+        responses={200: 'Archivo NDJSON o CSV (streaming)'}
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exportar todos los documentos que cumplen los filtros del listado.
+
+        La respuesta es un stream NDJSON (`?output=ndjson`, por defecto) o CSV
+        (`?output=csv`). Las filas se leen con un cursor del servidor en bloques
+        de DOCUMENT_EXPORT_CHUNK_SIZE, así que la memoria no depende del total.
+        """
+        output = request.query_params.get('output', exports.NDJSON)
+        if output not in exports.CONTENT_TYPES:
+            return Response({
+                'error': True,
+                'message': f"Formato no soportado: {output}. Use {' o '.join(exports.CONTENT_TYPES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            # Mismo orden que el índice (uploaded_at, id): el primer bloque sale sin ordenar todo
+            queryset = queryset.order_by(*self.keyset_ordering)
+
+        plain_fields = [
+            name for name in exports.DOCUMENT_EXPORT_FIELDS
+            if name not in exports.DOCUMENT_EXPORT_ALIASES
+        ]
+        rows = queryset.values(*plain_fields, **exports.DOCUMENT_EXPORT_ALIASES).iterator(
+            chunk_size=settings.DOCUMENT_EXPORT_CHUNK_SIZE
+        )
+
+        response = StreamingHttpResponse(
+            exports.stream(rows, output, exports.DOCUMENT_EXPORT_FIELDS),
+            content_type=exports.CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="documents-{timezone.now():%Y%m%d-%H%M%S}.{output}"'
+        )
+        return response
+
     def _upload_file_to_s3(self, file_obj, company, entity, doc_type):
         """Upload file to S3 and return metadata."""
         return self.s3_service.upload_file(
@@ -112,67 +403,31 @@ class DocumentViewSet(viewsets.ModelViewSet):
             uploaded_by=validated_data.get('uploaded_by', 'system')
         )
 
-    def _build_n8n_payload(self, document, company, entity, doc_type, callback_url):
-        """Build payload for N8N webhook."""
-        s3_url = self.s3_service.generate_presigned_url(
-            s3_key=document.s3_key,
-            expiration=3600  # 1 hora
-        )
-
-        return {
-            'document_id': str(document.id),
-            'company_id': str(company.id),
-            'entity_type': entity.entity_type,
-            'entity_id': str(entity.id),
-            'entity_code': entity.entity_code,
-            'document_type': doc_type.code,
-            'file_name': document.file_name,
-            's3_bucket': document.s3_bucket,
-            's3_key': document.s3_key,
-            's3_url': s3_url,
-            'issue_date': str(document.issue_date) if document.issue_date else None,
-            'expiration_date': str(document.expiration_date) if document.expiration_date else None,
-            'callback_url': callback_url
-        }
-
-    def _trigger_n8n_workflow(self, document, company, entity, doc_type):
-        """Trigger N8N workflow if needed and return success status."""
-        if not (doc_type.uses_n8n_workflow and doc_type.n8n_webhook_url):
-            return False
-
-        try:
-            callback_base = settings.DJANGO_CALLBACK_BASE_URL
-            callback_url = f"{callback_base}/api/documents/{document.id}/n8n-callback/"
-
-            payload = self._build_n8n_payload(document, company, entity, doc_type, callback_url)
-            self.n8n_service.trigger_workflow(doc_type.n8n_webhook_url, payload)
-
-            # Emit signal for successful N8N send
-            document_n8n_sent.send(
-                sender=self.__class__,
-                document=document,
-                webhook_url=doc_type.n8n_webhook_url,
-                error=None
-            )
-            return True
+    def _save_uploaded_document(self, company, entity, doc_type, s3_metadata, validated_data):
+        """
+        Create the document for a file already stored in S3, log the upload and
+        enqueue its N8N dispatch. Must run inside the caller's transaction so the
+        dispatch is committed together with the document.
+        """
+        document = self._create_document(company, entity, doc_type, s3_metadata, validated_data)
+        n8n_queued = N8NDispatchService.enqueue(document) is not None
 
-        except Exception as e:
-            # Emit signal for failed N8N send
-            document_n8n_sent.send(
-                sender=self.__class__,
-                document=document,
-                webhook_url=doc_type.n8n_webhook_url,
-                error=e
-            )
-            return False
+        # Emit signal for document upload
+        document_uploaded.send(
+            sender=self.__class__,
+            document=document,
+            performed_by=document.uploaded_by,
+            reason='Documento cargado exitosamente'
+        )
+        return document, n8n_queued
 
-    def _build_upload_response(self, document, n8n_triggered):
+    def _build_upload_response(self, document, n8n_queued):
         """Build response for upload endpoint."""
         return {
             'id': str(document.id),
             'status': document.validation_status,
             'message': 'Documento cargado exitosamente',
-            'n8n_triggered': n8n_triggered
+            'n8n_triggered': n8n_queued
         }
 
     @swagger_auto_schema(
@@ -202,11 +457,15 @@ class DocumentViewSet(viewsets.ModelViewSet):
         1. Valida los datos del documento
         2. Sube el archivo a S3
         3. Crea el registro en la base de datos
-        4. Si el tipo de documento usa N8N, dispara el webhook
+        4. Si el tipo de documento usa N8N, encola el envío al webhook
         5. Registra la acción en el log de auditoría
         """
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+        except Exception:
+            self._discard_streamed_upload()
+            raise
 
         validated_data = serializer.validated_data
         company = validated_data['_company']
@@ -214,43 +473,215 @@ class DocumentViewSet(viewsets.ModelViewSet):
         doc_type = validated_data['_document_type']
         file_obj = validated_data['file']
 
+        # Stage 1: transfer to S3 with no transaction open
+        try:
+            s3_metadata = self._upload_file_to_s3(file_obj, company, entity, doc_type)
+        except Exception as e:
+            self._discard_streamed_upload()
+            return Response({
+                'error': True,
+                'message': f'Error al cargar documento: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Stage 2: short transaction for the document row, audit log and N8N dispatch
         try:
             with transaction.atomic():
-                # Upload file to S3
-                s3_metadata = self._upload_file_to_s3(file_obj, company, entity, doc_type)
-
-                # Create document in database
-                document = self._create_document(company, entity, doc_type, s3_metadata, validated_data)
-
-                # Emit signal for document upload
-                document_uploaded.send(
-                    sender=self.__class__,
-                    document=document,
-                    performed_by=document.uploaded_by,
-                    reason='Documento cargado exitosamente'
+                document, n8n_queued = self._save_uploaded_document(
+                    company, entity, doc_type, s3_metadata, validated_data
                 )
+        except Exception as e:
+            # Compensate: the file is in S3 but has no document
+            self.s3_service.discard_file(
+                s3_metadata['s3_key'], reason=f'Error al crear documento: {str(e)}'
+            )
+            return Response({
+                'error': True,
+                'message': f'Error al cargar documento: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # Trigger N8N workflow if needed (outside transaction)
-            n8n_triggered = self._trigger_n8n_workflow(document, company, entity, doc_type)
+        return Response(
+            self._build_upload_response(document, n8n_queued),
+            status=status.HTTP_201_CREATED
+        )
 
-            return Response(
-                self._build_upload_response(document, n8n_triggered),
-                status=status.HTTP_201_CREATED
+    @swagger_auto_schema(
+        method='post',
+        request_body=DocumentUploadInitSerializer,
+        responses={
+            200: openapi.Response(
+                description="POST pre-firmado generado",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'upload_url': openapi.Schema(type=openapi.TYPE_STRING),
+                        'fields': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'upload_token': openapi.Schema(type=openapi.TYPE_STRING),
+                        'expires_in': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }
+                )
             )
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='upload-init')
+    def upload_init(self, request):
+        """
+        Iniciar una carga directa a S3.
+
+        Valida empresa, entidad, tipo de documento, fechas y el archivo
+        declarado (nombre, tamaño y tipo MIME) y retorna un POST pre-firmado.
+        El cliente sube el archivo directo a S3 y luego llama a `confirm`
+        con el `upload_token`.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        validated_data = serializer.validated_data
+        entity = validated_data['_entity']
+        doc_type = validated_data['_document_type']
+        expiration = settings.DOCUMENT_UPLOAD_URL_EXPIRATION
+
+        s3_key = self.s3_service.build_s3_key(
+            validated_data['file_name'],
+            company_id=str(validated_data['company_id']),
+            entity_id=str(entity.id),
+            entity_type=entity.entity_type,
+            document_type_code=doc_type.code
+        )
+
+        try:
+            presigned_post = self.s3_service.generate_presigned_post(
+                s3_key=s3_key,
+                mime_type=validated_data['mime_type'],
+                max_size=validated_data['file_size'],
+                expiration=expiration
+            )
         except Exception as e:
-            # Clean up S3 file if it was uploaded but DB transaction failed
-            if 's3_metadata' in locals():
-                try:
-                    self.s3_service.delete_file(s3_metadata['s3_key'])
-                except Exception:
-                    pass  # Log this in production
+            return Response({
+                'error': True,
+                'message': f'Error al iniciar carga: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        upload_token = signing.dumps({
+            'company_id': str(validated_data['company_id']),
+            'entity_id': str(validated_data['entity_id']),
+            'document_type_id': str(validated_data['document_type_id']),
+            'issue_date': str(validated_data['issue_date']) if validated_data.get('issue_date') else None,
+            'expiration_date': (
+                str(validated_data['expiration_date']) if validated_data.get('expiration_date') else None
+            ),
+            'uploaded_by': validated_data.get('uploaded_by', 'system'),
+            's3_key': s3_key,
+            'file_name': validated_data['file_name'],
+            'file_size': validated_data['file_size'],
+            'mime_type': validated_data['mime_type'],
+        }, salt=FileUpload.UPLOAD_TOKEN_SALT)
+
+        return Response({
+            'upload_url': presigned_post['url'],
+            'fields': presigned_post['fields'],
+            'upload_token': upload_token,
+            'expires_in': expiration
+        })
 
+    @swagger_auto_schema(
+        method='post',
+        request_body=DocumentUploadConfirmSerializer,
+        responses={
+            201: openapi.Response(
+                description="Documento cargado exitosamente",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'id': openapi.Schema(type=openapi.TYPE_STRING, format='uuid'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'n8n_triggered': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                    }
+                )
+            )
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def confirm(self, request):
+        """
+        Confirmar una carga directa a S3.
+
+        Verifica (HEAD) que el archivo exista en S3 con el tamaño y tipo
+        declarados, crea el documento, registra la carga y encola el envío a N8N.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        validated_data = serializer.validated_data
+        company = validated_data['_company']
+        entity = validated_data['_entity']
+        doc_type = validated_data['_document_type']
+        s3_key = validated_data['s3_key']
+
+        if Document.objects.filter(s3_key=s3_key).exists():
             return Response({
                 'error': True,
-                'message': f'Error al cargar documento: {str(e)}'
+                'message': 'La carga ya fue confirmada'
+            }, status=status.HTTP_409_CONFLICT)
+
+        try:
+            file_metadata = self.s3_service.get_file_metadata(s3_key)
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'Error al confirmar carga: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if file_metadata is None:
+            return Response({
+                'error': True,
+                'message': 'El archivo no ha sido cargado a S3'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if (file_metadata['file_size'] != validated_data['file_size']
+                or file_metadata['mime_type'] != validated_data['mime_type']):
+            self.s3_service.discard_file(s3_key, reason='El archivo no coincide con el declarado')
+            return Response({
+                'error': True,
+                'message': 'El archivo cargado no coincide con el declarado'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        s3_metadata = {
+            's3_bucket': self.s3_service.bucket_name,
+            's3_key': s3_key,
+            's3_region': self.s3_service.region,
+            'file_name': validated_data['file_name'],
+            'file_size': file_metadata['file_size'],
+            'mime_type': file_metadata['mime_type']
+        }
+
+        try:
+            with transaction.atomic():
+                document, n8n_queued = self._save_uploaded_document(
+                    company, entity, doc_type, s3_metadata, validated_data
+                )
+        except IntegrityError as e:
+            # Otra confirmación del mismo token creó el documento primero
+            if Document.objects.filter(s3_key=s3_key).exists():
+                return Response({
+                    'error': True,
+                    'message': 'La carga ya fue confirmada'
+                }, status=status.HTTP_409_CONFLICT)
+            return Response({
+                'error': True,
+                'message': f'Error al confirmar carga: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'Error al confirmar carga: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        return Response(
+            self._build_upload_response(document, n8n_queued),
+            status=status.HTTP_201_CREATED
+        )
+
     @swagger_auto_schema(
         method='get',
         responses={
@@ -399,9 +830,91 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 'message': f'Error al procesar callback de N8N: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @swagger_auto_schema(
+        method='post',
+        request_body=N8NCallbackBulkSerializer,
+        responses={
+            200: openapi.Response(
+                description="Resultado por documento",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'applied': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'already_processed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'not_found': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'document_id': openapi.Schema(type=openapi.TYPE_STRING, format='uuid'),
+                                    'outcome': openapi.Schema(type=openapi.TYPE_STRING),
+                                }
+                            )
+                        ),
+                    }
+                )
+            )
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='n8n-callback-bulk')
+    def n8n_callback_bulk(self, request):
+        """
+        Recibir de N8N los resultados de muchos documentos en una sola llamada.
+
+        Solo se actualizan los documentos pendientes; cada item reporta si fue
+        aplicado (applied), si el documento ya estaba procesado
+        (already_processed) o si no existe (not_found).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            outcomes = DocumentValidationService.process_n8n_callbacks_bulk(
+                serializer.validated_data['results']
+            )
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'Error al procesar callback de N8N: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        summary = {
+            outcome: 0 for outcome in (
+                N8NCallbackOutcome.APPLIED,
+                N8NCallbackOutcome.ALREADY_PROCESSED,
+                N8NCallbackOutcome.NOT_FOUND
+            )
+        }
+        for item in outcomes:
+            summary[item['outcome']] += 1
+
+        return Response({**summary, 'results': outcomes})
+
     @swagger_auto_schema(
         method='post',
         request_body=DocumentValidateSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                'mode', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=[ValidateMode.ERRORS, ValidateMode.SUMMARY, ValidateMode.JOB], default=ValidateMode.ERRORS,
+                description='errors: lista de errores; summary: conteos por tipo de error, '
+                            'tipo de documento y entidad; job: validación en segundo plano (202 con job_id)'
+            ),
+            openapi.Parameter(
+                'output', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=['json', exports.NDJSON, exports.CSV], default='json',
+                description='ndjson o csv: errores en streaming, un error por línea'
+            ),
+            openapi.Parameter(
+                'pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['cursor'],
+                description='Pagina los errores por (entity_code, error_type, document_type_code)'
+            ),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Cursor de la página (link next/previous)'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Errores por página (con pagination=cursor)'),
+        ],
         responses={
             200: openapi.Response(
                 description="Validación masiva completada",
@@ -417,9 +930,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
                                 properties={
                                     'entity_id': openapi.Schema(type=openapi.TYPE_STRING),
                                     'entity_code': openapi.Schema(type=openapi.TYPE_STRING),
-                                    'document_type': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'document_type_code': openapi.Schema(type=openapi.TYPE_STRING),
                                     'error_type': openapi.Schema(type=openapi.TYPE_STRING),
-                                    'message': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'error_message': openapi.Schema(type=openapi.TYPE_STRING),
                                 }
                             )
                         ),
@@ -438,56 +951,171 @@ class DocumentViewSet(viewsets.ModelViewSet):
         - Documentos con fechas de emisión futuras
         - Documentos vencidos
         - Documentos rechazados activos
+
+        Los errores se leen de entity_compliance; fn_validate_documents_bulk
+        solo se ejecuta para las entidades que cambiaron desde el último
+        cálculo, o para todas con force_refresh.
+
+        `company_id` acepta una empresa o una lista, y `entity_type` un tipo,
+        una lista o 'all'. El recálculo se reparte por empresa, tipo y grupos
+        de entidades en varios hilos; los errores salen en un solo orden
+        (entity_code, error_type, document_type_code).
+
+        `?mode=summary` devuelve solo conteos; `?output=ndjson|csv` transmite
+        los errores en streaming; `?pagination=cursor` los pagina por keyset.
+        `?mode=job` encola la validación y responde 202 con el id del job
+        (ver /api/validation-jobs/{id}/).
+
+        `as_of` evalúa a otra fecha y `expiring_within_days` agrega errores
+        expiring_soon; en ese caso se ejecuta la función en el momento.
         """
+        mode = request.query_params.get('mode', ValidateMode.ERRORS)
+        output = request.query_params.get('output', 'json')
+        modes = (ValidateMode.ERRORS, ValidateMode.SUMMARY, ValidateMode.JOB)
+        if mode not in modes:
+            return Response({
+                'error': True,
+                'message': f"Modo no soportado: {mode}. Use {', '.join(modes)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if output != 'json' and (output not in exports.CONTENT_TYPES or mode != ValidateMode.ERRORS):
+            return Response({
+                'error': True,
+                'message': f"Formato no soportado: {output}. Use json, {' o '.join(exports.CONTENT_TYPES)} "
+                           f"(solo json con mode={ValidateMode.SUMMARY} o mode={ValidateMode.JOB})"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        company_id = serializer.validated_data['company_id']
-        entity_type = serializer.validated_data['entity_type']
+        company_ids = serializer.validated_data['company_id']
+        entity_types = serializer.validated_data['entity_type']
         entity_ids = serializer.validated_data.get('entity_ids')
 
-        try:
-            with connection.cursor() as cursor:
-                # Llamar a la función PL/pgSQL
-                if entity_ids:
-                    cursor.execute("""
-                        SELECT * FROM fn_validate_documents_bulk(
-                            %s::uuid,
-                            %s::varchar,
-                            %s::uuid[]
-                        )
-                    """, [str(company_id), entity_type, [str(eid) for eid in entity_ids]])
-                else:
-                    cursor.execute("""
-                        SELECT * FROM fn_validate_documents_bulk(
-                            %s::uuid,
-                            %s::varchar,
-                            NULL
-                        )
-                    """, [str(company_id), entity_type])
-
-                # Obtener resultados
-                columns = [col[0] for col in cursor.description]
-                errors = [
-                    dict(zip(columns, row))
-                    for row in cursor.fetchall()
-                ]
-
-            # Contar entidades validadas
-            validated_entities = len(set(error['entity_id'] for error in errors)) if errors else 0
+        as_of = serializer.validated_data.get('as_of')
+        expiring_within_days = serializer.validated_data.get('expiring_within_days')
+        # Otra fecha o vencimientos próximos: se calcula en el momento, sin entity_compliance
+        point_in_time = expiring_within_days is not None or (
+            as_of is not None and as_of != timezone.localdate()
+        )
+        if point_in_time and (mode == ValidateMode.JOB or self._paginate_validate(request)):
+            return Response({
+                'error': True,
+                'message': f'as_of y expiring_within_days no admiten mode={ValidateMode.JOB} '
+                           f'ni pagination={SelectablePagination.CURSOR}'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
+        if mode == ValidateMode.JOB:
+            if len(company_ids) > 1 or len(entity_types) > 1:
+                return Response({
+                    'error': True,
+                    'message': f'mode={ValidateMode.JOB} admite una sola empresa y un solo tipo de entidad'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            job, created = ValidationJobService.submit(
+                company_ids[0], entity_types[0], entity_ids,
+                force_refresh=serializer.validated_data['force_refresh']
+            )
             return Response({
-                'validated_entities': validated_entities,
-                'total_errors': len(errors),
-                'errors': errors
-            })
+                'job_id': str(job.id),
+                'status': job.status,
+                # False: se unió a un job idéntico que ya estaba en curso
+                'created': created,
+                'url': request.build_absolute_uri(reverse('validation-job-detail', args=[job.id]))
+            }, status=status.HTTP_202_ACCEPTED)
 
+        force_refresh = serializer.validated_data['force_refresh']
+        scope = (
+            company_ids, entity_types, entity_ids,
+            as_of or timezone.localdate(), expiring_within_days
+        )
+        try:
+            if output == 'json' and not self._paginate_validate(request):
+                # Respuesta completa: cache por versión de datos de las empresas
+                key = validation_cache.cache_key(
+                    company_ids, entity_types, entity_ids, mode=mode,
+                    as_of=scope[3] if point_in_time else None,
+                    expiring_within_days=expiring_within_days
+                )
+                return Response(validation_cache.get_or_compute(
+                    key,
+                    lambda: self._validation_payload(mode, scope, point_in_time, force_refresh),
+                    refresh=force_refresh
+                ))
+
+            if self._paginate_validate(request):
+                compliance.refresh_stale_many(company_ids, entity_types, entity_ids, force=force_refresh)
+                paginator = KeysetPagination(compliance.ERROR_ORDERING)
+                page = paginator.paginate_queryset(
+                    compliance.errors_for(company_ids, entity_types, entity_ids).values(
+                        *compliance.ERROR_FIELDS, 'id'
+                    ),
+                    request, self
+                )
+                return paginator.get_paginated_response([
+                    {field: row[field] for field in compliance.ERROR_FIELDS} for row in page
+                ])
+
+            response = StreamingHttpResponse(
+                exports.stream(
+                    self._validation_rows(scope, point_in_time, force_refresh),
+                    output, compliance.ERROR_FIELDS
+                ),
+                content_type=exports.CONTENT_TYPES[output]
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="validation-{timezone.now():%Y%m%d-%H%M%S}.{output}"'
+            )
+            return response
+
+        except APIException:
+            # Cursor o page_size inválidos
+            raise
         except Exception as e:
             return Response({
                 'error': True,
                 'message': f'Error en validación masiva: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _validation_payload(self, mode: str, scope, point_in_time: bool, force_refresh: bool) -> Dict:
+        """Respuesta JSON de validate: resumen o lista de errores."""
+        if mode == ValidateMode.SUMMARY:
+            if point_in_time:
+                return compliance.summarize_as_of(*scope)
+            compliance.refresh_stale_many(*scope[:3], force=force_refresh)
+            return compliance.summarize(compliance.errors_for(*scope[:3]))
+
+        errors = list(self._validation_rows(scope, point_in_time, force_refresh))
+
+        # Contar entidades validadas
+        validated_entities = len(set(error['entity_id'] for error in errors)) if errors else 0
+
+        return {
+            'validated_entities': validated_entities,
+            'total_errors': len(errors),
+            'errors': errors
+        }
+
+    @staticmethod
+    def _validation_rows(scope, point_in_time: bool, force_refresh: bool) -> Iterator[Dict]:
+        """
+        Errores de validate en el orden de la respuesta. `scope` es
+        (company_ids, entity_types, entity_ids, as_of, expiring_within_days).
+        """
+        if point_in_time:
+            return compliance.iter_errors_as_of(*scope, chunk_size=settings.DOCUMENT_EXPORT_CHUNK_SIZE)
+        compliance.refresh_stale_many(*scope[:3], force=force_refresh)
+        return compliance.errors_for(*scope[:3]).values(*compliance.ERROR_FIELDS).iterator(
+            chunk_size=settings.DOCUMENT_EXPORT_CHUNK_SIZE
+        )
+
+    @staticmethod
+    def _paginate_validate(request) -> bool:
+        """validate pagina con ?pagination=cursor o al seguir un link con ?cursor=."""
+        params = request.query_params
+        return (
+            params.get(SelectablePagination.query_param) == SelectablePagination.CURSOR
+            or KeysetPagination.cursor_query_param in params
+        )
+
 
 class DocumentValidationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -498,8 +1126,60 @@ class DocumentValidationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = DocumentValidationLog.objects.select_related('document').all()
     serializer_class = DocumentValidationLogSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['document', 'action', 'performed_by']
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
+    # created_at__gte / created_at__lt limitan las particiones mensuales que se leen
+    filterset_fields = {
+        'document': ['exact'],
+        'action': ['exact'],
+        'performed_by': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
     search_fields = ['reason', 'performed_by']
+    search_vectors = {'reason': 'search_vector'}
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    default_pagination = 'cursor'
+    keyset_ordering = ('-created_at', '-id')
+
+
+class ValidationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para consultar validaciones masivas en segundo plano (solo lectura).
+
+    list: Listar los jobs
+    retrieve: Estado y progreso del job, con sus errores paginados por cursor
+    """
+    queryset = ValidationJob.objects.all()
+    serializer_class = ValidationJobSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['company', 'entity_type', 'status']
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    default_pagination = 'cursor'
+    keyset_ordering = ('-created_at', '-id')
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Cursor de la página de errores (link next/previous)'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Errores por página'),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Estado del job y una página de sus errores, ordenados por entity_code,
+        error_type y document_type_code. Mientras el job corre, las páginas
+        muestran los errores de las entidades ya procesadas.
+        """
+        job = self.get_object()
+        paginator = KeysetPagination(compliance.ERROR_ORDERING)
+        page = paginator.paginate_queryset(
+            job.results.values(*compliance.ERROR_FIELDS, 'id'), request, self
+        )
+        return Response({
+            **self.get_serializer(job).data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': [{field: row[field] for field in compliance.ERROR_FIELDS} for row in page],
+        })
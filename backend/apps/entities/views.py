@@ -1,10 +1,12 @@
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.documents.mixins import SparseFieldsetMixin
+from apps.documents.search import IndexedSearchFilter
 from .models import Entity
 from .serializers import EntitySerializer
 
 
-class EntityViewSet(viewsets.ModelViewSet):
+class EntityViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar entidades (vehículos, empleados, proveedores, activos).
 
@@ -17,7 +19,7 @@ class EntityViewSet(viewsets.ModelViewSet):
     """
     queryset = Entity.objects.select_related('company').all()
     serializer_class = EntitySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['company', 'entity_type', 'is_active']
     search_fields = ['entity_code', 'entity_name']
     ordering_fields = ['entity_code', 'entity_name', 'created_at']
@@ -40,6 +40,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'apps.documents.middleware.UploadPrecheckMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -89,6 +90,23 @@ else:
         }
     }
 
+# Cache: shared state between workers (N8N circuit breakers). Redis when
+# REDIS_URL is set, otherwise per-process local memory.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -117,7 +135,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.documents.pagination.SelectablePagination',
     'PAGE_SIZE': 50,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -147,10 +165,68 @@ AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = None
 AWS_S3_CUSTOM_DOMAIN = None
+AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=20, cast=int)
+AWS_S3_CONNECT_TIMEOUT = config('AWS_S3_CONNECT_TIMEOUT', default=5, cast=int)
+AWS_S3_READ_TIMEOUT = config('AWS_S3_READ_TIMEOUT', default=60, cast=int)
+AWS_S3_MAX_ATTEMPTS = config('AWS_S3_MAX_ATTEMPTS', default=3, cast=int)
+
+# Validation logs (particiones mensuales en PostgreSQL)
+VALIDATION_LOG_RETENTION_MONTHS = config('VALIDATION_LOG_RETENTION_MONTHS', default=24, cast=int)
+VALIDATION_LOG_PARTITIONS_AHEAD = config('VALIDATION_LOG_PARTITIONS_AHEAD', default=3, cast=int)
+
+# Errores de cumplimiento por entidad (entity_compliance)
+# Entidades recalculadas por llamada a fn_validate_documents_bulk
+COMPLIANCE_REFRESH_CHUNK_SIZE = config('COMPLIANCE_REFRESH_CHUNK_SIZE', default=500, cast=int)
+# Segundos sin cambios antes de que el worker recalcule una entidad
+COMPLIANCE_REFRESH_DEBOUNCE = config('COMPLIANCE_REFRESH_DEBOUNCE', default=5, cast=float)
+# Hilos (y conexiones a la base de datos) por validación masiva
+VALIDATION_MAX_WORKERS = config('VALIDATION_MAX_WORKERS', default=4, cast=int)
+# Validación masiva en segundo plano (worker process_validation_jobs)
+VALIDATION_JOB_CHUNK_SIZE = config('VALIDATION_JOB_CHUNK_SIZE', default=1000, cast=int)
+# Segundos sin avance antes de que otro worker retome el job
+VALIDATION_JOB_CLAIM_TIMEOUT = config('VALIDATION_JOB_CLAIM_TIMEOUT', default=600, cast=int)
+# Cache de respuestas de validate por versión de datos de la empresa (0 = sin cache)
+VALIDATE_CACHE_TIMEOUT = config('VALIDATE_CACHE_TIMEOUT', default=300, cast=int)
+# Respuestas con más errores no se guardan en el cache
+VALIDATE_CACHE_MAX_ERRORS = config('VALIDATE_CACHE_MAX_ERRORS', default=10000, cast=int)
+# Segundos que una solicitud idéntica espera el cálculo en curso
+VALIDATE_CACHE_WAIT = config('VALIDATE_CACHE_WAIT', default=30, cast=float)
+# Duración del lock del cálculo en curso: debe cubrir la validación más lenta
+VALIDATE_CACHE_LOCK_TIMEOUT = config('VALIDATE_CACHE_LOCK_TIMEOUT', default=300, cast=int)
+
+# Document uploads
+DOCUMENT_MAX_UPLOAD_SIZE_MB = config('DOCUMENT_MAX_UPLOAD_SIZE_MB', default=10, cast=int)
+DOCUMENT_UPLOAD_FORM_OVERHEAD_BYTES = config('DOCUMENT_UPLOAD_FORM_OVERHEAD_BYTES', default=64 * 1024, cast=int)
+DOCUMENT_UPLOAD_URL_EXPIRATION = config('DOCUMENT_UPLOAD_URL_EXPIRATION', default=900, cast=int)
+# Logs más recientes que se incluyen en el detalle de un documento
+DOCUMENT_DETAIL_LOG_LIMIT = config('DOCUMENT_DETAIL_LOG_LIMIT', default=20, cast=int)
+# Filas por lectura del cursor en /api/documents/export/
+DOCUMENT_EXPORT_CHUNK_SIZE = config('DOCUMENT_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Stream multipart uploads directly into S3 multipart parts (no temp files)
+S3_STREAMING_UPLOADS = config('S3_STREAMING_UPLOADS', default=False, cast=bool)
+S3_STREAMING_UPLOAD_PREFIX = config('S3_STREAMING_UPLOAD_PREFIX', default='uploads/')
+S3_MULTIPART_PART_SIZE = config('S3_MULTIPART_PART_SIZE', default=8 * 1024 * 1024, cast=int)
+S3_MULTIPART_CONCURRENCY = config('S3_MULTIPART_CONCURRENCY', default=4, cast=int)
 
 # N8N Configuration
 N8N_BASE_URL = config('N8N_BASE_URL', default='http://localhost:5678')
 N8N_API_KEY = config('N8N_API_KEY', default='')
+N8N_CONNECT_TIMEOUT = config('N8N_CONNECT_TIMEOUT', default=5, cast=float)
+N8N_READ_TIMEOUT = config('N8N_READ_TIMEOUT', default=30, cast=float)
+N8N_HTTP_POOL_MAXSIZE = config('N8N_HTTP_POOL_MAXSIZE', default=10, cast=int)
+N8N_HTTP_MAX_RETRIES = config('N8N_HTTP_MAX_RETRIES', default=2, cast=int)
+N8N_CIRCUIT_FAILURE_THRESHOLD = config('N8N_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+N8N_CIRCUIT_FAILURE_WINDOW = config('N8N_CIRCUIT_FAILURE_WINDOW', default=60, cast=int)
+N8N_CIRCUIT_RECOVERY_TIMEOUT = config('N8N_CIRCUIT_RECOVERY_TIMEOUT', default=30, cast=int)
+N8N_WEBHOOK_MAX_CONCURRENCY = config('N8N_WEBHOOK_MAX_CONCURRENCY', default=4, cast=int)
+N8N_DISPATCH_MAX_ATTEMPTS = config('N8N_DISPATCH_MAX_ATTEMPTS', default=6, cast=int)
+N8N_DISPATCH_BACKOFF_BASE = config('N8N_DISPATCH_BACKOFF_BASE', default=10, cast=int)
+N8N_DISPATCH_BACKOFF_MAX = config('N8N_DISPATCH_BACKOFF_MAX', default=3600, cast=int)
+N8N_DISPATCH_CLAIM_TIMEOUT = config('N8N_DISPATCH_CLAIM_TIMEOUT', default=300, cast=int)
+N8N_BATCH_MAX_SIZE = config('N8N_BATCH_MAX_SIZE', default=100, cast=int)
+N8N_BATCH_MAX_WAIT = config('N8N_BATCH_MAX_WAIT', default=30, cast=int)
+N8N_CALLBACK_BULK_MAX_ITEMS = config('N8N_CALLBACK_BULK_MAX_ITEMS', default=1000, cast=int)
 DJANGO_CALLBACK_BASE_URL = config('DJANGO_CALLBACK_BASE_URL', default='http://localhost:8000')
 
 # Swagger Settings
@@ -146,4 +146,5 @@ BEGIN
 END;
 $$;
 
-COMMENT ON FUNCTION fn_validate_documents_bulk(UUID, VARCHAR, UUID[]) IS
\ No newline at end of file
+COMMENT ON FUNCTION fn_validate_documents_bulk(UUID, VARCHAR, UUID[]) IS
+'Valida masivamente los documentos de una empresa: obligatorios faltantes, emisión futura, vencidos y rechazados.';